@@ -2,17 +2,142 @@ import argparse
 import sys
 from scripts.update_db import update_prices
 from scripts.scan_mixes import run_scan
+from scripts.rescore import run_rescore
+from scripts.backtest import run_backtest_command
+from scripts.results import run_results
+from scripts.difftest import run_difftest
+from scripts.price_listings import run_price
+from scripts.allocate import run_allocate
+from scripts.run_pipeline import run_pipeline
+from scripts.distributed import run_coordinator, run_worker_command
+from scripts.train_model import train
+from scripts.import_metadata import run_import_metadata
+from scripts.float_report import run_float_report
+from tradeup.difftest import CHECKS
+from tradeup.scan_filter import ScanFilter
+from tradeup.config import (
+    FEE, RMB_TO_USD_RATE, MIN_ROI, MIN_PROFIT, IRREGULAR_OUTPUT_SOURCE, BACKTEST_STEP_HOURS, BACKTEST_HORIZON_HOURS,
+    MAX_FILLERS_PER_GROUP, TRAIN_WINDOW_DAYS, TRAIN_HALF_LIFE_DAYS
+)
 
 def main():
     parser = argparse.ArgumentParser(description="CS2 TradeUp Finder CLI")
-    parser.add_argument("command", choices=["update", "scan"], help="Command to run")
+    sub = parser.add_subparsers(dest="command", required=True, help="Command to run")
+    sub.add_parser("update", help="Import prices, run the sanitizer and flag anomalies")
+    p_meta = sub.add_parser("metadata", help="Upsert skins/collections from a skin metadata dump")
+    p_meta.add_argument("path", nargs="?", help="JSON array or NDJSON dump (default: data/skins_metadata.json)")
+    p_report = sub.add_parser("report", help="Regenerate the float ratio reports (only goods whose buckets changed)")
+    p_report.add_argument("--full", action="store_true", help="Drop the report cache and recompute every goods")
+    p_run = sub.add_parser("run", help="update + scan in one process, sharing the in-memory market")
+    p_run.add_argument("--deadline", type=float, help="Scan time budget in seconds")
+    p_run.add_argument("--top-k", type=int, help="Only keep the K most profitable mixes")
+    p_scan = sub.add_parser("scan", help="Search for 1/9 mix trade-ups")
+    p_scan.add_argument("--deadline", type=float, help="Return the best results found within this many seconds")
+    p_scan.add_argument("--top-k", type=int, help="Only keep (and search for) the K most profitable mixes")
+    p_scan.add_argument("--collection", action="append", help="Target collection (id or name), repeatable")
+    p_scan.add_argument("--rarity", type=int, action="append", help="Input rarity rank, repeatable")
+    p_scan.add_argument("--stattrak", dest="stattrak", action="store_true", default=None)
+    p_scan.add_argument("--no-stattrak", dest="stattrak", action="store_false")
+    p_scan.add_argument("--min-price", type=float, help="Minimum input price (USD, target and fillers)")
+    p_scan.add_argument("--max-price", type=float, help="Maximum input price (USD, target and fillers)")
+
+    p_train = sub.add_parser("train", help="Fit the float models on a time window of the float bucket history")
+    p_train.add_argument("--window-days", type=float, default=TRAIN_WINDOW_DAYS, help="Training window length")
+    p_train.add_argument("--half-life-days", type=float, default=TRAIN_HALF_LIFE_DAYS, help="Recency weight half-life")
+    p_train.add_argument("--as-of", help="Window end 'YYYY-MM-DD HH:MM:SS' (default: latest snapshot)")
+
+    p_rescore = sub.add_parser("rescore", help="Re-score the last scan for new parameters without rescanning")
+    p_rescore.add_argument("--fee", type=float, default=FEE)
+    p_rescore.add_argument("--rate", type=float, default=RMB_TO_USD_RATE, help="RMB to USD rate")
+    p_rescore.add_argument("--min-roi", type=float, default=MIN_ROI)
+    p_rescore.add_argument("--irregular", choices=["predicted", "real"], default=IRREGULAR_OUTPUT_SOURCE,
+                           help="Price source for irregular outputs")
+    p_rescore.add_argument("--refresh-prices", action="store_true", help="Re-read output prices from the DB")
+    p_rescore.add_argument("--top", type=int, default=10)
+
+    p_bt = sub.add_parser("backtest", help="Replay price_history snapshots and score what the scanner reported")
+    p_bt.add_argument("--start", help="First snapshot (YYYY-MM-DD HH:MM:SS), default: oldest history row")
+    p_bt.add_argument("--end", help="Last snapshot, default: newest history row")
+    p_bt.add_argument("--step-hours", type=float, default=BACKTEST_STEP_HOURS)
+    p_bt.add_argument("--horizon-hours", type=float, default=BACKTEST_HORIZON_HOURS)
+    p_bt.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    p_bt.add_argument("--top-k", type=int, help="Only score the K most profitable mixes per snapshot")
+
+    p_res = sub.add_parser("results", help="Query stored scan results (filters + paging)")
+    p_res.add_argument("--run-id", type=int, help="Scan run to read (default: latest)")
+    p_res.add_argument("--collection", help="Target or filler collection name")
+    p_res.add_argument("--stattrak", dest="stattrak", action="store_true", default=None)
+    p_res.add_argument("--no-stattrak", dest="stattrak", action="store_false")
+    p_res.add_argument("--min-roi", type=float)
+    p_res.add_argument("--min-profit", type=float)
+    p_res.add_argument("--max-cost", type=float)
+    p_res.add_argument("--order-by", choices=["profit", "roi", "cost", "ev"], default="profit")
+    p_res.add_argument("--limit", type=int, default=20)
+    p_res.add_argument("--page", type=int, default=1)
+    p_res.add_argument("--outcomes", action="store_true", help="Also list each result's outcomes")
+    p_res.add_argument("--json", dest="export_path", help="Export the page (with outcomes) to a JSON file")
+
+    p_diff = sub.add_parser("difftest", help="Fuzz the optimized engines against the reference implementations")
+    p_diff.add_argument("--cases", type=int, default=200, help="Random cases per check")
+    p_diff.add_argument("--seed", type=int, default=0)
+    p_diff.add_argument("--check", action="append", choices=sorted(CHECKS), help="Only run this check (repeatable)")
+
+    p_price = sub.add_parser("price", help="Price a CSV/NDJSON stream of listings at their exact float")
+    p_price.add_argument("input", nargs="?", default="-", help="Listings file ('-' for stdin)")
+    p_price.add_argument("--output", help="Output file (default: stdout)")
+    p_price.add_argument("--format", choices=["csv", "ndjson"], help="Default: from the input extension, else ndjson")
+
+    p_alloc = sub.add_parser("allocate", help="Pick contracts and quantities for a budget from the last scan")
+    p_alloc.add_argument("--budget", type=float, required=True, help="Capital to spend (USD)")
+    p_alloc.add_argument("--run-id", type=int, help="Scan run to allocate from (default: latest)")
+    p_alloc.add_argument("--max-copies", type=int, help="Cap on copies of a single contract")
+
+    p_coord = sub.add_parser("coordinator", help="Distributed scan: shard the market across worker processes/machines")
+    p_coord.add_argument("--listen", help="host:port to listen on (default: DIST_ADDRESS)")
+    p_coord.add_argument("--local-workers", type=int, default=0, help="Workers to start on this machine")
+    p_coord.add_argument("--authkey", help="Shared secret (default: $TRADEUP_DIST_AUTHKEY; required off loopback)")
+    p_coord.add_argument("--top-k", type=int, help="Only keep the K most profitable mixes")
+    p_coord.add_argument("--min-roi", type=float, default=MIN_ROI)
+    p_coord.add_argument("--min-profit", type=float, default=MIN_PROFIT)
+    p_coord.add_argument("--max-fillers", type=int, default=MAX_FILLERS_PER_GROUP,
+                         help="Cheapest fillers kept per group (0: no cutoff)")
+    p_worker = sub.add_parser("worker", help="Scan shards for a coordinator")
+    p_worker.add_argument("--connect", help="Coordinator host:port (default: DIST_ADDRESS)")
+    p_worker.add_argument("--authkey", help="Shared secret of the coordinator (default: $TRADEUP_DIST_AUTHKEY)")
     
     args = parser.parse_args()
     
     if args.command == "update":
         update_prices()
+    elif args.command == "metadata":
+        run_import_metadata(args.path)
+    elif args.command == "report":
+        run_float_report(args.full)
+    elif args.command == "run":
+        run_pipeline(args.deadline, args.top_k)
     elif args.command == "scan":
-        run_scan()
+        scan_filter = ScanFilter(args.collection, args.rarity, args.stattrak, args.min_price, args.max_price)
+        run_scan(args.deadline, args.top_k, scan_filter=scan_filter if scan_filter.active else None)
+    elif args.command == "train":
+        train(args.window_days, args.half_life_days, args.as_of)
+    elif args.command == "rescore":
+        run_rescore(args.fee, args.rate, args.min_roi, args.irregular, args.refresh_prices, args.top)
+    elif args.command == "backtest":
+        run_backtest_command(args.start, args.end, args.step_hours, args.horizon_hours, args.workers, args.top_k)
+    elif args.command == "results":
+        run_results(args.run_id, args.collection, args.stattrak, args.min_roi, args.min_profit, args.max_cost,
+                    args.order_by, args.limit, args.page, args.outcomes, args.export_path)
+    elif args.command == "difftest":
+        run_difftest(args.cases, args.seed, args.check)
+    elif args.command == "price":
+        run_price(args.input, args.output, args.format)
+    elif args.command == "allocate":
+        run_allocate(args.budget, args.run_id, args.max_copies)
+    elif args.command == "coordinator":
+        run_coordinator(args.listen, args.local_workers, args.top_k, args.min_roi, args.min_profit, args.max_fillers,
+                        args.authkey)
+    elif args.command == "worker":
+        run_worker_command(args.connect, args.authkey)
 
 if __name__ == "__main__":
     main()
@@ -1,6 +1,7 @@
 import json
 import math
 import os
+import numpy as np
 
 # Standard CS2 Float Boundaries (Real Float)
 LIMIT_FN = 0.07
@@ -9,15 +10,21 @@ LIMIT_FT = 0.38
 LIMIT_WW = 0.45
 # Psychological Barriers (Real Float)
 BARRIER_BS_TRANSITION = 0.75
+BATCH_CONDITIONS = ["FN", "MW", "FT", "WW", "BS"]
 
 class PricingEngine:
-    def __init__(self, model_params_path="data/model_params.json"):
+    def __init__(self, model_params_path="data/model_params.json", skin_curves_path="data/skin_curves.json"):
+        base_dir = os.path.dirname(os.path.abspath(__file__))
         if not os.path.isabs(model_params_path):
-            base_dir = os.path.dirname(os.path.abspath(__file__))
             self.model_params_path = os.path.join(base_dir, model_params_path)
         else:
             self.model_params_path = model_params_path
+        if not os.path.isabs(skin_curves_path):
+            self.skin_curves_path = os.path.join(base_dir, skin_curves_path)
+        else:
+            self.skin_curves_path = skin_curves_path
         self._model_params = None
+        self._skin_curves = None
 
     @property
     def model_params(self):
@@ -25,17 +32,34 @@ class PricingEngine:
             self._load_params()
         return self._model_params
 
-    def _load_params(self):
+    @property
+    def skin_curves(self):
+        """Per-skin (alpha, k) keyed "<skin_id>_<is_st>", fitted by scripts/train_model.py"""
+        if self._skin_curves is None:
+            self._skin_curves = self._load_json(self.skin_curves_path)
+        return self._skin_curves
+
+    def _load_json(self, path):
         try:
-            if os.path.exists(self.model_params_path):
-                with open(self.model_params_path, "r") as f:
-                    self._model_params = json.load(f)
-            else:
-                self._model_params = {}
+            if os.path.exists(path):
+                with open(path, "r") as f:
+                    return json.load(f)
         except Exception:
-            self._model_params = {}
+            pass
+        return {}
+
+    def curve_params(self, rarity, is_st, skin_id=None):
+        """Exponential FN parameters: the skin's own curve when fitted, else its rarity group's."""
+        if skin_id is not None:
+            params = self.skin_curves.get(f"{skin_id}_{int(is_st)}")
+            if params:
+                return params
+        return self.model_params.get(f"{rarity}_{int(is_st)}", {"alpha": 0, "k": 0})
+
+    def _load_params(self):
+        self._model_params = self._load_json(self.model_params_path)
 
-    def predict_price(self, target_real_float, skin_min, skin_max, base_prices, rarity, is_st):
+    def predict_price(self, target_real_float, skin_min, skin_max, base_prices, rarity, is_st, skin_id=None):
         """
         Rulebook-based pricing engine.
         Classification is based on target_real_float.
@@ -67,8 +91,7 @@ class PricingEngine:
             # otherwise we use the best condition price available.
             price_base = bp["FN"] if f < LIMIT_FN else bp[self._get_cond(skin_min)]
             
-            model_key = f"{rarity}_{int(is_st)}"
-            params = self.model_params.get(model_key, {"alpha": 0, "k": 0})
+            params = self.curve_params(rarity, is_st, skin_id)
             alpha = params.get("alpha", 0)
             k = params.get("k", 0)
             
@@ -103,6 +126,48 @@ class PricingEngine:
         else:
             return bp["BS"]
 
+    def base_price_row(self, base_prices):
+        """Condition prices after fallbacks, in BATCH_CONDITIONS order (resolve once per skin for batches)."""
+        bp = self._apply_fallbacks(base_prices)
+        return [bp.get(c) if bp.get(c) is not None else np.nan for c in BATCH_CONDITIONS]
+
+    def model_row(self, rarity, is_st, skin_id=None):
+        params = self.curve_params(rarity, is_st, skin_id)
+        return params.get("alpha", 0), params.get("k", 0)
+
+    def predict_price_batch(self, floats, skin_min, skin_max, bp, alpha, k):
+        """
+        Vectorized predict_price over n listings (same rulebook).
+        Every argument is an array of length n, except bp: (n, 5) base prices
+        from base_price_row() and alpha/k from model_row().
+        """
+        f = np.asarray(floats, dtype=float)
+        s_min = np.asarray(skin_min, dtype=float)
+        s_max = np.asarray(skin_max, dtype=float)
+        bp = np.asarray(bp, dtype=float).reshape(len(f), 5)
+        fn, mw, ft, ww, bs = bp.T
+        span = s_max - s_min
+        adj = np.divide(f - s_min, span, out=np.zeros_like(f), where=span > 0)
+        adj = np.clip(adj, 0.0, 1.0)
+        lerp = self._lerp
+
+        # RULE 0 / E: FN zone or best possible float, priced off FN or the skin's best condition
+        best_cond = np.searchsorted([LIMIT_FN, LIMIT_MW, LIMIT_FT, LIMIT_WW], s_min, side='right')
+        price_base = np.where(f < LIMIT_FN, fn, bp[np.arange(len(f)), best_cond])
+        rule_e = price_base * (1 + np.asarray(alpha) * np.exp(-np.asarray(k) * adj))
+        # RULE D / C
+        rule_d = lerp(LIMIT_MW, LIMIT_FN, mw, 0.9 * fn, f)
+        rule_c = np.where(f >= 0.30, ft, lerp(0.30, LIMIT_MW, ft, 0.9 * mw, f))
+        # RULE B (WW ignored when it is not cheaper than FT)
+        rule_b = np.where(ww >= ft, lerp(BARRIER_BS_TRANSITION, LIMIT_FT, bs, ft, f),
+                          np.where(f >= LIMIT_WW, lerp(BARRIER_BS_TRANSITION, LIMIT_WW, bs, ww, f),
+                                   lerp(LIMIT_WW, LIMIT_FT, ww, ft, f)))
+
+        is_best_possible = f <= s_min + 0.0005
+        return np.select(
+            [(f < LIMIT_FN) | is_best_possible, f < LIMIT_MW, f < LIMIT_FT, f < BARRIER_BS_TRANSITION],
+            [rule_e, rule_d, rule_c, rule_b], default=bs)
+
     def _get_cond(self, f):
         if f < LIMIT_FN: return "FN"
         if f < LIMIT_MW: return "MW"
@@ -134,5 +199,5 @@ class PricingEngine:
 
 engine = PricingEngine()
 
-def predict_price(target_real_float, skin_min, skin_max, base_prices, rarity, is_st):
-    return engine.predict_price(target_real_float, skin_min, skin_max, base_prices, rarity, is_st)
+def predict_price(target_real_float, skin_min, skin_max, base_prices, rarity, is_st, skin_id=None):
+    return engine.predict_price(target_real_float, skin_min, skin_max, base_prices, rarity, is_st, skin_id)
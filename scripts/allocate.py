@@ -0,0 +1,49 @@
+import sys
+import os
+import json
+import time
+
+# Add root folder to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tradeup.database import init_db, get_db_connection
+from tradeup.results_store import latest_run_id
+from tradeup.portfolio import InventoryPool, candidates_from_rows, allocate, load_inventory
+from tradeup.buckets import load_float_buckets
+from tradeup.orderbook import OrderBook
+from tradeup.config import REPORTS_DIR, USE_ORDER_BOOK
+
+def run_allocate(budget, run_id=None, max_copies=None, output_path=os.path.join(REPORTS_DIR, "buy_list.json")):
+    init_db()
+    conn = get_db_connection()
+    run_id = run_id or latest_run_id(conn)
+    if run_id is None:
+        print("No scan stored yet. Run `python3 main.py scan` first.")
+        conn.close()
+        return None
+
+    cands = candidates_from_rows(conn.execute("SELECT * FROM opportunities WHERE run_id = ?", (run_id,)))
+    pool = InventoryPool(load_inventory(conn), OrderBook(load_float_buckets()) if USE_ORDER_BOOK else None)
+    conn.close()
+
+    start = time.perf_counter()
+    plan = allocate(cands, budget, pool, max_copies)
+    plan['run_id'] = run_id
+    print(f"Allocated ${plan['spent']:.2f} of ${budget:.2f} over {len(plan['contracts'])} contracts "
+          f"from {len(cands)} candidates in {time.perf_counter() - start:.2f}s. Expected profit: ${plan['expected_profit']:.2f}")
+
+    for c in plan['contracts'][:10]:
+        print(f"  {c['copies']:>4}x {c['label']}")
+    print("\nBuy list:")
+    for b in plan['buy_list'][:20]:
+        st = "ST " if b['is_stattrak'] else ""
+        print(f"  {b['quantity']:>5}x {st}{b['name']} ({b['condition']}) float <= {b['max_float']:.4f}  ~${b['est_cost']:.2f}")
+
+    os.makedirs(REPORTS_DIR, exist_ok=True)
+    with open(output_path, "w", encoding='utf-8') as f:
+        json.dump(plan, f, indent=2, ensure_ascii=False)
+    print(f"\nPlan saved to {output_path}")
+    return plan
+
+if __name__ == "__main__":
+    run_allocate(float(sys.argv[1]) if len(sys.argv) > 1 else 100.0)
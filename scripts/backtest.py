@@ -0,0 +1,56 @@
+import sys
+import os
+import json
+import time
+
+# Add root folder to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tradeup.config import REPORTS_DIR, BACKTEST_STEP_HOURS, BACKTEST_HORIZON_HOURS
+from tradeup.database import init_db, get_db_connection
+from tradeup.backtest import run_backtest, snapshot_times
+
+def run_backtest_command(start=None, end=None, step_hours=BACKTEST_STEP_HOURS, horizon_hours=BACKTEST_HORIZON_HOURS,
+                         workers=None, top_k=None):
+    init_db()
+    if start is None or end is None:
+        conn = get_db_connection()
+        first, last = conn.execute("SELECT MIN(recorded_at), MAX(recorded_at) FROM price_history").fetchone()
+        conn.close()
+        if first is None:
+            print("Error: price_history is empty.")
+            return None
+        start = start or first
+        end = end or last
+
+    times = snapshot_times(start, end, step_hours)
+    print(f"Backtesting {len(times)} snapshots from {start} to {end} (horizon: {horizon_hours}h)...")
+    t0 = time.perf_counter()
+    summaries = run_backtest(times, horizon_hours, workers, top_k)
+    elapsed = time.perf_counter() - t0
+
+    print(f"\n{'Snapshot':<20} | {'Mixes':>6} | {'Pred. ROI':>9} | {'Real. ROI':>9} | {'Hit rate':>8}")
+    print("-" * 64)
+    for s in summaries:
+        print(f"{s['timestamp']:<20} | {s['reported']:>6} | {s['predicted_roi']:>8.1f}% | {s['realized_roi']:>8.1f}% | {s['hit_rate']:>7.1f}%")
+
+    unscored = sum(s['unscored'] for s in summaries)
+    if unscored:
+        print(f"\n{unscored} mixes left unscored: {sum(s['unpriced_outcomes'] for s in summaries)} outcomes "
+              f"had no price at the later snapshot.")
+
+    capital = sum(s['capital'] for s in summaries)
+    if capital:
+        pred = sum(s['predicted_profit'] for s in summaries) / capital * 100
+        real = sum(s['realized_profit'] for s in summaries) / capital * 100
+        print(f"\nOverall: predicted ROI {pred:.1f}% | realized ROI {real:.1f}% ({elapsed:.1f}s)")
+
+    os.makedirs(REPORTS_DIR, exist_ok=True)
+    output_path = os.path.join(REPORTS_DIR, "backtest.json")
+    with open(output_path, "w", encoding='utf-8') as f:
+        json.dump(summaries, f, indent=2)
+    print(f"Results saved to {output_path}")
+    return summaries
+
+if __name__ == "__main__":
+    run_backtest_command()
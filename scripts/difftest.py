@@ -0,0 +1,27 @@
+import sys
+import os
+
+# Add root folder to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tradeup.difftest import run_fuzz, save_failures
+
+def run_difftest(cases=200, seed=0, checks=None):
+    reports = run_fuzz(checks, cases, seed)
+    print(f"\n{'Check':<22} {'Engine':<14} {'Outputs':>8} {'Mismatch':>9} {'Ref/s':>10} {'Engine/s':>10}")
+    for r in reports:
+        print(f"{r['check']:<22} {r['engine']:<14} {r['outputs']:>8} {r['mismatches']:>9} "
+              f"{r['reference_rate']:>10.0f} {r['engine_rate']:>10.0f}")
+
+    if any(r['failures'] for r in reports):
+        path = save_failures(reports)
+        print(f"\nMismatches found, minimized reproducers saved to {path}")
+        for r in reports:
+            for f in r['failures'][:1]:
+                print(f"- {r['check']}/{r['engine']}: reference {f['reference']} vs engine {f['engine']}")
+    else:
+        print("\nAll engines match their reference.")
+    return reports
+
+if __name__ == "__main__":
+    run_difftest()
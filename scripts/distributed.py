@@ -0,0 +1,68 @@
+import sys
+import os
+import multiprocessing
+
+# Add root folder to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tradeup.config import DIST_ADDRESS, MIN_ROI, MIN_PROFIT, MAX_FILLERS_PER_GROUP
+from tradeup.database import init_db, get_db_connection
+from tradeup.distributed import (
+    Coordinator, build_snapshot, scanner_from_snapshot, plan_shards, run_worker, resolve_authkey, check_authkey
+)
+from tradeup.results_store import save_results
+
+def parse_address(text):
+    if not text:
+        return DIST_ADDRESS
+    host, _, port = text.rpartition(':')
+    return (host or DIST_ADDRESS[0], int(port))
+
+def run_coordinator(address=None, local_workers=0, top_k=None, min_roi=MIN_ROI, min_profit=MIN_PROFIT,
+                    max_fillers=MAX_FILLERS_PER_GROUP, authkey=None):
+    """Shards a scan of the DB market across workers (optionally started here) and stores the merged results."""
+    address, authkey = parse_address(address), resolve_authkey(authkey)
+    try:
+        check_authkey(address, authkey)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return None
+    init_db()
+    conn = get_db_connection()
+    snap = build_snapshot(conn, min_roi, min_profit, max_fillers, top_k)
+    conn.close()
+    shards = plan_shards(scanner_from_snapshot(snap))
+
+    procs = []
+    def start_local(addr):
+        for i in range(local_workers):
+            p = multiprocessing.Process(target=run_worker, args=(addr, authkey), kwargs={'name': f"local-{i + 1}"})
+            p.start()
+            procs.append(p)
+
+    coordinator = Coordinator(snap, shards)
+    results = coordinator.run(address, authkey, on_ready=start_local)
+    for p in procs:
+        p.join()
+    print(f"\nMerged {len(results)} opportunities from {len(shards)} shards ({coordinator.reassigned} reassigned).")
+    if coordinator.failed:
+        print(f"Warning: {len(coordinator.failed)} shard(s) abandoned, their targets are missing from the results:")
+        for sid, error in coordinator.failed.items():
+            print(f"  {shards[sid]}: {error}")
+
+    params = {'distributed': True, 'failed_shards': len(coordinator.failed), 'top_k': top_k, 'min_roi': min_roi, 'min_profit': min_profit, 'max_fillers': max_fillers}
+    conn = get_db_connection()
+    run_id = save_results(conn, results, params)
+    conn.close()
+    print(f"Results saved as scan run #{run_id} (python3 main.py results)")
+    return results
+
+def run_worker_command(address=None, authkey=None):
+    try:
+        return run_worker(parse_address(address), resolve_authkey(authkey))
+    except ValueError as e:
+        print(f"Error: {e}")
+        return None
+
+if __name__ == "__main__":
+    run_coordinator(local_workers=multiprocessing.cpu_count())
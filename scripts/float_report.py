@@ -0,0 +1,31 @@
+import sys
+import os
+
+# Add root folder to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tradeup.config import FLOAT_REPORTS
+from tradeup.database import init_db, get_db_connection
+from tradeup.float_report import refresh_cache, write_report
+
+def run_float_report(full=False):
+    """Refreshes the float ratio report cache from the bucket dumps and rewrites the Markdown/JSON reports."""
+    init_db()
+    conn = get_db_connection()
+    if full:
+        conn.execute("DELETE FROM float_report_cache")
+        conn.commit()
+    # FN reports first: the MMW report compares against their cached FN floors
+    for kind, src, md_path, json_path in FLOAT_REPORTS:
+        if not os.path.exists(src):
+            print(f"Skipping '{kind}' report: {src} not found.")
+            continue
+        read, recomputed, removed, skipped = refresh_cache(conn, kind, src)
+        rendered = write_report(conn, kind, md_path, json_path)
+        print(f"[{kind}] {read} goods read: {recomputed} recomputed, {removed} removed, "
+              f"{skipped} skipped (unknown skin float range or no bucket); {rendered} sections rendered.")
+        print(f"  -> {md_path}\n  -> {json_path}")
+    conn.close()
+
+if __name__ == "__main__":
+    run_float_report("--full" in sys.argv)
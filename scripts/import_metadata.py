@@ -0,0 +1,35 @@
+import sys
+import os
+
+# Add root folder to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tradeup.config import METADATA_PATH
+from tradeup.curves import drop_skin_curves
+from tradeup.database import init_db, get_db_connection
+from tradeup.metadata import ingest_metadata
+
+def run_import_metadata(path=None):
+    """Upserts a skin metadata dump (JSON array or NDJSON) into skins/collections."""
+    path = path or METADATA_PATH
+    if not os.path.exists(path):
+        print(f"Error: {path} not found.")
+        return None
+    init_db()
+    conn = get_db_connection()
+    changes, read, skipped = ingest_metadata(conn, path)
+    conn.close()
+
+    new = sum(1 for f in changes.fields.values() if 'new' in f)
+    print(f"Read {read} records ({skipped} skipped: no collection, rarity or float range).")
+    print(f"Skins: {new} new, {len(changes.skins) - new} changed ({len(changes.float_ranges)} float ranges); "
+          f"collections: {len(changes.collections)} new or renamed.")
+    if changes.outputs:
+        print(f"{len(changes.outputs)} (collection, rarity) output groups changed; details in metadata_changes.")
+        if changes.float_ranges:
+            dropped = drop_skin_curves(changes.float_ranges)
+            print(f"Float ranges changed: dropped {dropped} skin curves (rarity curves until python3 main.py train).")
+    return changes
+
+if __name__ == "__main__":
+    run_import_metadata(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,30 @@
+import sys
+import os
+import time
+
+# Add root folder to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tradeup.batch_pricing import ListingResolver, price_rows, read_rows, write_rows
+from tradeup.config import PRICE_CHUNK_ROWS
+
+def run_price(input_path="-", output_path=None, fmt=None, chunk_size=PRICE_CHUNK_ROWS):
+    """Prices a CSV/NDJSON stream of listings (skin_id | goods_id | name, float, stattrak)."""
+    if fmt is None:
+        fmt = "csv" if input_path.endswith(".csv") else "ndjson"
+    src = sys.stdin if input_path == "-" else open(input_path, "r", encoding="utf-8", newline="")
+    dst = sys.stdout if output_path is None else open(output_path, "w", encoding="utf-8", newline="")
+
+    start = time.perf_counter()
+    resolver = ListingResolver()
+    try:
+        count = write_rows(price_rows(read_rows(src, fmt), resolver, chunk_size), dst, fmt)
+    finally:
+        if src is not sys.stdin: src.close()
+        if dst is not sys.stdout: dst.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"Priced {count} listings in {elapsed:.2f}s ({count / max(elapsed, 1e-9):.0f}/s)", file=sys.stderr)
+
+if __name__ == "__main__":
+    run_price(*sys.argv[1:2])
@@ -0,0 +1,36 @@
+import sys
+import os
+import time
+
+# Add root folder to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tradeup.config import FEE, RMB_TO_USD_RATE, MIN_ROI, IRREGULAR_OUTPUT_SOURCE, SCAN_SNAPSHOT_PATH
+from tradeup.rescore import load_snapshot, load_output_prices, rescore
+
+def run_rescore(fee=FEE, rate=RMB_TO_USD_RATE, min_roi=MIN_ROI, irregular_source=IRREGULAR_OUTPUT_SOURCE,
+                refresh_prices=False, top=10, path=SCAN_SNAPSHOT_PATH):
+    if not os.path.exists(path):
+        print(f"Error: {path} not found. Run a scan first.")
+        return None
+
+    snap = load_snapshot(path)
+    if refresh_prices and 'out_float' not in snap:
+        print(f"Error: {path} has no output floats to reprice from. Run a scan first.")
+        return None
+    output_prices = load_output_prices() if refresh_prices else None
+
+    start = time.perf_counter()
+    res = rescore(snap, fee, rate, min_roi, irregular_source, output_prices)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    print(f"Rescored {len(snap['target_price'])} mixes in {elapsed:.1f} ms "
+          f"(FEE={fee}, RATE={rate}, MIN_ROI={min_roi}, irregular={irregular_source}).")
+    print(f"Found {len(res['passing'])} profitable opportunities.")
+    for rank, i in enumerate(res['passing'][:top]):
+        print(f"{rank+1}. {snap['target_name'][i]} + 9x {snap['filler_name'][i]} ({snap['filler_cond'][i]})"
+              f" -> ROI: {res['roi'][i]:.1f}% | Profit: ${res['profit'][i]:.2f}")
+    return res
+
+if __name__ == "__main__":
+    run_rescore()
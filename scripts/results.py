@@ -0,0 +1,52 @@
+import sys
+import os
+import json
+
+# Add root folder to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tradeup.database import init_db, get_db_connection
+from tradeup.results_store import latest_run_id, query_results, get_outcomes
+
+def run_results(run_id=None, collection=None, stattrak=None, min_roi=None, min_profit=None, max_cost=None,
+                order_by='profit', limit=20, page=1, show_outcomes=False, export_path=None):
+    init_db()
+    conn = get_db_connection()
+    run_id = run_id or latest_run_id(conn)
+    if run_id is None:
+        print("No scan stored yet. Run `python3 main.py scan` first.")
+        conn.close()
+        return []
+
+    rows = query_results(conn, run_id, collection, stattrak, min_roi, min_profit, max_cost,
+                         order_by, limit, (page - 1) * limit)
+    print(f"Scan run #{run_id} - page {page} ({len(rows)} results, ordered by {order_by})")
+    print(f"{'#':>4} {'Target':<45} {'Filler':<40} {'Cost':>8} {'Profit':>8} {'ROI':>7} {'P(loss)':>8}")
+
+    exported = []
+    for i, r in enumerate(rows, start=(page - 1) * limit + 1):
+        target = f"{'ST ' if r['is_stattrak'] else ''}{r['target_name']} ({r['target_cond']})"
+        filler = f"{r['filler_name']} ({r['filler_cond']})"
+        p_loss = f"{r['prob_loss']*100:.0f}%" if r['prob_loss'] is not None else "-"
+        print(f"{i:>4} {target[:45]:<45} {filler[:40]:<40} {r['total_cost']:>8.2f} {r['profit']:>8.2f} {r['roi']:>6.1f}% {p_loss:>8}")
+
+        outcomes = [dict(o) for o in get_outcomes(conn, r['id'])] if show_outcomes or export_path else []
+        if show_outcomes:
+            for o in outcomes:
+                print(f"       -> {o['name']} ({o['condition']}) {o['probability']:.1f}% ${o['value_net']:.2f}")
+        if export_path:
+            item = dict(r)
+            item['inputs'] = json.loads(item['inputs'])
+            item['financials'] = json.loads(item['financials'])
+            item['outcomes'] = outcomes
+            exported.append(item)
+
+    conn.close()
+    if export_path:
+        with open(export_path, "w", encoding='utf-8') as f:
+            json.dump(exported, f, indent=2, ensure_ascii=False)
+        print(f"Exported to {export_path}")
+    return rows
+
+if __name__ == "__main__":
+    run_results()
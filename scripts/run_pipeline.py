@@ -0,0 +1,87 @@
+import sys
+import os
+import json
+import time
+from datetime import datetime
+
+# Add root folder to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tradeup.config import PRICE_JSON_PATH
+from tradeup.database import init_db, get_db_connection
+from tradeup.market import MarketModel, PRICE_UPSERT, HISTORY_INSERT, sanitize_market
+from tradeup.online_stats import OnlineStatsEngine
+from tradeup.sanitizer import PriceSanitizer
+from tradeup.scanner import TradeupScanner
+from tradeup.training import ingest_float_buckets
+from tradeup.writer import BackgroundWriter
+from scripts.scan_mixes import run_scan
+
+def run_pipeline(deadline=None, top_k=None):
+    """Import -> sanitize -> scan on one in-memory market; DB writes happen on a background thread."""
+    init_db()
+    if not os.path.exists(PRICE_JSON_PATH):
+        print(f"Error: {PRICE_JSON_PATH} not found.")
+        return None
+
+    t0 = time.perf_counter()
+    conn = get_db_connection()
+    model = MarketModel.load(conn)
+    online = OnlineStatsEngine.load(model.skins)
+    # Catch up on history written by other commands since the last run
+    online.ingest_history(conn)
+    conn.close()
+    writer = BackgroundWriter()
+
+    # 1. Import
+    with open(PRICE_JSON_PATH, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    items = data if isinstance(data, list) else data.get('goods_list', [])
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    changes = model.apply_market_items(items, now)
+    history_rows = [(*key, price, now) for key, price in changes.prices.items()]
+    own_ids = []
+
+    def insert_history(conn):
+        # One transaction holds the write lock, so this run's AUTOINCREMENT ids are the last len(rows)
+        conn.executemany(HISTORY_INSERT, history_rows)
+        last = conn.execute("SELECT MAX(id) FROM price_history").fetchone()[0] or 0
+        own_ids[:] = [last - len(history_rows), last]
+    writer.call(insert_history)
+    writer.call(ingest_float_buckets)
+    t1 = time.perf_counter()
+    print(f"Imported {len(items)} market items: {len(changes)} rows changed, {len(changes.prices)} price changes ({t1 - t0:.2f}s).")
+
+    # 2. Sanitize, feeding the new observations straight into the online stats
+    for key, price in changes.prices.items():
+        online.apply(*key, price, now)
+
+    def save_online(conn):
+        # Other commands may have written history since the catch-up above; our own rows are already applied
+        online.ingest_history(conn, skip=own_ids)
+        online.save()
+    writer.call(save_online)
+
+    sanitizer = PriceSanitizer()
+    sanitizer.load_snapshot(model.skins, model.usd_prices(), model.collections)
+    sanitizer.attach_online_stats(online)
+    sanitizer.build_global_regression()
+    predictions, irregular, anomalies = sanitize_market(sanitizer, list(online.jumps.values()))
+    sanitized = model.apply_sanitizer(predictions, irregular)
+    writer.executemany(PRICE_UPSERT, model.row_values(changes.rows | sanitized))
+    t2 = time.perf_counter()
+    print(f"Sanitizer: {len(predictions)} predictions, {len(anomalies)} anomalies, {len(sanitized)} rows updated ({t2 - t1:.2f}s).")
+
+    # 3. Scan the same in-memory market (not worth it if the import writes already failed)
+    writer.check()
+    scanner = TradeupScanner()
+    scanner.load_snapshot(model.collections, model.skins, model.price_rows())
+    results = run_scan(deadline, top_k, scanner, writer)
+    t3 = time.perf_counter()
+
+    writer.close()
+    print(f"\nPipeline done: scan {t3 - t2:.2f}s, waiting on DB writes {time.perf_counter() - t3:.2f}s.")
+    return results
+
+if __name__ == "__main__":
+    run_pipeline()
@@ -1,31 +1,44 @@
 import sys
 import os
-import json
 
 # Add root folder to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from tradeup.scanner import TradeupScanner
-from tradeup.config import REPORTS_DIR
+from tradeup.rescore import ScanRecorder
+from tradeup.database import init_db, get_db_connection
+from tradeup.results_store import save_results
 
-def run_scan():
-    scanner = TradeupScanner()
-    scanner.load_data()
-    results = scanner.scan()
+def run_scan(deadline=None, top_k=None, scanner=None, writer=None, scan_filter=None):
+    """Scans the DB market (or its `scan_filter` slice), or an already loaded scanner; results go through `writer` when given."""
+    if scanner is None:
+        scanner = TradeupScanner()
+        scanner.load_data(scan_filter)
+    scanner.recorder = ScanRecorder()
+    results = scanner.scan(deadline=deadline, top_k=top_k)
+    scanner.recorder.save()
     
     print(f"\nFound {len(results)} profitable opportunities.")
     
-    output_path = os.path.join(REPORTS_DIR, "mix_results.json")
-    with open(output_path, "w", encoding='utf-8') as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
-        
-    print(f"Results saved to {output_path}")
+    params = {'deadline': deadline, 'top_k': top_k}
+    if scanner.scan_filter is not None:
+        params['filter'] = scanner.scan_filter.describe()
+    if writer is not None:
+        writer.call(lambda conn: print(f"Results saved as scan run #{save_results(conn, results, params)}"))
+    else:
+        init_db()
+        conn = get_db_connection()
+        run_id = save_results(conn, results, params)
+        conn.close()
+        print(f"Results saved as scan run #{run_id} (python3 main.py results)")
     
     if results:
         print("\nTop 3 results:")
         for i in range(min(3, len(results))):
             r = results[i]
-            print(f"{i+1}. {r['inputs']['target']['name']} -> ROI: {r['financials']['roi']:.1f}% | Profit: ${r['financials']['profit']:.2f}")
+            risk = r['financials']['risk']
+            print(f"{i+1}. {r['inputs']['target']['name']} -> ROI: {r['financials']['roi']:.1f}% | Profit: ${r['financials']['profit']:.2f} | P(loss): {risk['prob_loss']*100:.0f}% (x{risk['repeats']}: {risk['prob_loss_repeated']*100:.0f}%)")
+    return results
 
 if __name__ == "__main__":
     run_scan()
@@ -7,10 +7,12 @@ from datetime import datetime
 # Add root folder to path to allow importing tradeup package
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from tradeup.config import DB_PATH, PRICE_JSON_PATH, OVERRIDES_PATH, RMB_TO_USD_RATE
-from tradeup.utils import parse_market_name
+from tradeup.config import DB_PATH, PRICE_JSON_PATH, OVERRIDES_PATH
 from tradeup.database import init_db, get_db_connection
 from tradeup.sanitizer import PriceSanitizer
+from tradeup.online_stats import OnlineStatsEngine
+from tradeup.market import MarketModel, PRICE_UPSERT, HISTORY_INSERT, sanitize_market
+from tradeup.training import ingest_float_buckets
 
 def update_prices():
     # 1. Initialize DB and Tables
@@ -21,79 +23,51 @@ def update_prices():
         return
 
     conn = get_db_connection()
-    cursor = conn.cursor()
 
-    # 2. Parse price.json
+    # 2. Parse price.json and diff it against the stored rows
     with open(PRICE_JSON_PATH, 'r', encoding='utf-8') as f:
         data = json.load(f)
     items = data if isinstance(data, list) else data.get('goods_list', [])
 
     print(f"Processing {len(items)} items from market data...")
     now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    
-    updated_count = 0
-    for item in items:
-        # Simplified parsing for the script
-        market_name = item['market_hash_name']
-        price = float(item.get('sell_min_price', 0))
-        sell_num = item.get('sell_num', 0)
-        
-        base_name, cond, st = parse_market_name(market_name)
-        if not base_name: continue
-
-        cursor.execute("SELECT id FROM skins WHERE market_hash_name = ?", (base_name,))
-        res = cursor.fetchone()
-        if res:
-            skin_id = res['id']
-            # Update Current Prices
-            cursor.execute('''
-                INSERT OR REPLACE INTO prices 
-                (skin_id, condition, is_stattrak, price, sell_num, goods_id, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (skin_id, cond, st, price, sell_num, item['goods_id'], now))
-            
-            # History
-            cursor.execute('''
-                INSERT INTO price_history (skin_id, condition, is_stattrak, price, recorded_at)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (skin_id, cond, st, price, now))
-            updated_count += 1
+    model = MarketModel.load(conn)
+    changes = model.apply_market_items(items, now)
 
+    # Only changed rows are rewritten; history only records real price changes
+    conn.executemany(PRICE_UPSERT, model.row_values(changes.rows))
+    conn.executemany(HISTORY_INSERT, [(*key, price, now) for key, price in changes.prices.items()])
     conn.commit()
-    print(f"Sync complete: {updated_count} items updated.")
+    print(f"Sync complete: {len(changes)} rows changed ({len(changes.prices)} price changes).")
+
+    # Keep the float bucket snapshot for windowed training (no-op if already stored)
+    print(f"Float bucket history: {ingest_float_buckets(conn)} new rows.")
 
     # 3. Sanitize and Predict
     print("\nRunning PriceSanitizer...")
     sanitizer = PriceSanitizer(DB_PATH)
     sanitizer.load_data()
-    sanitizer.build_collection_stats()
+
+    # Incremental stats: only the price_history rows added since the last run are read
+    online = OnlineStatsEngine.load(sanitizer.skins)
+    jumps = online.ingest_history(conn)
+    online.save()
+    sanitizer.attach_online_stats(online)
     sanitizer.build_global_regression()
     
-    anomalies = sanitizer.detect_anomalies()
-    print(f"Detection complete: {len(anomalies)} anomalies found.")
+    predictions, irregular, anomalies = sanitize_market(sanitizer, jumps)
+    print(f"Detection complete: {len(anomalies)} anomalies found ({len(jumps)} sudden jumps).")
 
-    # Update DB with predictions
-    updates = []
-    for (skin_id, cond, is_st), real_p in sanitizer.prices.items():
-        predicted = sanitizer.get_predicted_price(skin_id, cond, is_st)
-        if predicted:
-            updates.append((round(predicted / RMB_TO_USD_RATE, 2), skin_id, cond, is_st))
-
-    cursor.executemany("UPDATE prices SET predicted_price = ? WHERE skin_id = ? AND condition = ? AND is_stattrak = ?", updates)
-    
-    # Flag Irregular
-    cursor.execute("UPDATE prices SET irregular = 0")
-    name_to_id = {v['market_hash_name']: k for k, v in sanitizer.skins.items()}
-    irreg_updates = []
-    for a in anomalies:
-        sid = name_to_id.get(a['skin'])
-        if sid: irreg_updates.append((sid, a['condition'], 1 if a['is_stattrak'] else 0))
-    
-    cursor.executemany("UPDATE prices SET irregular = 1 WHERE skin_id = ? AND condition = ? AND is_stattrak = ?", irreg_updates)
+    # Update DB with the predictions and flags that changed
+    changed = model.apply_sanitizer(predictions, irregular)
+    conn.executemany("UPDATE prices SET predicted_price = ?, irregular = ? WHERE skin_id = ? AND condition = ? AND is_stattrak = ?",
+                     [(model.prices[k]['predicted_price'], model.prices[k]['irregular'], *k) for k in changed])
+    print(f"Sanitizer results: {len(changed)} rows updated.")
     
     conn.commit()
     conn.close()
     print("Database fully sanitized and updated.")
+    return changes
 
 if __name__ == "__main__":
     update_prices()
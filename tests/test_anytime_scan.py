@@ -0,0 +1,58 @@
+import random
+import time
+from tradeup.difftest import random_catalog
+from tradeup.rescore import ScanRecorder
+from tradeup.scanner import TradeupScanner
+
+def _scanner(cat, min_roi=-100.0):
+    scanner = TradeupScanner()
+    scanner.min_roi, scanner.min_profit = min_roi, float('-inf')
+    scanner.load_snapshot(cat['collections'], cat['skins'], cat['rows'])
+    return scanner
+
+def _profits(results):
+    return [round(r['financials']['profit'], 9) for r in results]
+
+def test_target_bounds_dominate_real_mixes():
+    for seed in range(3):
+        scanner = _scanner(random_catalog(random.Random(seed), n_collections=5, per_rarity=3))
+        targets, fillers = scanner._build_candidate_lists()
+        scanner._prepare_pricing()
+        bounds = scanner._target_bounds(targets, fillers)
+        checked = 0
+        for t, (profit_ub, roi_ub) in zip(targets, bounds):
+            for r in scanner._scan_target(t, fillers):
+                assert r['financials']['profit'] <= profit_ub + 1e-9
+                assert r['financials']['roi'] <= roi_ub + 1e-9
+                checked += 1
+        print(f"seed {seed}: {checked} mixes under their target bound")
+        assert checked
+
+def test_top_k_and_recorder_keep_every_candidate():
+    cat = random_catalog(random.Random(4), n_collections=6, per_rarity=3)
+    everything = _scanner(cat).scan()
+    assert _profits(_scanner(cat).scan(top_k=5)) == _profits(everything)[:5]
+
+    # With a recorder nothing is pruned: the rescore snapshot holds every candidate
+    full, pruned = _scanner(cat, min_roi=50.0), _scanner(cat, min_roi=50.0)
+    full.recorder, pruned.recorder = ScanRecorder(), ScanRecorder()
+    full.min_roi = -100.0
+    full.scan()
+    pruned.scan(top_k=1)
+    assert len(pruned.recorder.target_price) == len(full.recorder.target_price) > 0
+
+def test_deadline_covers_bound_computation(monkeypatch):
+    scanner = _scanner(random_catalog(random.Random(6), n_collections=8, per_rarity=3))
+    slow = scanner._output_value_bound
+    calls = []
+    def slow_bound(outputs, is_st):
+        calls.append(1)
+        time.sleep(0.01)
+        return slow(outputs, is_st)
+    monkeypatch.setattr(scanner, "_output_value_bound", slow_bound)
+
+    start = time.perf_counter()
+    results = scanner.scan(deadline=0.05)
+    elapsed = time.perf_counter() - start
+    print(f"{len(calls)} bound calls, {elapsed:.3f}s")
+    assert results == [] and elapsed < 0.3
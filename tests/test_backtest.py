@@ -0,0 +1,73 @@
+import random
+from tradeup import backtest, database
+from tradeup.difftest import random_catalog
+
+T0, T1 = "2026-01-01 00:00:00", "2026-01-01 12:00:00"
+
+def _history_db(tmp_path, monkeypatch):
+    cat = random_catalog(random.Random(8), n_collections=5, per_rarity=3)
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "bt.db"))
+    database.init_db()
+    conn = database.get_db_connection()
+    conn.executemany("INSERT INTO collections VALUES (?, ?)", cat['collections'].items())
+    conn.executemany("INSERT INTO skins VALUES (:id, :market_hash_name, :collection_id, :rarity_rank, :min_float, :max_float, NULL)",
+                     cat['skins'].values())
+    conn.executemany("INSERT INTO prices (skin_id, condition, is_stattrak, price, sell_num, goods_id, predicted_price, irregular) "
+                     "VALUES (:skin_id, :condition, :is_stattrak, :price, :sell_num, :goods_id, :predicted_price, :irregular)", cat['rows'])
+    # Outputs (rarity 3-4) gain 20% twelve hours later
+    for ts, up in ((T0, 1.0), (T1, 1.2)):
+        conn.executemany("INSERT INTO price_history (skin_id, condition, is_stattrak, price, recorded_at) VALUES (?, ?, ?, ?, ?)",
+                         [(r['skin_id'], r['condition'], r['is_stattrak'],
+                           r['price'] * (up if cat['skins'][r['skin_id']]['rarity_rank'] > 2 else 1.0), ts) for r in cat['rows']])
+    conn.commit()
+    conn.close()
+    return cat
+
+def test_backtest_on_synthetic_history(tmp_path, monkeypatch, capsys):
+    _history_db(tmp_path, monkeypatch)
+    # Same snapshot on both sides: the same pricer gives exactly the predicted profit
+    same, = backtest.run_backtest([T0], 0, workers=1)
+    print(same)
+    assert same['reported'] == same['scored'] > 0 and same['unscored'] == 0
+    assert abs(same['realized_profit'] - same['predicted_profit']) < 1e-6 * same['capital']
+
+    later, = backtest.run_backtest([T0], 12, workers=1)
+    assert later['scored'] == same['scored'] and later['realized_profit'] > later['predicted_profit']
+    assert "after the end of price_history" not in capsys.readouterr().out
+
+    backtest.run_backtest([T0], 48, workers=1)
+    assert "1/1 snapshots are scored after the end of price_history" in capsys.readouterr().out
+
+def test_missing_later_price_is_not_worthless(tmp_path, monkeypatch):
+    cat = _history_db(tmp_path, monkeypatch)
+    goods_ids = {(r['skin_id'], r['condition'], r['is_stattrak']): r['goods_id'] for r in cat['rows']}
+    backtest._init_worker(cat['collections'], cat['skins'], goods_ids)
+    conn = database.get_db_connection()
+    prices = backtest.snapshot_prices(conn, T0)
+    conn.close()
+    results = backtest._snapshot_scanner(prices).scan(top_k=3)
+    gone = results[0]['outcomes'][0]
+    assert gone['value_net'] > 0
+
+    later = backtest._snapshot_scanner({k: p for k, p in prices.items() if k[0] != gone['skin_id']})
+    value, unpriced = backtest._realized_value(results[0], later)
+    assert unpriced >= 1 and value < results[0]['financials']['expected_value']
+
+def test_single_replay_matches_point_in_time_queries(tmp_path, monkeypatch):
+    cat = _history_db(tmp_path, monkeypatch)
+    conn = database.get_db_connection()
+    rng = random.Random(2)
+    # History is appended in time order, as the importers do
+    rows = [(r['skin_id'], r['condition'], r['is_stattrak'], r['price'] * rng.uniform(0.5, 2), f"2026-01-0{d} 0{h}:00:00")
+            for d in (2, 3, 4) for h in (3, 6) for r in rng.sample(cat['rows'], 10)]
+    conn.executemany("INSERT INTO price_history (skin_id, condition, is_stattrak, price, recorded_at) VALUES (?, ?, ?, ?, ?)", rows)
+    conn.commit()
+
+    times = backtest.snapshot_times("2025-12-31 00:00:00", "2026-01-05 00:00:00", 3)
+    for ts, market in zip(times, backtest.replay_history(conn, times)):
+        expected = {(r[0], r[1], r[2]): r[3] for r in conn.execute('''
+            SELECT h.skin_id, h.condition, h.is_stattrak, h.price FROM price_history h
+            JOIN (SELECT MAX(id) AS id FROM price_history WHERE recorded_at <= ?
+                  GROUP BY skin_id, condition, is_stattrak) last ON last.id = h.id''', (ts,))}
+        assert market == expected, ts
+    conn.close()
@@ -0,0 +1,30 @@
+import numpy as np
+from tradeup.curves import fit_curves, train_skin_curves
+
+def test_vectorized_fit_matches_per_skin_least_squares():
+    rng = np.random.default_rng(0)
+    sizes = rng.integers(3, 10, 200)
+    groups = np.repeat(np.arange(200), sizes)
+    x = rng.uniform(0, 0.3, len(groups))
+    y = rng.normal(1, 0.3, 200)[groups] - rng.uniform(5, 40, 200)[groups] * x + rng.normal(0, 0.05, len(groups))
+
+    alpha, k, n = fit_curves(groups, x, y, np.zeros(200), np.zeros(200), shrinkage=0.0)
+    for g in range(5):
+        slope, intercept = np.polyfit(x[groups == g], y[groups == g], 1)
+        print(f"group {g}: k={k[g]:.3f} (polyfit {-slope:.3f})")
+        assert abs(k[g] + slope) < 1e-6 and abs(np.log(alpha[g]) - intercept) < 1e-6
+        assert n[g] == sizes[g]
+
+def test_sparse_skin_shrinks_to_rarity_curve():
+    # One FN goods with a single premium bucket, rarity prior alpha=2, k=20
+    buckets = {1: [(0.00, 0.01, 40.0, 5), (0.04, 0.07, 10.0, 50)]}
+    meta = {1: ("skin-a", 0, 0.0, 1.0)}
+    prior = {"3_0": {"alpha": 2.0, "k": 20.0}}
+
+    loose = train_skin_curves(buckets, meta, {"skin-a": 3}, prior, shrinkage=1e-6)["skin-a_0"]
+    tight = train_skin_curves(buckets, meta, {"skin-a": 3}, prior, shrinkage=1e6)["skin-a_0"]
+    print("loose:", loose, "tight:", tight)
+    # The lone point (adj 0, ratio 4) pins alpha near 3 without shrinkage; heavy shrinkage returns the prior
+    assert abs(loose['alpha'] - 3.0) < 1e-3
+    assert abs(tight['alpha'] - 2.0) < 1e-3 and abs(tight['k'] - 20.0) < 1e-2
+    assert loose['n'] == 1
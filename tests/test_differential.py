@@ -0,0 +1,35 @@
+from tradeup.difftest import CHECKS, run_fuzz, register_engine, ref_predict_price, tables_predict_price
+from tradeup.float_pricing import TABLE_REL_ERROR
+
+def test_registered_engines_match_reference():
+    for r in run_fuzz(cases=40, seed=1):
+        print(f"{r['check']}/{r['engine']}: {r['outputs']} outputs, {r['mismatches']} mismatches, "
+              f"{r['engine_rate']:.0f}/s (reference {r['reference_rate']:.0f}/s)")
+        assert r['mismatches'] == 0, r['failures'][0]
+
+def test_mismatch_is_minimized():
+    def broken(case):
+        # Off by 1% in the MW zone only
+        return [(p * 1.01,) if 0.07 <= f < 0.15 else (p,) for f, (p,) in zip(case['floats'], ref_predict_price(case))]
+
+    register_engine("predict_price", "broken", broken)
+    try:
+        r = next(r for r in run_fuzz(["predict_price"], cases=30, seed=2) if r['engine'] == "broken")
+    finally:
+        del CHECKS["predict_price"].engines["broken"]
+
+    assert r['mismatches'] > 0
+    repro = r['failures'][0]['reproducer']
+    print("Reproducer:", repro)
+    assert len(repro['floats']) == 1 and 0.07 <= repro['floats'][0] < 0.15
+    assert len(repro['base_prices']) == 1
+
+def test_tables_keep_the_jump_at_the_skin_max():
+    # Max float on the MW/FT border: the MW zone must still ramp up to the MW price
+    skin = {'id': 'S0', 'market_hash_name': 'S0', 'collection_id': 'C0', 'rarity_rank': 3,
+            'min_float': 0.04, 'max_float': 0.15}
+    case = {'skin': skin, 'base_prices': {'MW': 153.16}, 'is_st': 0, 'floats': [0.07, 0.1, 0.1315, 0.149, 0.15]}
+    ref, got = ref_predict_price(case), tables_predict_price(case)
+    print(ref, got)
+    for (r,), (g,) in zip(ref, got):
+        assert abs(g - r) <= TABLE_REL_ERROR * r
@@ -0,0 +1,76 @@
+import random
+import threading
+import multiprocessing
+from multiprocessing.connection import Client
+import pytest
+from tradeup.config import DIST_AUTHKEY
+from tradeup.difftest import random_catalog
+from tradeup.distributed import Coordinator, scanner_from_snapshot, plan_shards, run_worker, check_authkey
+from tradeup.market import PRICE_COLUMNS
+from tradeup.scanner import TradeupScanner
+
+def _snapshot(top_k):
+    cat = random_catalog(random.Random(3), n_collections=4, per_rarity=3)
+    return {
+        'collections': cat['collections'], 'skins': cat['skins'], 'price_columns': PRICE_COLUMNS,
+        'prices': [tuple(r.get(c) for c in PRICE_COLUMNS) for r in cat['rows']], 'buckets': {},
+        'params': {'min_roi': -100.0, 'min_profit': float('-inf'), 'max_fillers': 0, 'top_k': top_k},
+    }
+
+def test_dead_worker_shards_are_reassigned():
+    snap = _snapshot(top_k=25)
+    expected = scanner_from_snapshot(snap).scan(top_k=25)
+    shards = plan_shards(scanner_from_snapshot(snap))
+    coordinator = Coordinator(snap, shards)
+
+    def workers(address):
+        # A worker that takes a shard and dies without answering
+        dead = Client(address, authkey=DIST_AUTHKEY)
+        dead.send(('hello', 'dead'))
+        dead.recv()
+        dead.send(('get',))
+        assert dead.recv()[0] == 'shard'
+        dead.close()
+        for i in range(2):
+            multiprocessing.Process(target=run_worker, args=(address,), kwargs={'name': f"w{i}"}, daemon=True).start()
+
+    results = coordinator.run(('127.0.0.1', 0), on_ready=workers)
+    print(f"{len(shards)} shards, {coordinator.reassigned} reassigned, {len(results)} results")
+    assert coordinator.reassigned >= 1
+    assert [round(r['financials']['profit'], 9) for r in results] == \
+           [round(r['financials']['profit'], 9) for r in expected]
+
+def test_failing_shard_is_abandoned_not_fatal(monkeypatch):
+    snap = _snapshot(top_k=None)
+    shards = plan_shards(scanner_from_snapshot(snap))
+    bad = tuple(shards[0][0])
+    expected = [r for r in scanner_from_snapshot(snap).scan()
+                if (r['inputs']['target']['collection_id'], r['inputs']['target']['rarity'], r['inputs']['target']['is_st']) != bad]
+
+    scan = TradeupScanner.scan
+    def flaky_scan(self, *args, target_groups=None, **kwargs):
+        if target_groups and bad in target_groups:
+            raise RuntimeError("corrupt shard")
+        return scan(self, *args, target_groups=target_groups, **kwargs)
+    monkeypatch.setattr(TradeupScanner, "scan", flaky_scan)
+
+    coordinator = Coordinator(snap, shards, max_attempts=2)
+    def workers(address):
+        for i in range(2):
+            threading.Thread(target=run_worker, args=(address,), kwargs={'name': f"t{i}"}, daemon=True).start()
+
+    results = coordinator.run(('127.0.0.1', 0), on_ready=workers)
+    print(coordinator.failed)
+    assert list(coordinator.failed) == [0] and "corrupt shard" in coordinator.failed[0]
+    assert sorted(round(r['financials']['profit'], 9) for r in results) == \
+           sorted(round(r['financials']['profit'], 9) for r in expected)
+
+def test_default_key_is_loopback_only():
+    check_authkey(('127.0.0.1', 6110), DIST_AUTHKEY)
+    check_authkey(('localhost', 6110), DIST_AUTHKEY)
+    check_authkey(('0.0.0.0', 6110), b"a-real-secret")
+    for host in ('0.0.0.0', '192.168.1.10', 'coordinator.lan'):
+        with pytest.raises(ValueError):
+            check_authkey((host, 6110), DIST_AUTHKEY)
+    with pytest.raises(ValueError):
+        Coordinator(_snapshot(top_k=5), []).run(('0.0.0.0', 0))
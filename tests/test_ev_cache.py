@@ -0,0 +1,54 @@
+import random
+import numpy as np
+from tradeup.difftest import random_catalog, _engine
+from tradeup.ev_cache import CollectionEV, MERGE_TOL
+from tradeup.float_pricing import OutputPriceTables
+from tradeup.scanner import TradeupScanner
+
+def test_step_function_without_tables():
+    outputs = [
+        {'id': 'a', 'min_float': 0.0, 'max_float': 1.0, 'market_hash_name': 'A'},
+        {'id': 'b', 'min_float': 0.1, 'max_float': 0.5, 'market_hash_name': 'B'},
+    ]
+    prices_map = {
+        ('a', 0): {'prices': {'FN': 10, 'MW': 6, 'FT': 4, 'WW': 3, 'BS': 2}, 'pred_prices': {'FN': 8},
+                   'irregular': {'FN': True}},
+        ('b', 0): {'prices': {'MW': 20, 'FT': 12}, 'pred_prices': {}, 'irregular': {}},
+    }
+    ev = CollectionEV(outputs, 0, prices_map)
+    print("Breakpoints:", ev.bps)
+
+    # a: irregular FN priced from its prediction; b: WW (no price) is worth nothing
+    assert ev.mean_value(0.05) == (8 + 20) / 2
+    assert ev.mean_value(0.10) == (6 + 20) / 2
+    assert ev.mean_value(0.20) == (4 + 12) / 2
+    assert ev.mean_value(0.80) == (2 + 0) / 2
+    assert ev.mean_value(1.0) == (2 + 0) / 2
+
+def test_float_precise_tables_with_buckets():
+    for seed in range(30):
+        rng = random.Random(seed)
+        cat = random_catalog(rng, n_collections=3, per_rarity=3)
+        scanner = TradeupScanner()
+        scanner.load_snapshot(cat['collections'], cat['skins'], cat['rows'])
+        buckets = {}
+        for r in cat['rows']:
+            s = cat['skins'][r['skin_id']]
+            b_min, b_max = sorted(rng.uniform(s['min_float'], s['max_float']) for _ in range(2))
+            buckets[r['goods_id']] = [(b_min, b_max, r['price'] * rng.uniform(0.8, 2.0), 5)]
+        tables = OutputPriceTables(cat['skins'], scanner.prices_map, buckets, engine=_engine)
+
+        for col_id, rank in {(s['collection_id'], s['rarity_rank']) for s in cat['skins'].values()}:
+            outputs = scanner.get_outputs(col_id, rank)
+            if not outputs: continue
+            ev = CollectionEV(outputs, 0, scanner.prices_map, tables)
+            # Every table point (ulp-wide pairs at jumps included) and random floats; within MERGE_TOL
+            # of a jump the value may come from either side
+            cuts = [(np.asarray(tables.table(o['id'], 0)[0]) - o['min_float']) / (o['max_float'] - o['min_float'])
+                    for o in outputs if (o['id'], 0) in scanner.prices_map and o['max_float'] > o['min_float']]
+            adjs = np.concatenate(cuts + [[rng.random() for _ in range(200)]])
+            adjs = adjs[(adjs >= 0) & (adjs <= 1)]
+            got = np.array([ev.mean_value(a) for a in adjs])
+            sides = [ev._mean(np.clip(adjs + d, 0.0, 1.0)) for d in (-2 * MERGE_TOL, 0.0, 2 * MERGE_TOL)]
+            err = np.min([np.abs(got - v) / np.maximum(v, 1e-9) for v in sides], axis=0)
+            assert err.max() < 1e-9, (seed, col_id, rank, adjs[err.argmax()])
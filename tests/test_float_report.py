@@ -0,0 +1,52 @@
+import json
+from tradeup import database
+from tradeup.config import DETAILED_FLOAT_PATH
+from tradeup.float_report import refresh_cache, render_report
+
+def _dump(path, items):
+    path.write_text(json.dumps({"info": items, "req_remaining": 0, "stat_time": 0}, indent=1))
+
+def test_report_sections_and_incremental_refresh(tmp_path, monkeypatch):
+    with open(DETAILED_FLOAT_PATH, "r", encoding='utf-8') as f:
+        items = json.load(f)['info'][:3]
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "report.db"))
+    database.init_db()
+    conn = database.get_db_connection()
+    for base in ("G3SG1 | VariCamo", "M249 | Gator Mesh"):
+        conn.execute("INSERT INTO skins VALUES (?, ?, 'c', 1, 0.0, 0.6, '')", (base, base))
+    conn.commit()
+
+    dump = tmp_path / "detailled_float.json"
+    _dump(dump, items)
+    read, recomputed, removed, skipped = refresh_cache(conn, 'ratio', dump)
+    print(read, recomputed, removed, skipped)
+    assert (read, recomputed, removed, skipped) == (3, 2, 0, 1)  # Third goods: skin not in the catalog
+    markdown, entries, rendered = render_report(conn, 'ratio')
+    assert rendered == 2 and len(json.loads(entries)) == 2
+    assert "## G3SG1 | VariCamo (Factory New) (ID: `34882`)\n**Range Total Skin** : 0.0 - 0.6\n" in markdown
+    assert "| 0.0 - 0.01 | 0.000 - 0.017 | **$4.47** | 4.14x | 52 |\n" in markdown
+    assert "| 0.04 - 0.07 | 0.067 - 0.117 | **$1.08** | 1.00x (Base) | 115 |\n\n---\n\n## M249" in markdown
+
+    # Unchanged dump: nothing recomputed nor rendered, same report
+    assert refresh_cache(conn, 'ratio', dump)[1] == 0
+    assert render_report(conn, 'ratio') == (markdown, entries, 0)
+
+    # One bucket price moves, one goods leaves the dump
+    items[0]['sales'][1]['min_price'] = "9.99"
+    _dump(dump, items[:1] + items[2:])
+    assert refresh_cache(conn, 'ratio', dump)[1:3] == (1, 1)
+    markdown, _, rendered = render_report(conn, 'ratio')
+    assert rendered == 1 and "M249" not in markdown and "**$9.99**" in markdown
+
+    # MMW goods are compared with the FN floor of the same skin
+    mmw = dict(items[0], goods_id=34884, market_hash_name="G3SG1 | VariCamo (Minimal Wear)",
+               sales=[{"min_float": "0.07", "max_float": "0.08", "min_price": "0.5", "sell_num": 3},
+                      {"min_float": "0.08", "max_float": "0.15", "min_price": "0.25", "sell_num": 9}])
+    _dump(dump, [mmw])
+    refresh_cache(conn, 'mmw', dump)
+    markdown, _, _ = render_report(conn, 'mmw')
+    conn.close()
+    print(markdown)
+    # Prices converted to USD (FN floor 1.08, MMW floor 0.25, bucket 0.5 RMB), ratios unitless
+    assert "**Meilleure Qualité (FN)** : **$0.16** | **Base MMW** : **$0.04**" in markdown
+    assert "| 0.07 - 0.08 | 0.117 - 0.133 | **$0.07** | 0.46x | 2.00x |" in markdown
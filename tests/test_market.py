@@ -0,0 +1,39 @@
+from tradeup.market import MarketModel
+
+def _model():
+    model = MarketModel()
+    model.skins = {"s1": {"id": "s1", "market_hash_name": "AK-47 | Redline"}}
+    model.name_to_id = {"AK-47 | Redline": "s1"}
+    return model
+
+def _item(price, sell_num, goods_id=1):
+    return {"goods_id": goods_id, "market_hash_name": "AK-47 | Redline (Field-Tested)",
+            "sell_min_price": str(price), "sell_num": sell_num}
+
+def test_import_only_reports_changes():
+    model = _model()
+    key = ("s1", "FT", 0)
+
+    changes = model.apply_market_items([_item(10, 5)], "t0")
+    assert changes.rows == {key} and changes.prices == {key: 10.0}
+
+    # Same listing again: nothing to write
+    changes = model.apply_market_items([_item(10, 5)], "t1")
+    assert len(changes) == 0 and model.prices[key]["updated_at"] == "t0"
+
+    # Stock change only: the row is rewritten but no history entry
+    changes = model.apply_market_items([_item(10, 7)], "t2")
+    assert changes.rows == {key} and changes.prices == {}
+
+    changes = model.apply_market_items([_item(12, 7)], "t3")
+    assert changes.prices == {key: 12.0}
+
+def test_sanitizer_changes():
+    model = _model()
+    key = ("s1", "FT", 0)
+    model.apply_market_items([_item(10, 5)], "t0")
+
+    assert model.apply_sanitizer({key: 9.5}, {key}) == {key}
+    assert model.apply_sanitizer({key: 9.5}, {key}) == set()
+    assert model.apply_sanitizer({key: 9.5}, set()) == {key}
+    assert model.prices[key]["irregular"] == 0
@@ -0,0 +1,44 @@
+import json
+import random
+from tradeup import database
+from tradeup.curves import drop_skin_curves, load_skin_curves, save_skin_curves
+from tradeup.difftest import random_catalog
+from tradeup.metadata import iter_json_records, ingest_metadata
+
+def test_streamed_records_match_json_load(tmp_path):
+    records = [{"id": f"s{i}", "name": f"P250 | Test {i}", "nested": {"a": [1, 2, "x, ]"]}} for i in range(50)]
+    array, ndjson = tmp_path / "skins.json", tmp_path / "skins.ndjson"
+    array.write_text(json.dumps(records, indent=2))
+    ndjson.write_text("\n".join(json.dumps(r) for r in records))
+    for path in (array, ndjson):
+        assert list(iter_json_records(path, chunk_size=7)) == records
+
+def test_import_diffs_and_drops_stale_curves(tmp_path, monkeypatch):
+    cat = random_catalog(random.Random(2), n_collections=4, per_rarity=3)
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "meta.db"))
+    database.init_db()
+    conn = database.get_db_connection()
+    dump = tmp_path / "skins.json"
+    flat = [dict(s, collection=cat['collections'][s['collection_id']]) for s in cat['skins'].values()]
+    dump.write_text(json.dumps(flat))
+    changes, read, _ = ingest_metadata(conn, dump)
+    assert len(changes.skins) == read == len(cat['skins'])
+    curves_path = str(tmp_path / "skin_curves.json")
+    save_skin_curves({f"{sid}_{st}": {"alpha": 0.5, "k": 3.0, "n": 4} for sid in cat['skins'] for st in (0, 1)}, curves_path)
+
+    # New release: one float range and one name change in C1 rarity 3, plus a new C2 rarity 4 skin
+    changed = next(s for s in flat if s['collection_id'] == "C1" and s['rarity_rank'] == 3)
+    changed['max_float'] = round(changed['max_float'] * 0.8, 4)
+    changed['market_hash_name'] += " (Renamed)"
+    flat.append({"id": "NEW", "name": "P90 | Release", "collections": [{"id": "C2", "name": "Fuzz Collection 2"}],
+                 "rarity": {"id": "rarity_mythical_weapon", "name": "Restricted"}, "min_float": 0.0, "max_float": 0.8})
+    dump.write_text("\n".join(json.dumps(s) for s in flat))
+    changes, _, _ = ingest_metadata(conn, dump)
+    conn.close()
+    print(changes.fields, changes.outputs)
+    assert set(changes.skins) == {changed['id'], "NEW"} and changes.float_ranges == {changed['id']}
+    assert changes.outputs == {("C1", 3), ("C2", 4)}
+
+    assert drop_skin_curves(changes.float_ranges, curves_path) == 2
+    curves = load_skin_curves(curves_path)
+    assert f"{changed['id']}_0" not in curves and len(curves) == 2 * len(cat['skins']) - 2
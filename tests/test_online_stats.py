@@ -0,0 +1,75 @@
+import random
+import numpy as np
+from tradeup.config import RMB_TO_USD_RATE
+from tradeup.online_stats import GroupStats, P2Quantile, OnlineStatsEngine
+
+SKINS = {
+    f"s{i}": {"market_hash_name": f"Skin {i}", "collection_id": "col", "rarity_rank": 2}
+    for i in range(5)
+}
+
+def test_group_stats_match_numpy():
+    rng = random.Random(0)
+    values = [rng.uniform(1, 100) for _ in range(40)]
+    g = GroupStats()
+    for v in values: g.add(v)
+    for v in values[:15]: g.remove(v)
+
+    rest = values[15:]
+    assert abs(g.median() - np.median(rest)) < 1e-9
+    assert abs(g.moments.std() - np.std(rest)) < 1e-9
+
+def test_p2_median():
+    rng = random.Random(1)
+    est = P2Quantile(0.5)
+    values = [rng.lognormvariate(0, 1) for _ in range(5000)]
+    for v in values: est.add(v)
+    print(f"P2 median: {est.value():.4f} (Exact: {np.median(values):.4f})")
+    assert abs(est.value() / np.median(values) - 1) < 0.05
+
+def test_replacing_prices_updates_group():
+    engine = OnlineStatsEngine(SKINS)
+    for i in range(5):
+        engine.apply(f"s{i}", "FT", 0, 10.0 + i, "2026-01-01 00:00:00")
+    engine.apply("s0", "FT", 0, 30.0, "2026-01-01 01:00:00")
+
+    g = engine.groups[("col", 2, 0)]
+    assert sorted(g.values) == [11.0, 12.0, 13.0, 14.0, 30.0]
+    assert ("col", 2, 0) in engine.collection_stats()
+
+def test_jump_detection():
+    engine = OnlineStatsEngine(SKINS)
+    for h in range(12):
+        assert engine.apply("s1", "MW", 1, 20.0 * (1 + 0.01 * (h % 3)), f"2026-01-01 {h:02d}:00:00") is None
+
+    jump = engine.apply("s1", "MW", 1, 80.0, "2026-01-01 12:00:00")
+    print(f"Jump: {jump}")
+    assert jump and jump['reason'] == "JUMP"
+    assert jump['ratio'] > 3.5
+
+    # A small move of the same key right after is not a jump, and clears the active one
+    assert ("s1", "MW", 1) in engine.jumps
+    assert engine.apply("s1", "MW", 1, 21.0, "2026-01-01 13:00:00") is None
+    assert ("s1", "MW", 1) not in engine.jumps
+
+def test_incremental_groups_match_rebuild():
+    from tradeup.sanitizer import PriceSanitizer
+    rng = random.Random(2)
+    skins = {f"s{i}": {"market_hash_name": f"Skin {i}", "collection_id": f"c{i % 2}", "rarity_rank": 2,
+                       "min_float": 0.0, "max_float": 1.0} for i in range(12)}
+    engine = OnlineStatsEngine(skins)
+    prices = {}
+    for step in range(200):
+        key = (f"s{rng.randrange(12)}", rng.choice(["FT", "MW"]), 0)
+        price = rng.choice([0.0, rng.uniform(1, 50)])  # Zero: the listing disappeared
+        engine.apply(*key, price, f"2026-01-01 {step // 60:02d}:{step % 60:02d}:00")
+        prices[key] = price
+
+    san = PriceSanitizer()
+    san.load_snapshot(skins, prices)
+    san.build_collection_stats()
+    online = engine.collection_stats()
+    assert set(online) == set(san.collection_stats)
+    for k, stats in san.collection_stats.items():
+        assert abs(online[k]['median'] / RMB_TO_USD_RATE - stats['median']) < 1e-9
+        assert abs(online[k]['std'] / RMB_TO_USD_RATE - stats['std']) < 1e-9
@@ -0,0 +1,42 @@
+import random
+from tradeup.orderbook import OrderBook
+
+BUCKETS = [(0.00, 0.01, 4.47, 3), (0.01, 0.02, 3.86, 2), (0.02, 0.03, 3.79, 4),
+           (0.03, 0.04, 2.22, 1), (0.04, 0.07, 1.08, 30)]
+
+def brute_force(buckets, n, max_float):
+    listings = []
+    for b_min, b_max, price, num in buckets:
+        if b_max <= max_float:
+            listings += [price] * num
+        elif b_min < max_float:
+            listings += [price] * int(num * (max_float - b_min) / (b_max - b_min))
+    listings.sort()
+    return (sum(listings[:n]) if len(listings) >= n else None), len(listings)
+
+def test_cheapest_under_cap():
+    book = OrderBook({1: BUCKETS})
+
+    # Only the 0.00-0.02 buckets qualify: 2 at 3.86 then 3 at 4.47
+    cost = book.cheapest_cost(1, 4, 0.02)
+    print(f"4 items <= 0.02: {cost} (Expected: {2 * 3.86 + 2 * 4.47})")
+    assert abs(cost - (2 * 3.86 + 2 * 4.47)) < 1e-9
+
+    # Not enough depth under the cap
+    assert book.cheapest_cost(1, 9, 0.02) is None
+    assert book.depth(1, 0.02) == 5
+    assert book.cheapest_cost(999, 1, 0.5) is None
+
+def test_matches_brute_force():
+    rng = random.Random(3)
+    book = OrderBook({1: BUCKETS})
+    for _ in range(2000):
+        n = rng.randint(1, 45)
+        cap = rng.uniform(0.0, 0.08)
+        expected, depth = brute_force(BUCKETS, n, cap)
+        cost = book.cheapest_cost(1, n, cap)
+        assert book.depth(1, cap) == depth
+        if expected is None:
+            assert cost is None
+        else:
+            assert abs(cost - expected) < 1e-9, (n, cap, cost, expected)
@@ -0,0 +1,44 @@
+import json
+import os
+from tradeup.overrides import OverrideEngine
+
+SKINS = {
+    "a": {"market_hash_name": "AK-47 | Redline", "collection_id": "col-1", "rarity_rank": 3},
+    "b": {"market_hash_name": "AK-47 | Slate", "collection_id": "col-2", "rarity_rank": 3},
+    "c": {"market_hash_name": "M4A4 | Howl", "collection_id": "col-1", "rarity_rank": 5},
+}
+
+def _write(path, rules):
+    with open(path, "w") as f:
+        json.dump(rules, f)
+
+def test_precedence(tmp_path):
+    path = tmp_path / "overrides.json"
+    _write(path, [
+        {"skin": "AK-47 | Redline", "condition": "FT", "is_stattrak": True, "price": 15.0},
+        {"collection": "The Alpha Collection", "condition": "FN", "multiplier": 0.8},
+        {"weapon": "AK-47", "is_stattrak": True, "multiplier": 1.2},
+        {"rarity": 3, "multiplier": 0.9, "priority": 1},
+        {"rarity": 3, "multiplier": 0.95},
+    ])
+    engine = OverrideEngine(str(path))
+    engine.compile(SKINS, {"col-1": "The Alpha Collection"})
+
+    assert engine.get("a", "FT", 1) == (15.0, None)  # Exact entry beats everything
+    assert engine.get("a", "MW", True) == (None, 1.2)  # Weapon beats collection and rarity
+    assert engine.get("a", "FN", 0) == (None, 0.8)  # Collection, by name
+    assert engine.get("b", "FN", 0) == (None, 0.9)  # Priority among rarity rules
+    assert engine.get("c", "MW", 0) is None
+
+def test_hot_reload(tmp_path):
+    path = tmp_path / "overrides.json"
+    _write(path, [{"skin": "M4A4 | Howl", "price": 1000.0}])
+    engine = OverrideEngine(str(path))
+    engine.compile(SKINS)
+    assert engine.get("c", "FN", 0) == (1000.0, None)
+
+    _write(path, [{"skin": "M4A4 | Howl", "price": 1200.0}])
+    os.utime(path, (engine.mtime + 5, engine.mtime + 5))
+    assert engine.reload_if_changed()
+    assert engine.get("c", "BS", 1) == (1200.0, None)
+    assert not engine.reload_if_changed()
@@ -0,0 +1,78 @@
+import json
+import random
+import sqlite3
+import pytest
+from scripts import run_pipeline
+from tradeup import database, scanner as scanner_module
+from tradeup.difftest import random_catalog
+from tradeup.online_stats import OnlineStatsEngine
+from tradeup.rescore import ScanRecorder
+from tradeup.writer import BackgroundWriter
+
+COND_NAMES = {'FN': "Factory New", 'MW': "Minimal Wear", 'FT': "Field-Tested", 'WW': "Well-Worn", 'BS': "Battle-Scarred"}
+
+def _temp_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "pipeline.db"))
+    database.init_db()
+
+def _count(table):
+    conn = database.get_db_connection()
+    n = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    conn.close()
+    return n
+
+def test_failed_write_drops_later_jobs_and_raises(tmp_path, monkeypatch):
+    _temp_db(tmp_path, monkeypatch)
+    writer = BackgroundWriter()
+    writer.execute("INSERT INTO missing_table VALUES (1)")
+    writer.execute("INSERT INTO collections VALUES ('c', 'C')")
+    with pytest.raises(sqlite3.OperationalError):
+        writer.close()
+    assert _count("collections") == 0
+    with pytest.raises(sqlite3.OperationalError):
+        writer.execute("INSERT INTO collections VALUES ('c', 'C')")
+
+def test_pipeline_persists_prices_and_results(tmp_path, monkeypatch):
+    _temp_db(tmp_path, monkeypatch)
+    cat = random_catalog(random.Random(3), n_collections=5, per_rarity=3)
+    conn = database.get_db_connection()
+    conn.executemany("INSERT INTO collections VALUES (?, ?)", cat['collections'].items())
+    conn.executemany("INSERT INTO skins VALUES (:id, :market_hash_name, :collection_id, :rarity_rank, :min_float, :max_float, NULL)",
+                     cat['skins'].values())
+    conn.commit()
+    conn.close()
+
+    items = [{'goods_id': r['goods_id'], 'sell_min_price': str(r['price']), 'sell_num': r['sell_num'],
+              'market_hash_name': f"{'StatTrak™ ' if r['is_stattrak'] else ''}{cat['skins'][r['skin_id']]['market_hash_name']} "
+                                  f"({COND_NAMES[r['condition']]})"} for r in cat['rows']]
+    price_json = tmp_path / "price.json"
+    price_json.write_text(json.dumps({'goods_list': items}))
+    monkeypatch.setattr(run_pipeline, "PRICE_JSON_PATH", str(price_json))
+    # Keep the saved online stats and the scan snapshot out of data/ and reports/
+    load, save, record = OnlineStatsEngine.load.__func__, OnlineStatsEngine.save, ScanRecorder.save
+    monkeypatch.setattr(OnlineStatsEngine, "load", classmethod(lambda cls, skins: load(cls, skins, str(tmp_path / "online.json"))))
+    monkeypatch.setattr(OnlineStatsEngine, "save", lambda self: save(self, str(tmp_path / "online.json")))
+    monkeypatch.setattr(ScanRecorder, "save", lambda self: record(self, str(tmp_path / "scan.npz")))
+    monkeypatch.setattr(scanner_module, "MIN_ROI", -100.0)
+    # Another command records a price change while the pipeline runs
+    foreign = cat['rows'][0]
+    foreign_key = (foreign['skin_id'], foreign['condition'], foreign['is_stattrak'])
+    ingest = run_pipeline.ingest_float_buckets
+    def ingest_with_foreign_write(conn):
+        conn.execute(run_pipeline.HISTORY_INSERT, (*foreign_key, 1234.5, '2030-01-01 00:00:00'))
+        ingest(conn)
+    monkeypatch.setattr(run_pipeline, "ingest_float_buckets", ingest_with_foreign_write)
+
+    results = run_pipeline.run_pipeline(top_k=20)
+    assert results
+    conn = database.get_db_connection()
+    stored = {(r['skin_id'], r['condition'], r['is_stattrak']): r['price'] for r in conn.execute("SELECT * FROM prices")}
+    assert stored == {(r['skin_id'], r['condition'], r['is_stattrak']): float(str(r['price'])) for r in cat['rows']}
+    assert conn.execute("SELECT COUNT(*) FROM price_history").fetchone()[0] == len(cat['rows']) + 1
+    run_id, opportunities = conn.execute("SELECT id, opportunities FROM scan_runs").fetchone()
+    assert opportunities == len(results)
+    assert conn.execute("SELECT COUNT(*) FROM opportunities WHERE run_id = ?", (run_id,)).fetchone()[0] == len(results)
+    conn.close()
+    online = OnlineStatsEngine.load(cat['skins'])
+    assert online.last_history_id == len(cat['rows']) + 1
+    assert online.current[foreign_key] == 1234.5
@@ -0,0 +1,71 @@
+import random
+import time
+import json
+from tradeup.config import RMB_TO_USD_RATE
+from tradeup.orderbook import OrderBook
+from tradeup.portfolio import InventoryPool, allocate, candidates_from_rows
+
+def cand(i, ev, target, t_price, filler, f_price, cap=1.0, t_cap=1.0):
+    return {'id': i, 'label': f"mix {i}", 'ev': ev, 'target': (target, t_price, t_cap), 'filler': (filler, f_price, cap)}
+
+def test_shared_filler_inventory_and_budget():
+    inventory = {('t1', 'FT', 0): (1, 10), ('t2', 'FT', 0): (2, 10), ('f', 'MW', 0): (3, 27)}
+    cands = [
+        cand(1, 30.0, ('t1', 'FT', 0), 5.0, ('f', 'MW', 0), 1.0),  # profit 16 / cost 14
+        cand(2, 20.0, ('t2', 'FT', 0), 2.0, ('f', 'MW', 0), 1.0),  # profit 9 / cost 11
+    ]
+    plan = allocate(cands, 1000.0, InventoryPool(inventory))
+    copies = {c['id']: c['copies'] for c in plan['contracts']}
+    print(plan)
+    # 27 fillers = 3 contracts in total, all going to the better profit-per-dollar mix
+    assert copies == {1: 3}
+    assert abs(plan['expected_profit'] - 48.0) < 1e-9
+
+    # A tight budget leaves room for the cheaper contract only after the first
+    plan = allocate(cands, 25.0, InventoryPool(inventory))
+    copies = {c['id']: c['copies'] for c in plan['contracts']}
+    assert copies == {1: 1, 2: 1} and plan['spent'] <= 25.0
+
+def test_scales_to_many_candidates():
+    rng = random.Random(0)
+    keys = [(f"s{i}", "FT", 0) for i in range(2000)]
+    inventory = {k: (i, rng.randint(0, 200)) for i, k in enumerate(keys)}
+    cands = []
+    for i in range(30000):
+        t, f = rng.sample(keys, 2)
+        t_price, f_price = rng.uniform(1, 20), rng.uniform(0.1, 2)
+        cands.append(cand(i, (t_price + 9 * f_price) * rng.uniform(0.9, 1.5), t, t_price, f, f_price))
+
+    start = time.perf_counter()
+    pool = InventoryPool(inventory)
+    plan = allocate(cands, 20000.0, pool)
+    elapsed = time.perf_counter() - start
+    print(f"{len(plan['contracts'])} contracts, spent {plan['spent']}, {elapsed:.2f}s")
+    assert plan['spent'] <= 20000.0
+    assert all(pool.used[k] <= inventory[k][1] for k in pool.used)
+    assert elapsed < 10
+
+def test_float_caps_and_bucket_consumption():
+    # Goods 7: expensive low-float listings, cheap high-float ones (prices in RMB)
+    book = OrderBook({7: [(0.15, 0.18, 2.0, 10), (0.18, 0.38, 0.5, 20)]})
+    key = ('f', 'FT', 0)
+    pool = InventoryPool({key: (7, 30)}, book)
+    assert abs(pool.cost(key, 9, 0.38, 0) - 9 * 0.5 * RMB_TO_USD_RATE) < 1e-9
+    pool.take(key, 9, 0.38)
+    # The loose buyer took high-float units: the 10 low-float ones are all still there, at their own price
+    assert abs(pool.cost(key, 9, 0.18, 0) - 9 * 2.0 * RMB_TO_USD_RATE) < 1e-9
+    pool.take(key, 9, 0.18)
+    assert pool.cost(key, 2, 0.18, 0) is None
+    assert abs(pool.cost(key, 12, 0.38, 0) - (11 * 0.5 + 1 * 2.0) * RMB_TO_USD_RATE) < 1e-9
+
+    # Stored opportunities carry the float the scan assumed for the target
+    t = {'id': 't', 'name': 'T', 'cond': 'FT', 'is_st': 0, 'price': 1.0, 'real_f': 0.18}
+    f = {'id': 'f', 'name': 'F', 'cond': 'FT', 'is_st': 0, 'price': 0.1}
+    row = {'id': 1, 'inputs': json.dumps({'target': t, 'filler': f, 'filler_max_float': 0.3}),
+           'financials': json.dumps({'expected_value': 5.0, 'filler_unit_price': 0.1})}
+    c, = candidates_from_rows([row])
+    assert c['target'][2] == 0.18 and c['filler'][2] == 0.3
+    plan = allocate([dict(c, target=(('f', 'FT', 0), 1.0, 0.18))], 100.0,
+                    InventoryPool({('f', 'FT', 0): (7, 30)}, OrderBook({7: [(0.15, 0.18, 2.0, 10), (0.18, 0.38, 0.5, 20)]})))
+    print(plan)
+    assert all(b['max_float'] <= 0.18 for b in plan['buy_list'])
@@ -0,0 +1,34 @@
+import random
+import numpy as np
+from tradeup.difftest import random_catalog
+from tradeup.float_pricing import OutputPriceTables
+from tradeup.rescore import ScanRecorder, rescore
+from tradeup.scanner import TradeupScanner
+
+def _recorded_scan(cat, rows):
+    scanner = TradeupScanner()
+    scanner.min_roi = scanner.min_profit = float('-inf')
+    scanner.load_snapshot(cat['collections'], cat['skins'], rows)
+    scanner.output_prices = OutputPriceTables(scanner.skins, scanner.prices_map)
+    scanner.recorder = ScanRecorder()
+    scanner.scan()
+    return scanner, scanner.recorder.to_snapshot()
+
+def test_refresh_reprices_outputs_at_their_float():
+    cat = random_catalog(random.Random(5), n_collections=5, per_rarity=3)
+    scanner, snap = _recorded_scan(cat, cat['rows'])
+    recorded = rescore(snap)
+    refreshed = rescore(snap, output_prices=(scanner.skins, scanner.prices_map, None))
+    np.testing.assert_allclose(refreshed['expected_value'], recorded['expected_value'], rtol=1e-9, atol=1e-9)
+
+    # An output with no price at scan time is worth something once priced
+    output = next(r for r in cat['rows'] if cat['skins'][r['skin_id']]['rarity_rank'] == 3)
+    _, snap = _recorded_scan(cat, [r for r in cat['rows'] if r['skin_id'] != output['skin_id']])
+    key = next(k for k, sid in enumerate(snap['key_skin_id']) if sid == output['skin_id'])
+    touched = np.unique(snap['out_mix'][snap['out_key'] == key])
+    assert len(touched) and not snap['out_value'][snap['out_key'] == key].any()
+
+    before = rescore(snap)['expected_value']
+    after = rescore(snap, output_prices=(scanner.skins, scanner.prices_map, None))['expected_value']
+    print(f"{len(touched)} mixes with the newly priced output")
+    assert (after[touched] > before[touched]).any()
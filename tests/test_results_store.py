@@ -0,0 +1,67 @@
+from tradeup import database
+from tradeup.results_store import save_results, query_results, get_outcomes, latest_run_id
+
+def make_result(i, col, is_st, cost, profit):
+    item = {'id': f's{i}', 'name': f'Skin {i}', 'cond': 'FT', 'price': cost / 10}
+    return {
+        'type': 'MIX_1_9', 'is_stattrak': is_st, 'target_collection': col, 'filler_collection': 'Other',
+        'inputs': {'target': item, 'filler': dict(item, id=f'f{i}')},
+        'outcomes': [{'skin_id': 'o1', 'name': 'Out', 'condition': 'FT', 'float': 0.2, 'probability': 100.0,
+                      'value_net': cost + profit, 'profit': profit, 'source': 'Predicted', 'was_irregular': False}],
+        'financials': {'total_cost': cost, 'expected_value': cost + profit, 'profit': profit,
+                       'roi': profit / cost * 100, 'risk': {'prob_loss': 0.1}},
+    }
+
+def test_store_filters_and_pages(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "t.db"))
+    database.init_db()
+    conn = database.get_db_connection()
+
+    results = [make_result(i, 'Alpha' if i % 2 else 'Beta', i % 3 == 0, 10 + i, float(i)) for i in range(1, 21)]
+    run_id = save_results(conn, results)
+    assert latest_run_id(conn) == run_id
+
+    top = query_results(conn, limit=5)
+    assert [r['profit'] for r in top] == [20.0, 19.0, 18.0, 17.0, 16.0]
+    page2 = query_results(conn, limit=5, offset=5)
+    assert page2[0]['profit'] == 15.0
+
+    alpha = query_results(conn, collection='Alpha', limit=100)
+    assert len(alpha) == 10 and all(r['target_collection'] == 'Alpha' for r in alpha)
+
+    st_cheap = query_results(conn, stattrak=True, max_cost=25, order_by='cost', limit=100)
+    assert [r['total_cost'] for r in st_cheap] == [13, 16, 19, 22, 25]
+
+    outcomes = get_outcomes(conn, top[0]['id'])
+    assert len(outcomes) == 1 and outcomes[0]['profit'] == 20.0
+
+    # A second run does not leak into the first one's pages
+    run2 = save_results(conn, results[:3])
+    assert len(query_results(conn, run2, limit=100)) == 3
+    assert len(query_results(conn, run_id, limit=100)) == 20
+    conn.close()
+
+def test_concurrent_writers_and_schema_changes(tmp_path, monkeypatch):
+    import threading
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "t.db"))
+    database.init_db()
+    conn = database.get_db_connection()
+    conn.execute("ALTER TABLE opportunities ADD COLUMN note TEXT")  # Inserts name their columns
+    conn.commit()
+    conn.close()
+
+    results = [make_result(i, 'Alpha', False, 10 + i, float(i)) for i in range(1, 21)]
+    def writer():
+        c = database.get_db_connection()
+        for _ in range(5):
+            save_results(c, results)
+        c.close()
+    threads = [threading.Thread(target=writer) for _ in range(2)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+
+    conn = database.get_db_connection()
+    assert tuple(conn.execute("SELECT COUNT(*), COUNT(DISTINCT id) FROM opportunities").fetchone()) == (200, 200)
+    # Every opportunity has exactly its own outcome
+    assert conn.execute("SELECT COUNT(*) FROM opportunities o JOIN outcomes x ON x.opportunity_id = o.id").fetchone()[0] == 200
+    conn.close()
@@ -0,0 +1,58 @@
+import itertools
+import numpy as np
+from tradeup.risk import attach_risk_metrics
+
+def make_result(cost, outcomes):
+    return {
+        "financials": {"total_cost": cost},
+        "outcomes": [{"probability": p * 100, "value_net": v} for p, v in outcomes]
+    }
+
+def test_single_contract_metrics():
+    r = make_result(10.0, [(0.1, 50.0), (0.3, 12.0), (0.6, 5.0)])
+    attach_risk_metrics([r])
+    risk = r['financials']['risk']
+    print(f"Risk: {risk}")
+
+    # Only the 5.0 outcome loses money
+    assert abs(risk['prob_loss'] - 0.6) < 1e-9
+    assert risk['profit_p5'] == -5.0
+    assert risk['profit_p50'] == -5.0
+    assert risk['profit_p95'] == 40.0
+
+def test_repeated_contracts():
+    sure = make_result(10.0, [(1.0, 12.0)])
+    coin = make_result(10.0, [(0.5, 30.0), (0.5, 0.0)])
+    attach_risk_metrics([sure, coin], repeats=10)
+
+    # A certain outcome has no spread, whatever the number of repeats
+    r_sure = sure['financials']['risk']
+    assert r_sure['prob_loss_repeated'] < 1e-9
+    assert abs(r_sure['repeated_profit_p50'] - 20.0) < 1e-9
+
+    # 10 coin flips lose money when 3 or fewer hit: P = 176/1024
+    r_coin = coin['financials']['risk']
+    print(f"Coin repeated loss: {r_coin['prob_loss_repeated']:.4f} (Expected: {176/1024:.4f})")
+    assert abs(r_coin['prob_loss_repeated'] - 176 / 1024) < 1e-9
+    assert r_coin['repeats'] == 10
+
+def test_empty():
+    assert attach_risk_metrics([]) == []
+
+def test_repeated_percentiles_within_grid_error():
+    outcomes = [(0.2, 37.3), (0.45, 11.7), (0.35, 3.1)]
+    r = make_result(10.0, outcomes)
+    attach_risk_metrics([r], repeats=3, grid=16)
+    risk = r['financials']['risk']
+
+    # Exact distribution of 3 contracts by enumeration
+    totals, probs = [], []
+    for combo in itertools.product(outcomes, repeat=3):
+        totals.append(sum(v for _, v in combo) - 30.0)
+        probs.append(np.prod([p for p, _ in combo]))
+    order = np.argsort(totals)
+    cum = np.cumsum(np.array(probs)[order])
+    for q in (5, 50, 95):
+        exact = np.array(totals)[order][(cum >= q / 100.0 - 1e-12).argmax()]
+        print(q, exact, risk[f"repeated_profit_p{q}"], risk['repeated_grid_error'])
+        assert abs(risk[f"repeated_profit_p{q}"] - exact) <= risk['repeated_grid_error'] + 1e-9
@@ -0,0 +1,48 @@
+import random
+from tradeup import database
+from tradeup.difftest import random_catalog
+from tradeup.scan_filter import ScanFilter
+from tradeup.scanner import TradeupScanner
+
+def _scanner():
+    scanner = TradeupScanner()
+    scanner.min_roi, scanner.min_profit, scanner.max_fillers = -100.0, float('-inf'), 3
+    return scanner
+
+def _key(r):
+    t, f = r['inputs']['target'], r['inputs']['filler']
+    return (t['id'], t['cond'], t['is_st'], f['id'], f['cond'], round(r['financials']['profit'], 9))
+
+def test_filtered_scan_matches_full_scan(tmp_path, monkeypatch):
+    cat = random_catalog(random.Random(5), n_collections=6, per_rarity=3)
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "scan.db"))
+    database.init_db()
+    conn = database.get_db_connection()
+    conn.executemany("INSERT INTO collections VALUES (?, ?)", cat['collections'].items())
+    conn.executemany("INSERT INTO skins VALUES (:id, :market_hash_name, :collection_id, :rarity_rank, :min_float, :max_float, NULL)",
+                     cat['skins'].values())
+    conn.executemany("INSERT INTO prices (skin_id, condition, is_stattrak, price, sell_num, goods_id, predicted_price, irregular) "
+                     "VALUES (:skin_id, :condition, :is_stattrak, :price, :sell_num, :goods_id, :predicted_price, :irregular)", cat['rows'])
+    conn.commit()
+    conn.close()
+
+    full = _scanner()
+    full.load_data()
+    everything = full.scan()
+
+    for sf in [ScanFilter(["Fuzz Collection 1"]), ScanFilter(["C2", "C4"], rarities=[3]), ScanFilter(["C0"], stattrak=1)]:
+        from_db, from_snapshot = _scanner(), _scanner()
+        from_db.load_data(sf)
+        from_snapshot.load_snapshot(cat['collections'], cat['skins'], cat['rows'], sf)
+        expected = [_key(r) for r in everything if sf.accepts_target(r['inputs']['target']['collection_id'])
+                    and sf.accepts_input(r['inputs']['target']['rarity'], r['inputs']['target']['is_st'], 0.0)]
+        print(sf.describe(), f"{len(from_db.skins)}/{len(full.skins)} skins loaded, {len(expected)} mixes")
+        assert len(from_db.skins) < len(full.skins)
+        assert [_key(r) for r in from_db.scan()] == expected
+        assert [_key(r) for r in from_snapshot.scan()] == expected
+
+    # Price band: every input of every mix stays inside it
+    band = _scanner()
+    band.load_data(ScanFilter(min_price=1.0, max_price=20.0))
+    results = band.scan()
+    assert results and all(1.0 <= r['inputs'][s]['price'] <= 20.0 for r in results for s in ('target', 'filler'))
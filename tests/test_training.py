@@ -0,0 +1,53 @@
+import sqlite3
+import numpy as np
+from scipy.optimize import curve_fit
+from tradeup.training import model_func, iter_bucket_snapshots, train_window
+
+def _history(days):
+    """One goods snapshot per day following 1 + 2 * exp(-15 * adj), then a newer regime at alpha 4."""
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE skins (id TEXT, rarity_rank INTEGER, min_float REAL, max_float REAL)")
+    conn.execute("CREATE TABLE prices (skin_id TEXT, goods_id INTEGER, is_stattrak INTEGER)")
+    conn.execute("""CREATE TABLE float_bucket_history (recorded_at TIMESTAMP, goods_id INTEGER, min_float REAL,
+                    max_float REAL, price REAL, sell_num INTEGER, PRIMARY KEY (recorded_at, goods_id, min_float))""")
+    conn.execute("INSERT INTO skins VALUES ('s1', 3, 0.0, 1.0)")
+    conn.execute("INSERT INTO prices VALUES ('s1', 1, 0)")
+    edges = [0.0, 0.01, 0.02, 0.04, 0.07, 0.1, 0.15]
+    rows = []
+    for d in range(days):
+        alpha = 2.0 if d < days - 5 else 4.0
+        ts = f"2026-{1 + d // 28:02d}-{1 + d % 28:02d} 12:00:00"
+        base = 10 * model_func(0.04, alpha, 15.0)
+        rows += [(ts, 1, lo, hi, 10 * model_func(lo, alpha, 15.0) * 10 / base, 5) for lo, hi in zip(edges, edges[1:])]
+    conn.executemany("INSERT INTO float_bucket_history VALUES (?, ?, ?, ?, ?, ?)", rows)
+    return conn
+
+def test_chunked_stream_matches_single_fetch():
+    conn = _history(60)
+    window = ('2026-01-01 00:00:00', '2026-12-31 00:00:00')
+    one = list(iter_bucket_snapshots(conn, *window, chunk_rows=10**6))
+    small = list(iter_bucket_snapshots(conn, *window, chunk_rows=4))
+    assert one == small and len(one) == 60
+
+    a, ca, _ = train_window(conn, chunk_rows=10**6, window_days=1000, half_life_days=1000)
+    b, cb, info = train_window(conn, chunk_rows=4, window_days=1000, half_life_days=1000)
+    print(a, b, info)
+    assert a == b and ca == cb and info['snapshots'] == 60
+
+def test_window_and_recency():
+    conn = _history(60)
+    # The last 5 days only: same fit as a plain curve_fit on one snapshot of the new regime
+    recent, _, info = train_window(conn, window_days=4.5)
+    _, _, buckets = list(iter_bucket_snapshots(conn, '2026-01-01 00:00:00', '2026-12-31 00:00:00'))[-1]
+    x, p = np.array(buckets).T
+    popt, _ = curve_fit(model_func, x, p / p[x == 0.04], p0=[2.0, 10.0], bounds=(0, [100.0, 100.0]))
+    print(recent, info, popt)
+    assert info['snapshots'] == 5
+    assert np.allclose([recent['3_0']['alpha'], recent['3_0']['k']], popt, atol=1e-3)
+
+    # Whole history: a short half-life pulls the fit toward the recent regime
+    slow, _, _ = train_window(conn, window_days=1000, half_life_days=1000)
+    fast, _, _ = train_window(conn, window_days=1000, half_life_days=1)
+    print(slow, fast)
+    assert slow['3_0']['alpha'] < fast['3_0']['alpha'] < recent['3_0']['alpha']
+    assert abs(fast['3_0']['alpha'] - recent['3_0']['alpha']) < abs(slow['3_0']['alpha'] - recent['3_0']['alpha']) / 5
@@ -0,0 +1,189 @@
+import contextlib
+import io
+import multiprocessing
+from datetime import datetime, timedelta
+from .config import RMB_TO_USD_RATE, FEE
+from .database import get_db_connection
+from .sanitizer import PriceSanitizer
+from .scanner import TradeupScanner
+from .float_pricing import OutputPriceTables
+from .orderbook import OrderBook
+
+TS_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Worker-process state, set once by _init_worker
+_worker = {}
+
+def snapshot_prices(conn, ts):
+    """Reconstructs the market at `ts`: latest price_history price (RMB) per (skin_id, condition, is_st)."""
+    return next(replay_history(conn, [ts]))
+
+def replay_history(conn, times):
+    """
+    Yields the market (key -> RMB price) at each of the sorted `times`, replaying
+    price_history once in (recorded_at, id) order and copying the running state
+    at every snapshot time, instead of one GROUP BY over the history per snapshot.
+    """
+    cursor = conn.execute("SELECT skin_id, condition, is_stattrak, price, recorded_at FROM price_history "
+                          "ORDER BY recorded_at, id")
+    state, pending = {}, None
+    for ts in times:
+        if pending is not None and pending[4] <= ts:
+            state[pending[:3]] = pending[3]
+            pending = None
+        if pending is None:
+            for row in cursor:
+                if row[4] > ts:
+                    pending = tuple(row)
+                    break
+                state[(row[0], row[1], row[2])] = row[3]
+        yield dict(state)
+
+def snapshot_times(start, end, step_hours):
+    times = []
+    t = datetime.strptime(start, TS_FORMAT)
+    end_t = datetime.strptime(end, TS_FORMAT)
+    while t <= end_t:
+        times.append(t.strftime(TS_FORMAT))
+        t += timedelta(hours=step_hours)
+    return times
+
+def _init_worker(collections, skins, goods_ids):
+    """Receives the immutable catalog once per worker process."""
+    _worker['collections'] = collections
+    _worker['skins'] = skins
+    _worker['goods_ids'] = goods_ids
+    with contextlib.redirect_stdout(io.StringIO()):
+        _worker['sanitizer'] = PriceSanitizer()
+
+def _sanitized_rows(prices_rmb):
+    """Runs the sanitizer on a snapshot and returns scanner price rows with predictions and flags."""
+    sanitizer, skins = _worker['sanitizer'], _worker['skins']
+    sanitizer.load_snapshot(skins, {k: p * RMB_TO_USD_RATE for k, p in prices_rmb.items()})
+    sanitizer.build_collection_stats()
+    sanitizer.build_global_regression()
+
+    name_to_id = {v['market_hash_name']: k for k, v in skins.items()}
+    irregular = {(name_to_id.get(a['skin']), a['condition'], int(a['is_stattrak'])) for a in sanitizer.detect_anomalies()}
+
+    rows = []
+    for key, price in prices_rmb.items():
+        if key[0] not in skins: continue
+        predicted = sanitizer.get_predicted_price(*key)
+        rows.append({
+            'skin_id': key[0], 'condition': key[1], 'is_stattrak': key[2], 'price': price,
+            'predicted_price': predicted / RMB_TO_USD_RATE if predicted else None,
+            # price_history keeps no stock: sell_num is unknown (the scan never reads it, only allocation does)
+            'irregular': key in irregular, 'sell_num': None, 'goods_id': _worker['goods_ids'].get(key)
+        })
+    return rows
+
+def _snapshot_scanner(prices_rmb):
+    """Scanner loaded with a sanitized snapshot and its exact-float output price tables."""
+    scanner = TradeupScanner()
+    with contextlib.redirect_stdout(io.StringIO()):
+        scanner.load_snapshot(_worker['collections'], _worker['skins'], _sanitized_rows(prices_rmb))
+    # Buckets are a current-day snapshot: using them here would leak future information
+    scanner.output_prices = OutputPriceTables(scanner.skins, scanner.prices_map)
+    scanner.order_book = OrderBook({})
+    return scanner
+
+def _realized_value(result, later):
+    """
+    Net value of a mix at the later snapshot, outcomes priced at their exact
+    float by the same pricer as the scan. Returns (value, outcomes priced by
+    the scan but without a later price).
+    """
+    st = int(result['is_stattrak'])
+    ev, unpriced = 0.0, 0
+    for o in result['outcomes']:
+        price, _ = later.output_price(o['skin_id'], st, o['float'], o['condition'])
+        if price is None:
+            unpriced += o['value_net'] > 0  # Already worthless in the scan: nothing to compare
+            continue
+        ev += price * FEE * o['probability'] / 100.0
+    return ev, unpriced
+
+def evaluate_snapshot(task):
+    """
+    Scans the market at `ts` and scores the reported mixes against prices at
+    `later_ts` (both markets come with the task). Mixes with an outcome missing
+    from the later snapshot are counted as unscored and left out of both the
+    predicted and realized sums.
+    """
+    ts, later_ts, top_k, prices, later_prices = task
+    scanner = _snapshot_scanner(prices)
+    later = _snapshot_scanner(later_prices)
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = scanner.scan(top_k=top_k)
+
+    predicted = realized = cost = 0.0
+    hits = scored = unscored = unpriced = 0
+    for r in results:
+        fin = r['financials']
+        value, missing = _realized_value(r, later)
+        if missing:
+            unscored += 1
+            unpriced += missing
+            continue
+        scored += 1
+        predicted += fin['profit']
+        realized += value - fin['total_cost']
+        cost += fin['total_cost']
+        hits += value > fin['total_cost']
+    return {
+        "timestamp": ts, "scored_at": later_ts, "reported": len(results), "scored": scored,
+        "unscored": unscored, "unpriced_outcomes": unpriced,
+        "predicted_profit": predicted, "realized_profit": realized, "capital": cost,
+        "predicted_roi": predicted / cost * 100 if cost else 0.0,
+        "realized_roi": realized / cost * 100 if cost else 0.0,
+        "hit_rate": hits / scored * 100 if scored else 0.0
+    }
+
+def run_backtest(times, horizon_hours, workers=None, top_k=None):
+    """Replays every snapshot in parallel worker processes; returns per-snapshot summaries in time order."""
+    conn = get_db_connection()
+    collections = {row['id']: row['name'] for row in conn.execute("SELECT id, name FROM collections")}
+    skins = {row['id']: dict(row) for row in conn.execute("SELECT * FROM skins")}
+    goods_ids = {(r['skin_id'], r['condition'], r['is_stattrak']): r['goods_id']
+                 for r in conn.execute("SELECT skin_id, condition, is_stattrak, goods_id FROM prices")}
+    history_end = conn.execute("SELECT MAX(recorded_at) FROM price_history").fetchone()[0]
+    conn.close()
+
+    pairs = []
+    for ts in times:
+        later = (datetime.strptime(ts, TS_FORMAT) + timedelta(hours=horizon_hours)).strftime(TS_FORMAT)
+        pairs.append((ts, later))
+    beyond = [p for p in pairs if history_end is None or p[1] > history_end]
+    if beyond:
+        print(f"Warning: {len(beyond)}/{len(pairs)} snapshots are scored after the end of price_history "
+              f"({history_end}): their later prices are the last recorded ones, not the market at the horizon.")
+
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(collections, skins, goods_ids)) as pool:
+        summaries = list(pool.imap_unordered(evaluate_snapshot, _tasks(pairs, top_k)))
+    summaries.sort(key=lambda s: s['timestamp'])
+    return summaries
+
+def _tasks(pairs, top_k):
+    """Worker tasks with both markets, from a single pass over the history; markets are kept only until used."""
+    times = sorted({t for pair in pairs for t in pair})
+    needed = {}
+    for ts, later in pairs:
+        needed[ts] = needed.get(ts, 0) + 1
+        needed[later] = needed.get(later, 0) + 1
+    by_later = {}
+    for ts, later in pairs:
+        by_later.setdefault(later, []).append(ts)
+
+    conn = get_db_connection()
+    markets = {}
+    for t, market in zip(times, replay_history(conn, times)):
+        markets[t] = market
+        # A pair is ready once its later time is replayed (ts <= later)
+        for ts in by_later.get(t, []):
+            yield ts, t, top_k, markets[ts], market
+            for key in (ts, t):
+                needed[key] -= 1
+                if not needed[key]:
+                    del markets[key]
+    conn.close()
@@ -0,0 +1,116 @@
+import csv
+import json
+import numpy as np
+from pricing_box import PricingEngine
+from .config import RMB_TO_USD_RATE, IRREGULAR_OUTPUT_SOURCE, PRICE_CHUNK_ROWS
+from .database import get_db_connection
+
+class ListingResolver:
+    """
+    Maps a listing row (skin_id, goods_id or market_hash_name + StatTrak) to
+    everything predict_price_batch needs. Skins and prices are read from the
+    DB in one pass; each (skin, StatTrak) is resolved once and cached.
+    """
+    def __init__(self, engine=None, conn=None):
+        self.engine = engine or PricingEngine()
+        own_conn = conn is None
+        conn = conn or get_db_connection()
+        self.skins = {row['id']: dict(row) for row in conn.execute(
+            "SELECT id, market_hash_name, rarity_rank, min_float, max_float FROM skins")}
+        self.by_name = {s['market_hash_name']: sid for sid, s in self.skins.items()}
+        self.by_goods = {}  # goods_id -> (skin_id, is_st)
+        self.prices = {}  # (skin_id, is_st) -> {cond: RMB price used for valuation}
+        use_pred = IRREGULAR_OUTPUT_SOURCE == "predicted"
+        for row in conn.execute("SELECT skin_id, condition, is_stattrak, price, predicted_price, irregular, goods_id FROM prices"):
+            key = (row['skin_id'], row['is_stattrak'])
+            self.by_goods[row['goods_id']] = key
+            price = row['predicted_price'] if use_pred and row['irregular'] and row['predicted_price'] else row['price']
+            self.prices.setdefault(key, {})[row['condition']] = price
+        if own_conn:
+            conn.close()
+        self._resolved = {}  # (skin_id, is_st) -> (min, max, bp row, alpha, k) or None
+
+    def key_of(self, row):
+        """(skin_id, is_st) for a listing row, or None when it cannot be matched."""
+        goods_id = row.get('goods_id')
+        if goods_id not in (None, ''):
+            return self.by_goods.get(int(goods_id))
+        sid = row.get('skin_id') or self.by_name.get(row.get('name') or row.get('market_hash_name'))
+        if sid not in self.skins:
+            return None
+        st = row.get('stattrak', row.get('is_stattrak', 0))
+        return sid, int(str(st).lower() in ('1', 'true', 'yes'))
+
+    def resolve(self, key):
+        if key not in self._resolved:
+            skin, prices = self.skins.get(key[0]), self.prices.get(key)
+            if not skin or not prices:
+                self._resolved[key] = None
+            else:
+                alpha, k = self.engine.model_row(skin['rarity_rank'], key[1], key[0])
+                self._resolved[key] = (skin['min_float'], skin['max_float'],
+                                       self.engine.base_price_row(prices), alpha, k)
+        return self._resolved[key]
+
+def price_rows(rows, resolver, chunk_size=PRICE_CHUNK_ROWS):
+    """
+    Prices an iterable of listing dicts in vectorized chunks.
+    Yields each row with 'price_rmb' and 'price_usd' added (None when the
+    listing cannot be matched or has no float).
+    """
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield from _price_chunk(chunk, resolver)
+            chunk = []
+    if chunk:
+        yield from _price_chunk(chunk, resolver)
+
+def _price_chunk(chunk, resolver):
+    idx, floats, params = [], [], []
+    for i, row in enumerate(chunk):
+        row['price_rmb'] = row['price_usd'] = None
+        try:
+            f = float(row['float'])
+            key = resolver.key_of(row)
+        except (KeyError, TypeError, ValueError):
+            continue
+        p = resolver.resolve(key) if key else None
+        if p is None: continue
+        idx.append(i)
+        floats.append(f)
+        params.append(p)
+
+    if idx:
+        s_min, s_max, bp, alpha, k = zip(*params)
+        prices = resolver.engine.predict_price_batch(floats, s_min, s_max, bp, alpha, k)
+        rmb, usd = np.round(prices, 2).tolist(), np.round(prices * RMB_TO_USD_RATE, 2).tolist()
+        for j, i in enumerate(idx):
+            if rmb[j] == rmb[j]:  # NaN when the skin has no usable condition price
+                chunk[i]['price_rmb'] = rmb[j]
+                chunk[i]['price_usd'] = usd[j]
+    return chunk
+
+def read_rows(stream, fmt):
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+    else:
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+
+def write_rows(rows, stream, fmt):
+    """Streams priced rows out in the input format; returns the row count."""
+    count = 0
+    writer = None
+    for row in rows:
+        if fmt == "csv":
+            if writer is None:
+                writer = csv.DictWriter(stream, fieldnames=list(row.keys()), extrasaction='ignore')
+                writer.writeheader()
+            writer.writerow(row)
+        else:
+            stream.write(json.dumps(row) + "\n")
+        count += 1
+    return count
@@ -0,0 +1,31 @@
+import json
+import os
+from .config import DETAILED_FLOAT_PATH
+
+def parse_buckets(sales):
+    """Extracts float buckets (min_float, max_float, min_price, sell_num) from a Buff 'sales' list."""
+    buckets = []
+    for s in sales:
+        if 'min_float' not in s:
+            continue  # Summary entry (liquidity_rank)
+        buckets.append((float(s['min_float']), float(s['max_float']), float(s['min_price']), int(s.get('sell_num', 0))))
+    buckets.sort()
+    return buckets
+
+def load_float_buckets(path=DETAILED_FLOAT_PATH):
+    """Loads detailled_float.json into goods_id -> sorted bucket list (prices in RMB)."""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding='utf-8') as f:
+            data = json.load(f)
+    except Exception as e:
+        print(f"Warning: Failed to load float buckets: {e}")
+        return {}
+
+    result = {}
+    for item in data.get('info', []):
+        buckets = parse_buckets(item.get('sales', []))
+        if buckets:
+            result[item['goods_id']] = buckets
+    return result
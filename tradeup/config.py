@@ -8,7 +8,14 @@ REPORTS_DIR = os.path.join(BASE_DIR, "reports")
 DB_PATH = os.path.join(DATA_DIR, "cs2_skins.db")
 OVERRIDES_PATH = os.path.join(DATA_DIR, "manual_overrides.json")
 PRICE_JSON_PATH = os.path.join(DATA_DIR, "price.json")
+SCAN_SNAPSHOT_PATH = os.path.join(REPORTS_DIR, "scan_snapshot.npz")
 MODEL_PARAMS_PATH = os.path.join(DATA_DIR, "model_params.json")
+SKIN_CURVES_PATH = os.path.join(DATA_DIR, "skin_curves.json")
+MODEL_VERSIONS_DIR = os.path.join(DATA_DIR, "model_versions")
+ONLINE_STATS_PATH = os.path.join(DATA_DIR, "online_stats.json")
+DETAILED_FLOAT_PATH = os.path.join(DATA_DIR, "detailled_float.json")
+METADATA_PATH = os.path.join(DATA_DIR, "skins_metadata.json")
+DETAILED_FLOAT_MMW_PATH = os.path.join(BASE_DIR, "detailled_float_mmw.json")
 
 # --- MARKET RATES ---
 RMB_TO_USD_RATE = 0.1439
@@ -16,16 +23,65 @@ FEE = 0.95  # 5% fee on Buff buy+sell
 
 # --- SCANNER CONFIG ---
 MIN_ROI = 10.0
+MIN_PROFIT = 0.5
 MIN_INPUT_ADJ_FLOAT = 0.05
 MIN_OUTPUT_PRICE = 0.5
 MAX_OUTPUT_PRICE = 2000.0
 ENABLE_STATTRAK = True
+MAX_FILLERS_PER_GROUP = 50  # Cheapest fillers kept per (rarity, StatTrak) group; 0 keeps them all
+USE_ORDER_BOOK = True  # Price fillers from bucket listing depth when available
+IRREGULAR_OUTPUT_SOURCE = "predicted"  # Price used for irregular outputs: "predicted" or "real"
+FLOAT_PRECISE_OUTPUTS = True  # Price outputs at their exact float (PricingEngine + buckets)
+FN_TABLE_POINTS = 48  # Samples of the exponential FN zone in output price tables
+EV_CACHE = True  # Score mixes from per-collection EV tables (tradeup/ev_cache.py)
+
+# --- RISK CONFIG ---
+RISK_REPEATS = 10  # Contracts per simulated batch
+RISK_GRID = 128  # Value cells per contract for repeated-contract convolution
+RISK_PERCENTILES = (5, 50, 95)
+
+# --- BATCH PRICING CONFIG ---
+PRICE_CHUNK_ROWS = 8192  # Listings priced per vectorized call (main.py price)
+
+# --- BACKTEST CONFIG ---
+BACKTEST_STEP_HOURS = 1.0
+BACKTEST_HORIZON_HOURS = 24.0  # Delay between reporting a mix and scoring its outputs
+
+# --- DISTRIBUTED SCAN CONFIG ---
+DIST_ADDRESS = ("127.0.0.1", 6110)  # Coordinator listen address (main.py coordinator / worker)
+DIST_AUTHKEY = b"tradeupfinder"  # Default shared secret: loopback only, messages are unpickled
+DIST_AUTHKEY_ENV = "TRADEUP_DIST_AUTHKEY"  # Env var holding the secret required off loopback (or --authkey)
+DIST_MAX_ATTEMPTS = 3  # A shard that fails or loses its worker this many times is abandoned
+DIST_LEASE_SECONDS = 300.0  # A shard not returned within this delay is handed to another worker
+
+# --- METADATA IMPORT CONFIG ---
+METADATA_CHUNK_BYTES = 1 << 20  # Read size when streaming a skin metadata dump
+METADATA_BATCH_ROWS = 5000  # Skin rows per bulk upsert
+
+# --- FLOAT RATIO REPORTS ---
+# (kind, bucket dump, Markdown report, JSON report); the Markdown names keep their historical Cyrillic "Р"
+FLOAT_REPORTS = [
+    ("ratio", DETAILED_FLOAT_PATH, os.path.join(BASE_DIR, "FLOAT_RATIO_RE\u0420ORT.md"), os.path.join(REPORTS_DIR, "float_ratio.json")),
+    ("mmw", DETAILED_FLOAT_MMW_PATH, os.path.join(BASE_DIR, "FLOAT_RATIO_RE\u0420ORT_MMW.md"), os.path.join(REPORTS_DIR, "float_ratio_mmw.json")),
+]
 
 # --- SANITIZER CONFIG ---
 OUTLIER_SIGMA = 2.5
 SCARCITY_EXPONENT = 1.0
 MIN_SAMPLES_FOR_STATS = 3
 ANOMALY_THRESHOLD = 5.0
+JUMP_HALF_LIFE_HOURS = 24.0  # Memory of the per-key price baseline
+JUMP_MIN_RATIO = 1.5  # Minimum move vs baseline before a JUMP can be flagged
+JUMP_NOISE_FLOOR = 0.05  # Log-price std floor (~5%) for quiet price histories
+OVERRIDES_RELOAD_SECONDS = 2.0  # How often manual_overrides.json is checked for changes
+
+# --- CURVE FIT CONFIG ---
+TRAIN_WINDOW_DAYS = 90.0  # Float bucket history used by a training run
+TRAIN_HALF_LIFE_DAYS = 30.0  # Recency weighting of bucket observations
+TRAIN_CHUNK_ROWS = 50000  # float_bucket_history rows read per fetch
+TRAIN_X_BINS = 200  # Adjusted-float bins of the rarity-level fit (bounds its memory)
+CURVE_SHRINKAGE = 2.0  # Ridge weight (in bucket points) pulling per-skin curves toward the rarity fit
+CURVE_MIN_EXCESS = 0.02  # Buckets within 2% of the base price carry no usable premium
 
 # --- GLOBAL CONSTANTS ---
 CONDITION_BOUNDS = {
@@ -0,0 +1,134 @@
+import json
+import os
+import numpy as np
+from .config import SKIN_CURVES_PATH, CURVE_SHRINKAGE, CURVE_MIN_EXCESS
+
+BASE_BUCKET_MIN = 0.04  # Reference bucket (0.04 - 0.07) for float premiums, as in train_model.py
+
+def collect_points(buckets, goods_meta):
+    """
+    Linearized bucket points of every (skin_id, is_st).
+    goods_meta: goods_id -> (skin_id, is_st, min_float, max_float).
+    Returns (keys, group index, adjusted float, log(ratio - 1)) where ratio
+    is the bucket price over the goods' base bucket price.
+    """
+    keys, index = [], {}
+    groups, xs, ys = [], [], []
+    for gid, bl in buckets.items():
+        meta = goods_meta.get(gid)
+        if meta is None: continue
+        sid, is_st, s_min, s_max = meta
+        span = s_max - s_min
+        if span <= 0: continue
+
+        base = next((p for b_min, _, p, _ in bl if b_min == BASE_BUCKET_MIN), None) or min(p for _, _, p, _ in bl)
+        if base <= 0: continue
+        for b_min, _, price, _ in bl:
+            excess = price / base - 1
+            if excess < CURVE_MIN_EXCESS: continue  # Flat tail: no premium to linearize
+            key = (sid, is_st)
+            if key not in index:
+                index[key] = len(keys)
+                keys.append(key)
+            groups.append(index[key])
+            xs.append(min(1.0, max(0.0, (b_min - s_min) / span)))
+            ys.append(np.log(excess))
+    return keys, np.array(groups, dtype=np.int64), np.array(xs), np.array(ys)
+
+def curve_stats(groups, x, y, m, w=None):
+    """Per-group (weighted) sufficient statistics: rows n, sum x, sum x^2, sum y, sum xy."""
+    w = np.ones(len(x)) if w is None else w
+    return np.array([np.bincount(groups, weights=v, minlength=m) for v in (w, w * x, w * x * x, w * y, w * x * y)])
+
+def fit_curves(groups, x, y, prior_log_alpha, prior_k, shrinkage=CURVE_SHRINKAGE):
+    """
+    Fits log(ratio - 1) = log(alpha) - k * adj for every group in one
+    vectorized solve of per-group 2x2 normal equations (bincount sufficient
+    statistics). Shrinkage adds `shrinkage` pseudo-points drawn from the
+    group's prior curve at the pooled float distribution, so sparse skins
+    stay close to their rarity fit. Returns (alpha, k, n) arrays.
+    """
+    stats = curve_stats(groups, x, y, len(prior_k))
+    mx, mxx = (x.mean(), (x * x).mean()) if len(x) else (0.0, 0.0)
+    return fit_curve_stats(stats, mx, mxx, prior_log_alpha, prior_k, shrinkage)
+
+def fit_curve_stats(stats, mx, mxx, prior_log_alpha, prior_k, shrinkage=CURVE_SHRINKAGE):
+    """fit_curves() from accumulated curve_stats(); mx / mxx are the pooled float moments."""
+    n, sx, sxx, sy, sxy = stats
+
+    # Unknowns (a, k) with design [1, -x]: (X'X + lam*M) theta = X'y + lam*M*prior
+    a11, a12, a22 = n + shrinkage, -sx - shrinkage * mx, sxx + shrinkage * mxx
+    b1 = sy + shrinkage * (prior_log_alpha - mx * prior_k)
+    b2 = -sxy + shrinkage * (-mx * prior_log_alpha + mxx * prior_k)
+    det = a11 * a22 - a12 * a12
+    solvable = np.abs(det) > 1e-12
+    safe_det = np.where(solvable, det, 1.0)
+    # Without float spread, k is not identified: keep the prior k and fit only the level
+    k = np.where(solvable, (a11 * b2 - a12 * b1) / safe_det, prior_k)
+    log_alpha = np.where(solvable, (a22 * b1 - a12 * b2) / safe_det,
+                         (b1 - a12 * prior_k) / np.maximum(a11, 1e-12))
+
+    # Same bounds as the rarity-level curve_fit
+    alpha = np.exp(np.clip(log_alpha, np.log(1e-4), np.log(100.0)))
+    return alpha, np.clip(k, 0.0, 100.0), n
+
+def pooled_prior(x, y):
+    """Unregularized fit over every point, used for groups without a rarity model."""
+    if len(x) < 2:
+        return 0.0, 0.0
+    slope, intercept = np.polyfit(x, y, 1)
+    return intercept, -slope
+
+def pooled_prior_stats(stats):
+    """pooled_prior() from summed curve_stats() columns (n, sx, sxx, sy, sxy)."""
+    n, sx, sxx, sy, sxy = stats
+    det = n * sxx - sx * sx
+    if n <= 0 or abs(det) < 1e-12:
+        return 0.0, 0.0
+    slope = (n * sxy - sx * sy) / det
+    return (sy - slope * sx) / n, -slope
+
+def curve_priors(keys, rarities, model_params, pooled_a, pooled_k):
+    """Per-key (log alpha, k) priors from the (rarity, StatTrak) models, else the pooled fit."""
+    prior_a, prior_k = np.empty(len(keys)), np.empty(len(keys))
+    for i, (sid, is_st) in enumerate(keys):
+        m = model_params.get(f"{rarities.get(sid)}_{int(is_st)}")
+        if m and m['alpha'] > 0:
+            prior_a[i], prior_k[i] = np.log(m['alpha']), m['k']
+        else:
+            prior_a[i], prior_k[i] = pooled_a, pooled_k
+    return prior_a, prior_k
+
+def train_skin_curves(buckets, goods_meta, rarities, model_params, shrinkage=CURVE_SHRINKAGE):
+    """
+    Per-(skin, StatTrak) curves shrunk toward the (rarity, StatTrak) fit.
+    rarities: skin_id -> rarity_rank. Returns {"<skin_id>_<is_st>": {alpha, k, n}}.
+    """
+    keys, groups, x, y = collect_points(buckets, goods_meta)
+    if not keys:
+        return {}
+    prior_a, prior_k = curve_priors(keys, rarities, model_params, *pooled_prior(x, y))
+    alpha, k, n = fit_curves(groups, x, y, prior_a, prior_k, shrinkage)
+    return {f"{sid}_{int(is_st)}": {"alpha": round(float(a), 4), "k": round(float(kk), 4), "n": int(nn)}
+            for (sid, is_st), a, kk, nn in zip(keys, alpha, k, n)}
+
+def load_skin_curves(path=SKIN_CURVES_PATH):
+    try:
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                return json.load(f)
+    except Exception as e:
+        print(f"Warning: Failed to load skin curves: {e}")
+    return {}
+
+def save_skin_curves(curves, path=SKIN_CURVES_PATH):
+    with open(path, "w") as f:
+        json.dump(curves, f, indent=4)
+
+def drop_skin_curves(skin_ids, path=SKIN_CURVES_PATH):
+    """Removes the curves of skins whose float range changed (fitted in the old adjusted-float space); returns the count."""
+    curves = load_skin_curves(path)
+    kept = {key: c for key, c in curves.items() if key.rsplit('_', 1)[0] not in skin_ids}
+    if len(kept) < len(curves):
+        save_skin_curves(kept, path)
+    return len(curves) - len(kept)
@@ -61,6 +61,122 @@ def init_db():
     )
     ''')
     
+    # Scan results (one row per run, opportunity and outcome)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS scan_runs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        created_at TIMESTAMP,
+        opportunities INTEGER,
+        params TEXT
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS opportunities (
+        id INTEGER PRIMARY KEY,
+        run_id INTEGER,
+        type TEXT,
+        is_stattrak INTEGER,
+        target_collection TEXT,
+        filler_collection TEXT,
+        target_id TEXT,
+        target_name TEXT,
+        target_cond TEXT,
+        target_price REAL,
+        filler_id TEXT,
+        filler_name TEXT,
+        filler_cond TEXT,
+        filler_price REAL,
+        total_cost REAL,
+        expected_value REAL,
+        profit REAL,
+        roi REAL,
+        prob_loss REAL,
+        inputs TEXT,
+        financials TEXT,
+        FOREIGN KEY(run_id) REFERENCES scan_runs(id)
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS outcomes (
+        opportunity_id INTEGER,
+        skin_id TEXT,
+        name TEXT,
+        condition TEXT,
+        float REAL,
+        probability REAL,
+        value_net REAL,
+        profit REAL,
+        source TEXT,
+        was_irregular INTEGER,
+        FOREIGN KEY(opportunity_id) REFERENCES opportunities(id)
+    )
+    ''')
+    for name, cols in [
+        ("idx_opp_run_profit", "opportunities (run_id, profit)"),
+        ("idx_opp_run_roi", "opportunities (run_id, roi)"),
+        ("idx_opp_run_cost", "opportunities (run_id, total_cost)"),
+        ("idx_opp_target_col", "opportunities (target_collection, run_id)"),
+        ("idx_opp_filler_col", "opportunities (filler_collection, run_id)"),
+        ("idx_outcomes_opp", "outcomes (opportunity_id)"),
+        # Filtered scans (ScanFilter.query): catalog slice by collection/rarity, then its prices
+        ("idx_skins_col_rarity", "skins (collection_id, rarity_rank)"),
+        ("idx_prices_skin", "prices (skin_id, is_stattrak)"),
+    ]:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {cols}")
+
+    # Accumulated float bucket snapshots (detailled_float.json), read in chunks by model training
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS float_bucket_history (
+        recorded_at TIMESTAMP,
+        goods_id INTEGER,
+        min_float REAL,
+        max_float REAL,
+        price REAL,
+        sell_num INTEGER,
+        PRIMARY KEY (recorded_at, goods_id, min_float)
+    )
+    ''')
+
+    # Catalog changes applied by the metadata import (tradeup/metadata.py)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS metadata_changes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        changed_at TIMESTAMP,
+        kind TEXT,
+        item_id TEXT,
+        field TEXT,
+        old_value,
+        new_value
+    )
+    ''')
+
+    # Float ratio report aggregates per (report, goods), recomputed only when the bucket hash changes (tradeup/float_report.py)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS float_report_cache (
+        source TEXT,
+        goods_id INTEGER,
+        bucket_hash TEXT,
+        skin_id TEXT,
+        is_stattrak INTEGER,
+        condition TEXT,
+        floor_price REAL,
+        aggregate TEXT,
+        reference_price REAL,
+        section TEXT,
+        entry TEXT,
+        updated_at TIMESTAMP,
+        PRIMARY KEY (source, goods_id)
+    )
+    ''')
+
+    # Point-in-time lookups (snapshot reconstruction for backtests)
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_price_history_key_time
+    ON price_history (skin_id, condition, is_stattrak, recorded_at)
+    ''')
+    
     # Migrations
     try:
         cursor.execute("ALTER TABLE prices ADD COLUMN predicted_price REAL")
@@ -0,0 +1,404 @@
+import json
+import math
+import os
+import random
+import time
+from pricing_box import PricingEngine, LIMIT_FN, LIMIT_MW, LIMIT_FT, LIMIT_WW, BARRIER_BS_TRANSITION
+from .config import RMB_TO_USD_RATE, REPORTS_DIR, CONDITION_BOUNDS, IRREGULAR_OUTPUT_SOURCE
+from .float_pricing import OutputPriceTables, TABLE_REL_ERROR
+from .online_stats import OnlineStatsEngine
+from .overrides import OverrideEngine
+from .rescore import ScanRecorder, rescore
+from .sanitizer import PriceSanitizer
+from .scanner import TradeupScanner
+
+CONDITIONS = ['FN', 'MW', 'FT', 'WW', 'BS']
+FLOAT_RANGES = [(0.0, 1.0), (0.0, 0.8), (0.0, 0.7), (0.06, 0.8), (0.0, 0.5), (0.1, 0.6), (0.0, 0.08), (0.02, 1.0)]
+EDGES = (LIMIT_FN, LIMIT_MW, 0.30, LIMIT_FT, LIMIT_WW, BARRIER_BS_TRANSITION)
+FAILURES_PATH = os.path.join(REPORTS_DIR, "difftest_failures.json")
+
+CHECKS = {}  # name -> Check
+
+class Check:
+    """A reference function, its random case generator and the engines that must reproduce it."""
+    def __init__(self, name, generate, reference, shrink, error_scale=None):
+        self.name = name
+        self.generate = generate  # rng -> case
+        self.reference = reference  # case -> list of outputs (tuples of numbers)
+        self.shrink = shrink  # case -> iterable of smaller cases
+        self.error_scale = error_scale  # reference output -> magnitudes the engine tolerance is relative to
+        self.engines = {}  # engine name -> (fn(case) -> outputs, rel_tol)
+
+def register_check(name, generate, reference, shrink, error_scale=None):
+    CHECKS[name] = Check(name, generate, reference, shrink, error_scale)
+    return CHECKS[name]
+
+def register_engine(check_name, engine_name, fn, rel_tol=1e-9):
+    """Adds an alternative implementation; its outputs must match the reference within rel_tol."""
+    CHECKS[check_name].engines[engine_name] = (fn, rel_tol)
+
+def _close(check, a, b, rel_tol):
+    if a is None or b is None:
+        return a is b
+    scale = check.error_scale(a) if check.error_scale else a
+    return len(a) == len(b) and all(math.isclose(x, y, rel_tol=rel_tol, abs_tol=max(1e-9, rel_tol * abs(m)))
+                                    for x, y, m in zip(a, b, scale))
+
+def _first_mismatch(check, fn, rel_tol, case):
+    """Index of the first output that differs, or None (a crashing engine counts as a mismatch)."""
+    ref = check.reference(case)
+    try:
+        got = fn(case)
+    except Exception as e:
+        return 0, ref, f"{type(e).__name__}: {e}"
+    if len(got) != len(ref):
+        return 0, ref, got
+    for i, (r, g) in enumerate(zip(ref, got)):
+        if not _close(check, r, g, rel_tol):
+            return i, ref, got
+    return None
+
+def minimize(check, fn, rel_tol, case):
+    """Greedy shrink: keeps taking the first smaller case that still fails."""
+    improved = True
+    while improved:
+        improved = False
+        for smaller in check.shrink(case):
+            try:
+                failing = _first_mismatch(check, fn, rel_tol, smaller) is not None
+            except Exception:
+                continue  # The reference rejects this candidate
+            if failing:
+                case, improved = smaller, True
+                break
+    return case
+
+# --- Random catalogs ---
+
+def random_skin(rng, sid, collection_id, rarity):
+    s_min, s_max = rng.choice(FLOAT_RANGES) if rng.random() < 0.7 else sorted(
+        round(rng.uniform(0, 1), 3) for _ in range(2))
+    if s_max - s_min < 0.01:
+        s_max = min(1.0, s_min + 0.05)
+    return {'id': sid, 'market_hash_name': f"Fuzz | Skin {sid}", 'collection_id': collection_id,
+            'rarity_rank': rarity, 'min_float': s_min, 'max_float': s_max}
+
+def random_base_prices(rng, skin):
+    """USD condition prices for the conditions the skin can have, mostly decreasing with wear."""
+    reachable = [c for c in CONDITIONS
+                 if CONDITION_BOUNDS[c][0] < skin['max_float'] and skin['min_float'] < CONDITION_BOUNDS[c][1]]
+    price = math.exp(rng.uniform(-1, 6))
+    prices = {}
+    for c in reachable:
+        if rng.random() < 0.15 and len(prices) > 0:
+            continue  # Missing listing
+        prices[c] = round(price * (rng.uniform(1.3, 2.5) if rng.random() < 0.1 else 1.0), 2)  # Some inversions
+        price *= rng.uniform(0.4, 0.95)
+    if not prices:
+        prices[reachable[0]] = round(price, 2)
+    return prices
+
+def random_float(rng, skin):
+    s_min, s_max = skin['min_float'], skin['max_float']
+    r = rng.random()
+    if r < 0.3:
+        edges = [e for e in EDGES + (s_min + 0.0005,) if s_min < e < s_max]
+        if edges:
+            # On or right around a rule breakpoint
+            offset = rng.choice([0.0, 1e-12, -1e-12]) if rng.random() < 0.3 else rng.uniform(-1e-3, 1e-3)
+            return min(s_max, max(s_min, rng.choice(edges) + offset))
+    if r < 0.4:
+        return s_min + rng.uniform(0, 0.0005)
+    return rng.uniform(s_min, s_max)
+
+def random_catalog(rng, n_collections=3, per_rarity=2):
+    collections, skins, rows = {}, {}, []
+    goods_id = 1
+    for c in range(n_collections):
+        cid = f"C{c}"
+        collections[cid] = f"Fuzz Collection {c}"
+        for rarity in (2, 3, 4):
+            for _ in range(rng.randint(1, per_rarity)):
+                sid = f"S{len(skins)}"
+                skins[sid] = random_skin(rng, sid, cid, rarity)
+                for is_st in (0, 1):
+                    if is_st and rng.random() < 0.3: continue
+                    for cond, usd in random_base_prices(rng, skins[sid]).items():
+                        irregular = rng.random() < 0.1
+                        pred = usd * rng.uniform(0.3, 1.0) if irregular else None
+                        rows.append({'skin_id': sid, 'condition': cond, 'is_stattrak': is_st,
+                                     'price': usd / RMB_TO_USD_RATE, 'sell_num': rng.randint(0, 300),
+                                     'goods_id': goods_id, 'predicted_price': pred / RMB_TO_USD_RATE if pred else None,
+                                     'irregular': int(irregular)})
+                        goods_id += 1
+    return {'collections': collections, 'skins': skins, 'rows': rows}
+
+# --- Check: PricingEngine.predict_price ---
+
+_engine = PricingEngine()
+
+def gen_predict_price(rng):
+    skin = random_skin(rng, "S0", "C0", rng.randint(2, 5))
+    return {'skin': skin, 'base_prices': random_base_prices(rng, skin), 'is_st': rng.randint(0, 1),
+            'floats': [random_float(rng, skin) for _ in range(40)]}
+
+def ref_predict_price(case):
+    s = case['skin']
+    return [(_engine.predict_price(f, s['min_float'], s['max_float'], case['base_prices'],
+                                   str(s['rarity_rank']), case['is_st']),) for f in case['floats']]
+
+def shrink_predict_price(case):
+    if len(case['floats']) > 1:
+        for f in case['floats']:
+            yield dict(case, floats=[f])
+        return
+    for cond in case['base_prices']:
+        if len(case['base_prices']) > 1:
+            yield dict(case, base_prices={c: p for c, p in case['base_prices'].items() if c != cond})
+    for digits in (2, 3, 4, 6):
+        f = round(case['floats'][0], digits)
+        if f != case['floats'][0] and case['skin']['min_float'] <= f <= case['skin']['max_float']:
+            yield dict(case, floats=[f])
+    for cond, p in case['base_prices'].items():
+        if p != round(p):
+            yield dict(case, base_prices=dict(case['base_prices'], **{cond: float(round(p))}))
+
+def tables_predict_price(case):
+    """OutputPriceTables without buckets must follow the rulebook between its sample points."""
+    s = case['skin']
+    pdata = {'prices': case['base_prices'], 'pred_prices': case['base_prices'],
+             'irregular': {}, 'goods_ids': {}}
+    tables = OutputPriceTables({s['id']: s}, {(s['id'], case['is_st']): pdata}, engine=_engine)
+    return [(tables.price(s['id'], case['is_st'], f),) for f in case['floats']]
+
+def batch_predict_price(case):
+    """PricingEngine.predict_price_batch over all floats of the case at once."""
+    s, n = case['skin'], len(case['floats'])
+    alpha, k = _engine.model_row(s['rarity_rank'], case['is_st'])
+    prices = _engine.predict_price_batch(case['floats'], [s['min_float']] * n, [s['max_float']] * n,
+                                         [_engine.base_price_row(case['base_prices'])] * n, [alpha] * n, [k] * n)
+    return [(p,) for p in prices.tolist()]
+
+# --- Check: PriceSanitizer.get_predicted_price ---
+
+def gen_predicted_price(rng):
+    cat = random_catalog(rng, n_collections=rng.randint(1, 3), per_rarity=3)
+    prices = [[r['skin_id'], r['condition'], r['is_stattrak'], r['price'] * RMB_TO_USD_RATE] for r in cat['rows']]
+    return {'skins': cat['skins'], 'prices': prices}
+
+def _sanitizer(case):
+    san = PriceSanitizer.__new__(PriceSanitizer)
+    san.model_params = _engine.model_params
+    san.skin_curves = _engine.skin_curves
+    san.overrides = OverrideEngine(path=None)
+    san.skins, san.collections = {}, {}
+    san.load_snapshot(case['skins'], {(sid, c, st): p for sid, c, st, p in case['prices']})
+    return san
+
+def _predictions(san, case):
+    return [(san.get_predicted_price(sid, c, st) or 0.0,) for sid, c, st, _ in case['prices']]
+
+def ref_predicted_price(case):
+    san = _sanitizer(case)
+    san.build_collection_stats()
+    san.build_global_regression()
+    return _predictions(san, case)
+
+def shrink_predicted_price(case):
+    for i in range(len(case['prices'])):
+        if len(case['prices']) > 1:
+            yield dict(case, prices=case['prices'][:i] + case['prices'][i + 1:])
+    used = {p[0] for p in case['prices']}
+    if len(used) < len(case['skins']):
+        yield dict(case, skins={sid: s for sid, s in case['skins'].items() if sid in used})
+
+def online_predicted_price(case):
+    san = _sanitizer(case)
+    engine = OnlineStatsEngine(case['skins'])
+    for sid, c, st, usd in case['prices']:
+        engine.apply(sid, c, st, usd / RMB_TO_USD_RATE, "2024-01-01 00:00:00")
+    san.attach_online_stats(engine)
+    san.build_global_regression()
+    return _predictions(san, case)
+
+# --- Check: TradeupScanner._evaluate_mix ---
+
+class RulebookPrices:
+    """Exact output pricing for the reference: predict_price at every float, no table."""
+    def __init__(self, skins, prices_map):
+        self.skins = skins
+        self.prices_map = prices_map
+
+    def price(self, skin_id, is_st, real_f):
+        s, pdata = self.skins[skin_id], self.prices_map[(skin_id, is_st)]
+        use_pred = IRREGULAR_OUTPUT_SOURCE == "predicted"
+        base_prices = {c: pdata['pred_prices'][c] if use_pred and pdata['irregular'].get(c) else p
+                       for c, p in pdata['prices'].items()}
+        return _engine.predict_price(real_f, s['min_float'], s['max_float'], base_prices,
+                                     str(s['rarity_rank']), is_st, skin_id)
+
+def _scanner(case, exact=False):
+    scanner = TradeupScanner()
+    scanner.load_snapshot(case['collections'], case['skins'], case['rows'])
+    if exact:
+        scanner.output_prices = RulebookPrices(case['skins'], scanner.prices_map)
+        scanner.use_ev_cache = False  # EV tables are built from price tables
+    else:
+        scanner.output_prices = OutputPriceTables(case['skins'], scanner.prices_map, engine=_engine)
+    scanner.min_roi = scanner.min_profit = float('-inf')  # Every mix returns its financials
+    return scanner
+
+def gen_evaluate_mix(rng):
+    case = random_catalog(rng)
+    scanner = _scanner(case)
+    _, groups = scanner._build_candidate_lists()
+    mixes = []
+    for _ in range(200):
+        items = groups.get((rng.randint(2, 3), rng.randint(0, 1)))
+        if not items: continue
+        target, filler = rng.choice(items), rng.choice(items)
+        if target['collection_id'] == filler['collection_id']: continue
+        mixes.append([target['id'], target['cond'], filler['id'], filler['cond'], target['is_st'],
+                      rng.uniform(0.001, 1.0), rng.uniform(1.0, 1.3)])
+        if len(mixes) >= 30: break
+    case['mixes'] = mixes
+    return case
+
+def _run_mixes(scanner, case, evaluate=None):
+    evaluate = evaluate or scanner._evaluate_mix
+    _, groups = scanner._build_candidate_lists()
+    index = {(i['id'], i['cond'], i['is_st']): i for items in groups.values() for i in items}
+    results = []
+    for t_id, t_cond, f_id, f_cond, is_st, adj, premium in case['mixes']:
+        target, filler = index[(t_id, t_cond, is_st)], index[(f_id, f_cond, is_st)]
+        t_outs = scanner.get_outputs(target['collection_id'], target['rarity'])
+        f_outs = scanner.get_outputs(filler['collection_id'], filler['rarity'])
+        if not t_outs or not f_outs:
+            results.append(None)
+            continue
+        results.append(evaluate(target, filler, None, adj, t_outs, f_outs, filler['price'] * premium))
+    return results
+
+def _financials(results):
+    out = []
+    for r in results:
+        fin = r['financials'] if r else None
+        out.append((fin['total_cost'], fin['expected_value'], fin['profit'], fin['roi']) if fin else None)
+    return out
+
+def ref_evaluate_mix(case):
+    scanner = _scanner(case, exact=True)
+    return _financials(_run_mixes(scanner, case))
+
+def financials_error_scale(fin):
+    """Output prices carry the error: profit inherits the EV error, and ROI the same error over the cost."""
+    cost, ev, _, _ = fin
+    return (cost, ev, ev, ev / cost * 100 if cost > 0 else 0)
+
+def tables_evaluate_mix(case):
+    """Per-output pass priced through OutputPriceTables, as in production."""
+    scanner = _scanner(case)
+    scanner.use_ev_cache = False
+    return _financials(_run_mixes(scanner, case))
+
+def ev_cache_evaluate_mix(case):
+    """Scores straight from the per-collection EV tables (skipping the per-output pass of passing mixes)."""
+    scanner = _scanner(case)
+
+    def score(target, filler, _, adj, t_outs, f_outs, filler_price):
+        cost, ev = scanner._cached_score(target, filler, adj, filler_price)
+        return (cost, ev, ev - cost, (ev - cost) / cost * 100 if cost > 0 else 0)
+    return _run_mixes(scanner, case, score)
+
+def shrink_evaluate_mix(case):
+    if len(case['mixes']) > 1:
+        for m in case['mixes']:
+            yield dict(case, mixes=[m])
+        return
+    used = {case['mixes'][0][0], case['mixes'][0][2]}
+    for sid in case['skins']:
+        if sid not in used:
+            yield dict(case, skins={k: s for k, s in case['skins'].items() if k != sid},
+                       rows=[r for r in case['rows'] if r['skin_id'] != sid])
+    for i, r in enumerate(case['rows']):
+        yield dict(case, rows=case['rows'][:i] + case['rows'][i + 1:])
+
+def rescore_evaluate_mix(case):
+    """Columnar re-scoring of the recorded vectors must give back the scanner's numbers."""
+    scanner = _scanner(case, exact=True)
+    scanner.recorder = ScanRecorder()
+    results = _run_mixes(scanner, case)
+    scores = rescore(scanner.recorder.to_snapshot())
+    out, j = [], 0
+    for r in results:
+        if r is None:
+            out.append(None)
+            continue
+        out.append((scores['total_cost'][j], scores['expected_value'][j], scores['profit'][j], scores['roi'][j]))
+        j += 1
+    return out
+
+register_check("predict_price", gen_predict_price, ref_predict_price, shrink_predict_price)
+register_check("get_predicted_price", gen_predicted_price, ref_predicted_price, shrink_predicted_price)
+register_check("evaluate_mix", gen_evaluate_mix, ref_evaluate_mix, shrink_evaluate_mix, financials_error_scale)
+register_engine("predict_price", "float_tables", tables_predict_price, rel_tol=TABLE_REL_ERROR)
+register_engine("predict_price", "batch", batch_predict_price, rel_tol=1e-12)
+register_engine("get_predicted_price", "online_stats", online_predicted_price)
+register_engine("evaluate_mix", "rescore", rescore_evaluate_mix)
+register_engine("evaluate_mix", "float_tables", tables_evaluate_mix, rel_tol=TABLE_REL_ERROR)
+register_engine("evaluate_mix", "ev_cache", ev_cache_evaluate_mix, rel_tol=TABLE_REL_ERROR)
+
+# --- Runner ---
+
+def run_fuzz(checks=None, cases=100, seed=0, max_failures=5):
+    """
+    Runs every registered engine against its reference on `cases` random
+    cases per check. Returns one report per (check, engine) with timings,
+    throughput (outputs/s) and minimized reproducers of the mismatches.
+    """
+    reports = []
+    for name in checks or CHECKS:
+        check = CHECKS[name]
+        rng = random.Random(f"{seed}:{name}")
+        generated = [check.generate(rng) for _ in range(cases)]
+        for engine_name, (fn, rel_tol) in check.engines.items():
+            ref_time = eng_time = 0.0
+            outputs = 0
+            failures = []
+            mismatches = 0
+            for i, case in enumerate(generated):
+                t0 = time.perf_counter()
+                ref = check.reference(case)
+                t1 = time.perf_counter()
+                try:
+                    got = fn(case)
+                except Exception as e:
+                    got = f"{type(e).__name__}: {e}"
+                t2 = time.perf_counter()
+                ref_time += t1 - t0
+                eng_time += t2 - t1
+                outputs += len(ref)
+
+                bad = isinstance(got, str) or len(got) != len(ref) or any(
+                    not _close(check, r, g, rel_tol) for r, g in zip(ref, got))
+                mismatches += bad
+                if bad and len(failures) < max_failures:
+                    small = minimize(check, fn, rel_tol, case)
+                    idx, s_ref, s_got = _first_mismatch(check, fn, rel_tol, small)
+                    failures.append({'case_index': i, 'reproducer': small, 'output_index': idx,
+                                     'reference': s_ref[idx] if s_ref else None,
+                                     'engine': s_got if isinstance(s_got, str) else s_got[idx]})
+            reports.append({
+                'check': name, 'engine': engine_name, 'cases': cases, 'outputs': outputs,
+                'mismatches': mismatches, 'failures': failures, 'rel_tol': rel_tol,
+                'reference_rate': outputs / ref_time if ref_time > 0 else float('inf'),
+                'engine_rate': outputs / eng_time if eng_time > 0 else float('inf'),
+            })
+    return reports
+
+def save_failures(reports, path=FAILURES_PATH):
+    failing = [r for r in reports if r['failures']]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(failing, f, indent=2, default=str)
+    return path
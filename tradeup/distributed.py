@@ -0,0 +1,248 @@
+import contextlib
+import hashlib
+import io
+import ipaddress
+import os
+import pickle
+import threading
+import time
+from collections import deque
+from multiprocessing.connection import Listener, Client
+from .config import (
+    DIST_ADDRESS, DIST_AUTHKEY, DIST_AUTHKEY_ENV, DIST_LEASE_SECONDS, DIST_MAX_ATTEMPTS, FLOAT_PRECISE_OUTPUTS,
+    USE_ORDER_BOOK
+)
+from .buckets import load_float_buckets
+from .float_pricing import OutputPriceTables
+from .market import PRICE_COLUMNS
+from .orderbook import OrderBook
+from .scanner import TradeupScanner
+
+def resolve_authkey(authkey=None):
+    """Shared secret: the --authkey value, else the DIST_AUTHKEY_ENV variable, else the default key."""
+    key = authkey or os.environ.get(DIST_AUTHKEY_ENV)
+    return key.encode('utf-8') if isinstance(key, str) else (key or DIST_AUTHKEY)
+
+def check_authkey(address, authkey):
+    """
+    multiprocessing.connection unpickles every message, so anyone holding the
+    key can run code on the other side: off loopback the default key (public,
+    in the repo) is refused.
+    """
+    host = address[0]
+    try:
+        loopback = host == "localhost" or ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        loopback = False
+    if not loopback and authkey == DIST_AUTHKEY:
+        raise ValueError(f"{host} is not a loopback address: set a secret key with --authkey or ${DIST_AUTHKEY_ENV}.")
+
+def snapshot_version(blob):
+    return hashlib.sha1(blob).hexdigest()[:12]
+
+def build_snapshot(conn, min_roi, min_profit, max_fillers, top_k=None):
+    """Compact market snapshot shipped once to each worker: catalog, price rows (as tuples), buckets and scan settings."""
+    return {
+        'collections': {row['id']: row['name'] for row in conn.execute("SELECT id, name FROM collections")},
+        'skins': {row['id']: dict(row) for row in conn.execute("SELECT * FROM skins")},
+        'price_columns': PRICE_COLUMNS,
+        'prices': [tuple(row) for row in conn.execute(f"SELECT {', '.join(PRICE_COLUMNS)} FROM prices")],
+        'buckets': load_float_buckets(),
+        'params': {'min_roi': min_roi, 'min_profit': min_profit, 'max_fillers': max_fillers, 'top_k': top_k},
+    }
+
+def scanner_from_snapshot(snap):
+    scanner = TradeupScanner()
+    cols = snap['price_columns']
+    scanner.load_snapshot(snap['collections'], snap['skins'], [dict(zip(cols, row)) for row in snap['prices']])
+    if FLOAT_PRECISE_OUTPUTS:
+        scanner.output_prices = OutputPriceTables(scanner.skins, scanner.prices_map, snap['buckets'])
+    if USE_ORDER_BOOK:
+        scanner.order_book = OrderBook(snap['buckets'])
+    params = snap['params']
+    scanner.min_roi, scanner.min_profit, scanner.max_fillers = params['min_roi'], params['min_profit'], params['max_fillers']
+    return scanner
+
+def plan_shards(scanner):
+    """One shard per (target collection, rarity, StatTrak) group, biggest first so stragglers are small."""
+    targets, _ = scanner._build_candidate_lists()
+    sizes = {}
+    for t in targets:
+        key = (t['collection_id'], t['rarity'], t['is_st'])
+        sizes[key] = sizes.get(key, 0) + 1
+    return [[key] for key, _ in sorted(sizes.items(), key=lambda kv: -kv[1])]
+
+class Coordinator:
+    """
+    Hands scan shards to workers over multiprocessing.connection and merges
+    their results. Each shard is leased to one worker; it goes back to the
+    queue when the worker disconnects, its lease expires or its scan fails,
+    up to max_attempts times, and the first result received for a shard wins.
+    Results are only accepted for the snapshot version this coordinator serves.
+    """
+    def __init__(self, snapshot, shards, lease_seconds=DIST_LEASE_SECONDS, max_attempts=DIST_MAX_ATTEMPTS):
+        self.blob = pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL)
+        self.version = snapshot_version(self.blob)
+        self.top_k = snapshot['params']['top_k']
+        self.shards = shards
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.pending = deque(range(len(shards)))
+        self.leases = {}  # shard id -> (worker, expiry)
+        self.done = {}  # shard id -> results
+        self.attempts = {}  # shard id -> leases lost (failure, disconnect, expiry)
+        self.failed = {}  # shard id -> last error, for abandoned shards
+        self.reassigned = 0
+        self.cond = threading.Condition()
+
+    def _lease(self, worker):
+        with self.cond:
+            self._expire()
+            if self.pending:
+                sid = self.pending.popleft()
+                self.leases[sid] = (worker, time.monotonic() + self.lease_seconds)
+                return ('shard', sid, self.shards[sid])
+            if len(self.done) == len(self.shards):
+                return ('done',)
+            return ('wait', 0.2)
+
+    def _expire(self):
+        now = time.monotonic()
+        for sid, (worker, expiry) in list(self.leases.items()):
+            if expiry < now:
+                print(f"Lease of shard {sid} expired ({worker}), reassigning.")
+                self._requeue(sid, f"lease expired ({worker})")
+
+    def _requeue(self, sid, reason):
+        del self.leases[sid]
+        if sid in self.done:
+            return
+        self.attempts[sid] = self.attempts.get(sid, 0) + 1
+        if self.attempts[sid] >= self.max_attempts:
+            print(f"Shard {sid} {self.shards[sid]} abandoned after {self.attempts[sid]} attempts: {reason}")
+            self.failed[sid] = reason
+            self.done[sid] = []
+            self.cond.notify_all()
+        else:
+            self.pending.appendleft(sid)
+            self.reassigned += 1
+
+    def _complete(self, sid, results):
+        with self.cond:
+            self.leases.pop(sid, None)
+            if sid not in self.done:
+                self.done[sid] = results
+            if sid in self.pending:
+                self.pending.remove(sid)  # Finished by a worker whose lease had expired
+            self.cond.notify_all()
+
+    def _fail(self, sid, worker, error):
+        with self.cond:
+            print(f"Shard {sid} failed on {worker}: {error}")
+            if sid in self.leases:
+                self._requeue(sid, error)
+
+    def _release(self, worker):
+        with self.cond:
+            lost = [sid for sid, (w, _) in self.leases.items() if w == worker]
+            for sid in lost:
+                self._requeue(sid, f"worker {worker} disconnected")
+            if lost:
+                print(f"Worker {worker} disconnected, reassigning {len(lost)} shard(s).")
+            self.cond.notify_all()
+
+    def _serve(self, conn, worker):
+        try:
+            while True:
+                msg = conn.recv()
+                if msg[0] == 'hello':
+                    worker = f"{msg[1]} ({worker})" if msg[1] else worker
+                    conn.send(('snapshot', self.version, self.blob))
+                elif msg[0] == 'get':
+                    conn.send(self._lease(worker))
+                elif msg[0] == 'result':
+                    if msg[3] == self.version:
+                        self._complete(msg[1], msg[2])
+                    else:
+                        self._fail(msg[1], worker, f"result for snapshot {msg[3]}, serving {self.version}")
+                elif msg[0] == 'failed':
+                    self._fail(msg[1], worker, msg[2])
+        except (EOFError, OSError):
+            pass
+        finally:
+            self._release(worker)
+            conn.close()
+
+    def _accept(self, listener):
+        n = 0
+        while True:
+            try:
+                conn = listener.accept()
+            except (OSError, EOFError):
+                return  # Listener closed
+            except Exception as e:
+                print(f"Warning: rejected a worker connection: {e}")
+                continue
+            n += 1
+            threading.Thread(target=self._serve, args=(conn, f"worker-{n}"), daemon=True).start()
+
+    def run(self, address=DIST_ADDRESS, authkey=DIST_AUTHKEY, on_ready=None):
+        """Serves shards until all are done (or abandoned, see `failed`); returns the merged (top-K) results."""
+        check_authkey(address, authkey)
+        listener = Listener(address, authkey=authkey)
+        threading.Thread(target=self._accept, args=(listener,), daemon=True).start()
+        print(f"Coordinator on {listener.address}: {len(self.shards)} shards, snapshot {self.version} "
+              f"({len(self.blob) / 1e6:.1f} MB).")
+        if on_ready:
+            on_ready(listener.address)
+        with self.cond:
+            while len(self.done) < len(self.shards):
+                self.cond.wait(timeout=1.0)
+                self._expire()
+        listener.close()
+        return self.merge()
+
+    def merge(self):
+        results = [r for shard in self.done.values() for r in shard]
+        results.sort(key=lambda x: x['financials']['profit'], reverse=True)
+        return results[:self.top_k] if self.top_k else results
+
+def run_worker(address=DIST_ADDRESS, authkey=DIST_AUTHKEY, name=None):
+    """Connects to a coordinator, loads its snapshot once and scans shards until told to stop."""
+    check_authkey(address, authkey)
+    conn = Client(address, authkey=authkey)
+    conn.send(('hello', name))
+    _, version, blob = conn.recv()
+    if snapshot_version(blob) != version:
+        conn.close()
+        raise ValueError(f"Snapshot {version} arrived corrupted.")
+    snap = pickle.loads(blob)
+    with contextlib.redirect_stdout(io.StringIO()):
+        scanner = scanner_from_snapshot(snap)
+        candidates = scanner._build_candidate_lists()
+    top_k = snap['params']['top_k']
+
+    shards = 0
+    while True:
+        try:
+            conn.send(('get',))
+            msg = conn.recv()
+        except (EOFError, OSError):
+            break  # Coordinator finished and went away
+        if msg[0] == 'done':
+            break
+        if msg[0] == 'wait':
+            time.sleep(msg[1])
+            continue
+        _, sid, groups = msg
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                results = scanner.scan(top_k=top_k, target_groups={tuple(g) for g in groups}, candidates=candidates)
+        except Exception as e:
+            conn.send(('failed', sid, f"{type(e).__name__}: {e}"))  # The coordinator decides whether to retry
+            continue
+        conn.send(('result', sid, results, version))
+        shards += 1
+    conn.close()
+    print(f"Worker {name or ''} done: {shards} shards scanned (snapshot {version}).")
+    return shards
@@ -0,0 +1,75 @@
+from bisect import bisect_right
+import numpy as np
+from .config import IRREGULAR_OUTPUT_SOURCE
+
+COND_CODES = ('FN', 'MW', 'FT', 'WW', 'BS')
+COND_BORDERS = (0.07, 0.15, 0.38, 0.45)  # get_condition_code() thresholds
+MERGE_TOL = 1e-9  # Breakpoints closer than this (adjusted float) are one jump, e.g. a table's (nextafter(b), b) pair
+
+class CollectionEV:
+    """
+    Mean gross value of a collection's outputs (one rarity, StatTrak or not)
+    as a function of the contract's average adjusted float. Output prices
+    only change at condition borders and price-table points, so the mean is
+    stored as linear segments between those breakpoints and a lookup is a
+    single binary search.
+    """
+    def __init__(self, outputs, is_st, prices_map, output_prices=None, irregular_source=IRREGULAR_OUTPUT_SOURCE):
+        self.outputs = outputs
+        self.is_st = is_st
+        self.rows = []  # per output: (min_float, span, condition prices, table xs, table ys, pdata)
+        for o in outputs:
+            pdata = prices_map.get((o['id'], is_st))
+            cond_prices = np.zeros(len(COND_CODES))
+            if pdata:
+                for j, c in enumerate(COND_CODES):
+                    use_pred = pdata['irregular'].get(c, False) and irregular_source == "predicted"
+                    cond_prices[j] = (pdata['pred_prices'] if use_pred else pdata['prices']).get(c, 0) or 0
+            xs = ys = None
+            if output_prices and cond_prices.any():
+                xs, ys = (np.asarray(v) for v in output_prices.table(o['id'], is_st))
+            self.rows.append((o['min_float'], o['max_float'] - o['min_float'], cond_prices, xs, ys, pdata))
+        self._build()
+
+    def output_values(self, i, adjs):
+        """(condition index, gross value) arrays of output i at the given average adjusted floats."""
+        s_min, span, cond_prices, xs, ys, _ = self.rows[i]
+        res_f = s_min + adjs * span
+        ci = np.searchsorted(COND_BORDERS, res_f, side='right')
+        price = cond_prices[ci]
+        if xs is None:
+            return ci, price
+        return ci, np.where(price != 0, np.interp(res_f, xs, ys), 0.0)
+
+    def _mean(self, adjs):
+        total = np.zeros(len(adjs))
+        for i in range(len(self.rows)):
+            total += self.output_values(i, adjs)[1]
+        return total / len(self.rows) if self.rows else total
+
+    def _build(self):
+        cuts = [np.array([0.0, 1.0])]
+        for s_min, span, _, xs, _, _ in self.rows:
+            if span <= 0: continue
+            points = np.concatenate([COND_BORDERS, xs]) if xs is not None else np.array(COND_BORDERS)
+            adj = (points - s_min) / span
+            cuts.append(adj[(adj > 0) & (adj < 1)])
+        bps = np.unique(np.concatenate(cuts))
+        # Keep the right end of each close group: a segment one ulp wide has no interior to sample
+        bps = np.append(bps[:-1][np.diff(bps) > MERGE_TOL], 1.0)
+        bps[0] = 0.0
+
+        # Each segment is linear: fit it from two interior samples, away from any jump
+        a, b = bps[:-1], bps[1:]
+        p, q = a + (b - a) / 3, a + 2 * (b - a) / 3
+        vp, vq = self._mean(p), self._mean(q)
+        slope = np.divide(vq - vp, q - p, out=np.zeros_like(vp), where=q > p)
+        intercept = vp - slope * p
+        self.bps = bps.tolist()
+        self.slope = slope.tolist() + [0.0]
+        self.intercept = intercept.tolist() + self._mean(np.array([1.0])).tolist()
+
+    def mean_value(self, adj):
+        i = bisect_right(self.bps, adj) - 1
+        if i < 0: i = 0
+        return self.intercept[i] + self.slope[i] * adj
@@ -0,0 +1,88 @@
+import math
+from bisect import bisect_right
+import numpy as np
+from pricing_box import PricingEngine, LIMIT_FN, LIMIT_MW, LIMIT_FT, LIMIT_WW, BARRIER_BS_TRANSITION
+from .config import RMB_TO_USD_RATE, FN_TABLE_POINTS, IRREGULAR_OUTPUT_SOURCE
+
+# Rulebook breakpoints (PricingEngine zones and the FT plateau start)
+RULE_BREAKS = (LIMIT_FN, LIMIT_MW, 0.30, LIMIT_FT, LIMIT_WW, BARRIER_BS_TRANSITION)
+BEST_QUALITY_SPAN = 0.0005
+FN_MAX_STEP = 0.08  # Max k * adjusted-float step between FN samples
+# Bound on |price() - predict_price| / predict_price: the chord of exp over one FN step is off by at most
+# (k h)^2 / 8 of its lower end; outside the FN zone the rulebook is linear between the sampled breakpoints
+TABLE_REL_ERROR = FN_MAX_STEP ** 2 / 8 * math.exp(FN_MAX_STEP)
+
+class OutputPriceTables:
+    """
+    Per-(skin, StatTrak) price curves over the real float, sampled from the
+    PricingEngine rulebook and overlaid with observed float buckets.
+    Tables are built on first use and reused for the rest of the run.
+    """
+    def __init__(self, skins, prices_map, buckets=None, engine=None, irregular_source=IRREGULAR_OUTPUT_SOURCE):
+        self.skins = skins
+        self.prices_map = prices_map
+        self.buckets = buckets or {}
+        self.engine = engine or PricingEngine()
+        self.irregular_source = irregular_source
+        self.tables = {}  # (skin_id, is_st) -> (xs, ys) as plain lists
+
+    def price(self, skin_id, is_st, real_f):
+        """Interpolated USD price of an item at an exact float."""
+        xs, ys = self.table(skin_id, is_st)
+        if real_f <= xs[0]: return ys[0]
+        if real_f >= xs[-1]: return ys[-1]
+        i = bisect_right(xs, real_f)
+        x0, x1 = xs[i - 1], xs[i]
+        return ys[i - 1] + (ys[i] - ys[i - 1]) * (real_f - x0) / (x1 - x0)
+
+    def max_price(self, skin_id, is_st):
+        return max(self.table(skin_id, is_st)[1])
+
+    def table(self, skin_id, is_st):
+        key = (skin_id, is_st)
+        if key not in self.tables:
+            self.tables[key] = self._build(skin_id, is_st)
+        return self.tables[key]
+
+    def _build(self, skin_id, is_st):
+        skin = self.skins[skin_id]
+        s_min, s_max = skin['min_float'], skin['max_float']
+        pdata = self.prices_map[(skin_id, is_st)]
+
+        # Outputs are valued at the predicted price when the condition is irregular
+        use_pred = self.irregular_source == "predicted"
+        base_prices = {}
+        for cond, price in pdata['prices'].items():
+            base_prices[cond] = pdata['pred_prices'][cond] if use_pred and pdata['irregular'].get(cond) else price
+
+        overlay = []
+        for cond, gid in pdata.get('goods_ids', {}).items():
+            if use_pred and pdata['irregular'].get(cond): continue
+            for b_min, b_max, b_price, _ in self.buckets.get(gid, []):
+                overlay.append((b_min, b_max, b_price * RMB_TO_USD_RATE))
+
+        rarity = str(skin['rarity_rank'])
+        k = self.engine.curve_params(rarity, is_st, skin_id).get("k", 0)
+
+        def exp_samples(start, end, min_points):
+            # Narrow skins stretch the exponential over their whole range: sample by curvature
+            n = max(min_points, int(np.ceil(k * (end - start) / (s_max - s_min) / FN_MAX_STEP)) + 1)
+            return np.linspace(start, end, n).tolist()
+
+        points = {s_min, s_max}
+        for b in RULE_BREAKS + tuple(e for o in overlay for e in o[:2]):
+            if s_min < b <= s_max:  # A break at s_max still needs its left limit
+                points.update((math.nextafter(b, 0.0), b))
+        if s_min < LIMIT_FN:
+            points.update(exp_samples(s_min, math.nextafter(min(LIMIT_FN, s_max), 0.0), FN_TABLE_POINTS))
+        best_end = s_min + BEST_QUALITY_SPAN  # Rule 0 is inclusive, so the jump sits right after it
+        points.update(exp_samples(s_min, min(best_end, s_max), 8))
+        points.add(math.nextafter(best_end, 1.0))
+        xs = sorted(p for p in points if s_min <= p <= s_max)
+
+        ys = [self.engine.predict_price(x, s_min, s_max, base_prices, rarity, is_st, skin_id) for x in xs]
+        for b_min, b_max, b_price in overlay:
+            for i, x in enumerate(xs):
+                if b_min <= x < b_max:
+                    ys[i] = b_price
+        return xs, ys
@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+from .buckets import parse_buckets
+from .config import RMB_TO_USD_RATE, METADATA_BATCH_ROWS
+from .curves import BASE_BUCKET_MIN
+from .metadata import iter_json_records
+from .utils import parse_market_name
+
+HEADERS = {
+    'ratio': ("# Analyse des Ratios de Prix par Float (USD - Direct) 📈\n\n"
+              "Ce rapport présente l'augmentation du prix en USD (directement depuis les buckets) et l'ajustement réel.\n\n"),
+    'mmw': ("# Analyse des Ratios MMW approfondie 📈\n\n"
+            "Ce rapport compare les tranches de la condition MMW avec le prix de la meilleure qualité (FN) "
+            "et le prix plancher de la condition.\n\n"),
+}
+SECTION_END = "\n---\n\n"
+# Cached aggregates keep the dumps' RMB prices. The FN report prints them as-is ("Direct", as it always has);
+# the MMW report converts every price, FN reference included, to USD when rendering
+RENDER_RATE = {'ratio': 1.0, 'mmw': RMB_TO_USD_RATE}
+
+CACHE_UPSERT = '''
+    INSERT INTO float_report_cache (source, goods_id, bucket_hash, skin_id, is_stattrak, condition, floor_price,
+                                    aggregate, reference_price, section, entry, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, NULL, NULL, NULL, ?)
+    ON CONFLICT(source, goods_id) DO UPDATE SET
+        bucket_hash = excluded.bucket_hash, skin_id = excluded.skin_id, is_stattrak = excluded.is_stattrak,
+        condition = excluded.condition, floor_price = excluded.floor_price, aggregate = excluded.aggregate,
+        reference_price = NULL, section = NULL, entry = NULL, updated_at = excluded.updated_at
+'''
+
+def load_goods_ranges(conn):
+    """
+    (goods_id -> skin, base name -> skin) lookups of the skins' float ranges,
+    a skin being (skin_id, is_stattrak, condition, min_float, max_float).
+    """
+    by_goods = {row['goods_id']: tuple(row)[1:] for row in conn.execute('''
+        SELECT p.goods_id, p.skin_id, p.is_stattrak, p.condition, s.min_float, s.max_float
+        FROM prices p JOIN skins s ON s.id = p.skin_id
+        WHERE p.goods_id IS NOT NULL AND s.min_float IS NOT NULL AND s.max_float IS NOT NULL
+    ''')}
+    by_name = {row['market_hash_name']: (row['id'], row['min_float'], row['max_float'])
+               for row in conn.execute("SELECT id, market_hash_name, min_float, max_float FROM skins "
+                                       "WHERE min_float IS NOT NULL AND max_float IS NOT NULL")}
+    return by_goods, by_name
+
+def goods_skin(item, by_goods, by_name):
+    """Skin of a Buff goods: through its `prices` row, else its market name."""
+    skin = by_goods.get(item.get('goods_id'))
+    if skin is not None:
+        return skin
+    base, cond, is_st = parse_market_name(item.get('market_hash_name') or "")
+    if base not in by_name:
+        return None
+    sid, min_f, max_f = by_name[base]
+    return sid, is_st, cond, min_f, max_f
+
+def bucket_hash(item, skin):
+    """Fingerprint of everything an aggregate depends on: name, buckets, liquidity and the skin float range."""
+    sales = sorted((json.dumps(s, sort_keys=True) for s in item.get('sales', [])))
+    payload = json.dumps([item.get('market_hash_name'), sales, list(skin)])
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+def aggregate(item, skin):
+    """
+    Report aggregate of one goods: its buckets with their adjusted-float range
+    (position inside the skin range) and price ratio to the base bucket
+    (0.04 bucket, else the cheapest), plus its liquidity.
+    """
+    sid, is_st, cond, min_f, max_f = skin
+    buckets = parse_buckets(item.get('sales', []))
+    summary = next((s for s in item.get('sales', []) if 'min_float' not in s), {})
+    prices = [b[2] for b in buckets]
+    base_idx = next((i for i, b in enumerate(buckets) if b[0] == BASE_BUCKET_MIN and b[2] > 0), prices.index(min(prices)))
+    base = prices[base_idx]
+    span = (max_f - min_f) or 1.0
+    rows = []
+    for i, (b_min, b_max, price, sell_num) in enumerate(buckets):
+        rows.append({'min_float': b_min, 'max_float': b_max,
+                     'adj_min': (b_min - min_f) / span, 'adj_max': (b_max - min_f) / span,
+                     'price': price, 'ratio': price / base if base > 0 else None,
+                     'is_base': i == base_idx,
+                     'sell_num': sell_num})
+    return {'goods_id': item['goods_id'], 'market_hash_name': item.get('market_hash_name'), 'skin_id': sid,
+            'is_stattrak': is_st, 'condition': cond, 'min_float': min_f, 'max_float': max_f,
+            'base_price': base, 'floor_price': min(prices),
+            'liquidity': sum(b[3] for b in buckets), 'liquidity_rank': summary.get('liquidity_rank'),
+            'buckets': rows}
+
+def _ratio(x):
+    return "-" if x is None else f"{x:.2f}x"
+
+def render_section(kind, agg, reference=None):
+    """Markdown section of one goods (without the trailing separator); `reference` is the RMB FN price."""
+    rate = RENDER_RATE[kind]
+    lines = [f"## {agg['market_hash_name']} (ID: `{agg['goods_id']}`)"]
+    if kind == 'mmw':
+        best = "-" if reference is None else f"${reference * rate:.2f}"
+        lines.append(f"**Meilleure Qualité (FN)** : **{best}** | **Base MMW** : **${agg['floor_price'] * rate:.2f}**")
+    lines += [f"**Range Total Skin** : {agg['min_float']} - {agg['max_float']}", ""]
+    if kind == 'mmw':
+        lines += ["| Bucket | Real Bucket (Adj) | Prix (USD) | Ratio / Best | Ratio / Base |",
+                  "| :--- | :--- | :--- | :--- | :--- |"]
+    else:
+        lines += ["| Bucket | Real Bucket (Adj) | Prix (USD) | Ratio | Liquidité |",
+                  "| :--- | :--- | :--- | :--- | :--- |"]
+    floor = agg['floor_price']
+    for b in agg['buckets']:
+        cells = [f"{b['min_float']} - {b['max_float']}", f"{b['adj_min']:.3f} - {b['adj_max']:.3f}", f"**${b['price'] * rate:.2f}**"]
+        if kind == 'mmw':
+            cells += [_ratio(b['price'] / reference if reference else None), _ratio(b['price'] / floor if floor > 0 else None)]
+        else:
+            cells += [_ratio(b['ratio']) + (" (Base)" if b['is_base'] else ""), str(b['sell_num'])]
+        lines.append("| " + " | ".join(cells) + " |")
+    return "\n".join(lines) + "\n"
+
+def refresh_cache(conn, kind, path, batch_rows=METADATA_BATCH_ROWS):
+    """
+    Streams one bucket dump into `float_report_cache`: only goods whose hash
+    changed are re-aggregated (and their section invalidated), goods gone from
+    the dump are dropped. Returns (goods read, recomputed, removed, skipped).
+    """
+    by_goods, by_name = load_goods_ranges(conn)
+    cached = dict(conn.execute("SELECT goods_id, bucket_hash FROM float_report_cache WHERE source = ?", (kind,)).fetchall())
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    seen, rows = set(), []
+    read = recomputed = skipped = 0
+
+    for item in iter_json_records(path, array_key='info'):
+        read += 1
+        skin = goods_skin(item, by_goods, by_name) if isinstance(item, dict) else None
+        if skin is None or not parse_buckets(item.get('sales', [])):
+            skipped += 1  # Unknown skin float range or no bucket
+            continue
+        gid = item['goods_id']
+        seen.add(gid)
+        h = bucket_hash(item, skin)
+        if cached.get(gid) == h:
+            continue
+        agg = aggregate(item, skin)
+        rows.append((kind, gid, h, agg['skin_id'], agg['is_stattrak'], agg['condition'], agg['floor_price'], json.dumps(agg), now))
+        recomputed += 1
+        if len(rows) >= batch_rows:
+            conn.executemany(CACHE_UPSERT, rows)
+            rows.clear()
+    conn.executemany(CACHE_UPSERT, rows)
+
+    gone = [gid for gid in cached if gid not in seen]
+    conn.execute("DELETE FROM float_report_cache WHERE source = ? AND goods_id IN (SELECT value FROM json_each(?))",
+                 (kind, json.dumps(gone)))
+    conn.commit()
+    return read, recomputed, len(gone), skipped
+
+def fn_references(conn):
+    """
+    (skin_id, is_stattrak) -> best quality (FN) RMB price: floor of the cached
+    FN buckets, else the FN market price of `prices`.
+    """
+    refs = {(row['skin_id'], row['is_stattrak']): row['price'] for row in conn.execute(
+        "SELECT skin_id, is_stattrak, MIN(price) AS price FROM prices WHERE condition = 'FN' AND price > 0 "
+        "GROUP BY skin_id, is_stattrak")}
+    refs.update({(row['skin_id'], row['is_stattrak']): row['price'] for row in conn.execute(
+        "SELECT skin_id, is_stattrak, MIN(floor_price) AS price FROM float_report_cache "
+        "WHERE source = 'ratio' AND condition = 'FN' GROUP BY skin_id, is_stattrak")})
+    return refs
+
+def render_report(conn, kind):
+    """
+    (Markdown, JSON) report of one source from the cache. Only sections left
+    empty by refresh_cache() (or whose FN reference moved) are rendered again.
+    Returns (markdown, json text, sections rendered).
+    """
+    refs = fn_references(conn) if kind == 'mmw' else {}
+    rows = conn.execute("SELECT goods_id, skin_id, is_stattrak, reference_price, section, entry FROM float_report_cache "
+                        "WHERE source = ? ORDER BY goods_id", (kind,)).fetchall()
+    sections, entries, updates = [], [], []
+    for row in rows:
+        section, entry = row['section'], row['entry']
+        ref = refs.get((row['skin_id'], row['is_stattrak'])) if kind == 'mmw' else None
+        if section is None or ref != row['reference_price']:
+            agg = json.loads(conn.execute("SELECT aggregate FROM float_report_cache WHERE source = ? AND goods_id = ?",
+                                          (kind, row['goods_id'])).fetchone()[0])
+            if kind == 'mmw':
+                agg['reference_price'] = ref
+            section, entry = render_section(kind, agg, ref), json.dumps(agg)
+            updates.append((ref, section, entry, kind, row['goods_id']))
+        sections.append(section)
+        entries.append(entry)
+    conn.executemany("UPDATE float_report_cache SET reference_price = ?, section = ?, entry = ? "
+                     "WHERE source = ? AND goods_id = ?", updates)
+    conn.commit()
+    markdown = HEADERS[kind] + "".join(s + SECTION_END for s in sections)
+    return markdown, "[\n" + ",\n".join(entries) + "\n]\n", len(updates)
+
+def write_report(conn, kind, md_path, json_path):
+    markdown, entries, rendered = render_report(conn, kind)
+    for path, text in ((md_path, markdown), (json_path, entries)):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding='utf-8') as f:
+            f.write(text)
+    return rendered
@@ -0,0 +1,111 @@
+from .config import RMB_TO_USD_RATE
+from .utils import parse_market_name
+
+PRICE_COLUMNS = ('skin_id', 'condition', 'is_stattrak', 'price', 'sell_num', 'goods_id', 'updated_at',
+                 'predicted_price', 'irregular')
+PRICE_UPSERT = f"INSERT OR REPLACE INTO prices ({', '.join(PRICE_COLUMNS)}) VALUES ({', '.join('?' * len(PRICE_COLUMNS))})"
+HISTORY_INSERT = "INSERT INTO price_history (skin_id, condition, is_stattrak, price, recorded_at) VALUES (?, ?, ?, ?, ?)"
+
+class ChangeSet:
+    """
+    (skin_id, condition, is_stattrak) keys changed by one import, published
+    to the stages downstream of it.
+    """
+    def __init__(self):
+        self.rows = set()  # New keys or any changed listing column: the prices row must be written
+        self.prices = {}  # key -> new RMB price, when the price itself changed (one price_history entry)
+
+    def __len__(self):
+        return len(self.rows)
+
+class MarketModel:
+    """
+    In-memory copy of collections, skins and current prices (RMB, `prices`
+    table columns) shared by the import, sanitizer and scanner stages.
+    """
+    def __init__(self):
+        self.collections = {}
+        self.skins = {}
+        self.name_to_id = {}
+        self.prices = {}  # (skin_id, condition, is_stattrak) -> row dict
+
+    @classmethod
+    def load(cls, conn):
+        model = cls()
+        model.collections = {row['id']: row['name'] for row in conn.execute("SELECT id, name FROM collections")}
+        model.skins = {row['id']: dict(row) for row in conn.execute("SELECT * FROM skins")}
+        model.name_to_id = {s['market_hash_name']: sid for sid, s in model.skins.items()}
+        for row in conn.execute("SELECT * FROM prices"):
+            model.prices[(row['skin_id'], row['condition'], row['is_stattrak'])] = dict(row)
+        return model
+
+    def apply_market_items(self, items, now):
+        """Applies a Buff goods list; returns the ChangeSet against the stored rows (unchanged items are skipped)."""
+        changes = ChangeSet()
+        for item in items:
+            base_name, cond, st = parse_market_name(item['market_hash_name'])
+            if not base_name: continue
+            skin_id = self.name_to_id.get(base_name)
+            if skin_id is None: continue
+
+            key = (skin_id, cond, st)
+            price = float(item.get('sell_min_price', 0))
+            sell_num = item.get('sell_num', 0)
+            row = self.prices.get(key)
+            if row is None or row['goods_id'] != item['goods_id']:
+                row = self.prices[key] = dict.fromkeys(PRICE_COLUMNS)
+                row.update(skin_id=skin_id, condition=cond, is_stattrak=st, irregular=0)
+            elif row['price'] == price and row['sell_num'] == sell_num:
+                continue
+            if row['price'] != price:
+                changes.prices[key] = price
+            row.update(price=price, sell_num=sell_num, goods_id=item['goods_id'], updated_at=now)
+            changes.rows.add(key)
+        return changes
+
+    def usd_prices(self):
+        """(skin_id, condition, is_st) -> USD price, as PriceSanitizer.load_snapshot expects."""
+        return {k: r['price'] * RMB_TO_USD_RATE for k, r in self.prices.items() if r['skin_id'] in self.skins}
+
+    def apply_sanitizer(self, predictions, irregular):
+        """
+        predictions: key -> RMB predicted price; irregular: set of flagged keys (all others are cleared).
+        Returns the keys whose predicted price or irregular flag changed.
+        """
+        changed = set()
+        for key, row in self.prices.items():
+            predicted = predictions.get(key, row['predicted_price'])
+            flag = int(key in irregular)
+            if predicted != row['predicted_price'] or flag != row['irregular']:
+                row['predicted_price'], row['irregular'] = predicted, flag
+                changed.add(key)
+        return changed
+
+    def price_rows(self, keys=None):
+        return self.prices.values() if keys is None else [self.prices[k] for k in keys]
+
+    def row_values(self, keys):
+        """Parameter tuples for PRICE_UPSERT."""
+        return [tuple(self.prices[k][c] for c in PRICE_COLUMNS) for k in keys]
+
+def sanitize_market(sanitizer, jumps=()):
+    """
+    Runs anomaly detection on a loaded sanitizer and merges JUMP anomalies.
+    Returns (predictions key -> RMB, irregular key set, anomalies).
+    """
+    anomalies = sanitizer.detect_anomalies()
+    flagged = {(a['skin'], a['condition'], a['is_stattrak']) for a in anomalies}
+    anomalies += [j for j in jumps if (j['skin'], j['condition'], j['is_stattrak']) not in flagged]
+
+    predictions = {}
+    for (skin_id, cond, is_st) in sanitizer.prices:
+        predicted = sanitizer.get_predicted_price(skin_id, cond, is_st)
+        if predicted:
+            predictions[(skin_id, cond, is_st)] = round(predicted / RMB_TO_USD_RATE, 2)
+
+    name_to_id = {v['market_hash_name']: k for k, v in sanitizer.skins.items()}
+    irregular = set()
+    for a in anomalies:
+        sid = name_to_id.get(a['skin'])
+        if sid: irregular.add((sid, a['condition'], 1 if a['is_stattrak'] else 0))
+    return predictions, irregular, anomalies
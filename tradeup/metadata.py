@@ -0,0 +1,182 @@
+import json
+import re
+from datetime import datetime
+from .config import METADATA_CHUNK_BYTES, METADATA_BATCH_ROWS
+
+SKIN_COLUMNS = ('id', 'market_hash_name', 'collection_id', 'rarity_rank', 'min_float', 'max_float', 'image_url')
+SKIN_UPSERT = (f"INSERT INTO skins ({', '.join(SKIN_COLUMNS)}) VALUES ({', '.join('?' * len(SKIN_COLUMNS))}) "
+               f"ON CONFLICT(id) DO UPDATE SET {', '.join(f'{c} = excluded.{c}' for c in SKIN_COLUMNS[1:])}")
+COLLECTION_UPSERT = "INSERT INTO collections (id, name) VALUES (?, ?) ON CONFLICT(id) DO UPDATE SET name = excluded.name"
+CHANGE_INSERT = "INSERT INTO metadata_changes (changed_at, kind, item_id, field, old_value, new_value) VALUES (?, ?, ?, ?, ?, ?)"
+
+# Fields that change which skins a (collection, rarity) contract can output, or at which float
+OUTPUT_FIELDS = ('collection_id', 'rarity_rank', 'min_float', 'max_float')
+
+# rarity_rank convention of the `skins` table (Consumer = 1 ... Covert = 6)
+RARITY_RANKS = {
+    'common': 1, 'consumer grade': 1, 'uncommon': 2, 'industrial grade': 2, 'rare': 3, 'mil-spec grade': 3,
+    'mil-spec': 3, 'mythical': 4, 'restricted': 4, 'legendary': 5, 'classified': 5, 'ancient': 6, 'covert': 6,
+    'extraordinary': 6, 'contraband': 7,
+}
+
+def rarity_rank(value):
+    """rarity_rank of a dump rarity: an int, a name ("Mil-Spec Grade"), an id ("rarity_rare_weapon") or a {id, name} dict."""
+    if isinstance(value, dict):
+        return rarity_rank(value.get('id')) or rarity_rank(value.get('name'))
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, int):
+        return value
+    key = str(value).lower()
+    if key.isdigit():
+        return int(key)
+    if key.startswith('rarity_'):
+        key = key[len('rarity_'):].rsplit('_weapon', 1)[0].rsplit('_character', 1)[0]
+    return RARITY_RANKS.get(key)
+
+def iter_json_records(path, chunk_size=METADATA_CHUNK_BYTES, array_key=None):
+    """
+    Yields the objects of a JSON array or NDJSON file (or of the `array_key`
+    array of a JSON object), reading it in chunks instead of loading it whole.
+    """
+    decoder = json.JSONDecoder()
+    separators = " \t\r\n," if array_key else " \t\r\n,[]"
+    start = re.compile(r'"%s"\s*:\s*\[' % re.escape(array_key)) if array_key else None
+    with open(path, "r", encoding='utf-8') as f:
+        buf = ""
+        while True:
+            chunk = f.read(chunk_size)
+            buf += chunk
+            pos = 0
+            if start:
+                m = start.search(buf)
+                if m is None:
+                    if not chunk: return
+                    buf = buf[-len(array_key) - 64:]  # Key may straddle the chunk boundary
+                    continue
+                start, pos = None, m.end()
+            while True:
+                while pos < len(buf) and buf[pos] in separators:
+                    pos += 1
+                if pos == len(buf):
+                    break
+                if array_key and buf[pos] == ']':
+                    return
+                try:
+                    obj, pos_end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if not chunk: raise
+                    break  # Record cut by the chunk boundary: read more
+                yield obj
+                pos = pos_end
+            buf = buf[pos:]
+            if not chunk:
+                return
+
+def normalize_record(rec):
+    """
+    (skin row, (collection_id, name)) of a dump record, or None for items
+    that cannot be in a contract (no collection, rarity or float range).
+    Accepts CSGO-API style records (`name`, `collections`, `rarity`,
+    `image`) and flat `skins` rows (`market_hash_name`, `collection_id`,
+    `collection`, `rarity_rank`, `image_url`).
+    """
+    cols = rec.get('collections')
+    if cols:
+        col_id, col_name = cols[0].get('id'), cols[0].get('name')
+    else:
+        col_id, col_name = rec.get('collection_id'), rec.get('collection') or rec.get('collection_name')
+    name = rec.get('market_hash_name') or rec.get('name')
+    rank = rarity_rank(rec.get('rarity_rank', rec.get('rarity')))
+    min_f, max_f = rec.get('min_float'), rec.get('max_float')
+    if not rec.get('id') or not name or not col_id or rank is None or min_f is None or max_f is None:
+        return None
+    row = {'id': rec['id'], 'market_hash_name': name, 'collection_id': col_id, 'rarity_rank': rank,
+           'min_float': float(min_f), 'max_float': float(max_f), 'image_url': rec.get('image_url') or rec.get('image') or ''}
+    return row, (col_id, col_name)
+
+class MetadataChanges:
+    """
+    Catalog changes of one metadata import. `outputs` lists the (collection,
+    rarity) groups whose skins or float ranges changed: only the contracts
+    one rarity below them need their outputs rebuilt.
+    """
+    def __init__(self):
+        self.skins = {}  # skin_id -> new row, for new or changed skins
+        self.fields = {}  # skin_id -> changed columns ('new' for inserts)
+        self.collections = {}  # collection_id -> name, for new or renamed collections
+        self.outputs = set()  # (collection_id, rarity_rank)
+        self.float_ranges = set()  # skin ids whose float range changed
+
+    def __len__(self):
+        return len(self.skins) + len(self.collections)
+
+    def add_skin(self, row, old=None):
+        sid = row['id']
+        fields = ['new'] if old is None else [c for c in SKIN_COLUMNS[1:] if old[c] != row[c]]
+        if not fields:
+            return []
+        self.skins[sid] = row
+        self.fields.setdefault(sid, set()).update(fields)
+        if old is None or any(c in OUTPUT_FIELDS for c in fields):
+            self.outputs.add((row['collection_id'], row['rarity_rank']))
+            if old is not None:
+                self.outputs.add((old['collection_id'], old['rarity_rank']))
+        if old is not None and ('min_float' in fields or 'max_float' in fields):
+            self.float_ranges.add(sid)
+        return fields
+
+def load_catalog(conn):
+    skins = {row['id']: dict(row, image_url=row['image_url'] or '')
+             for row in conn.execute(f"SELECT {', '.join(SKIN_COLUMNS)} FROM skins")}
+    collections = {row['id']: row['name'] for row in conn.execute("SELECT id, name FROM collections")}
+    return skins, collections
+
+def ingest_metadata(conn, path, batch_rows=METADATA_BATCH_ROWS):
+    """
+    Streams a skin metadata dump into `skins` / `collections`. Only new or
+    changed rows are upserted (in batches) and every changed field is logged
+    to `metadata_changes`. Returns (MetadataChanges, records read, records skipped).
+    """
+    skins, collections = load_catalog(conn)
+    changes = MetadataChanges()
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    rows, cols, log = [], [], []
+    read = skipped = 0
+
+    def flush():
+        conn.executemany(COLLECTION_UPSERT, cols)  # Before the skins that reference them
+        conn.executemany(SKIN_UPSERT, [tuple(r[c] for c in SKIN_COLUMNS) for r in rows])
+        conn.executemany(CHANGE_INSERT, log)
+        rows.clear()
+        cols.clear()
+        log.clear()
+
+    for rec in iter_json_records(path):
+        read += 1
+        item = normalize_record(rec) if isinstance(rec, dict) else None
+        if item is None:
+            skipped += 1
+            continue
+        row, (col_id, col_name) = item
+        if col_id not in collections or (col_name and collections[col_id] != col_name):
+            col_name = col_name or col_id  # Scan results need a name for every collection
+            log.append((now, 'collection', col_id, 'new' if col_id not in collections else 'name', collections.get(col_id), col_name))
+            collections[col_id] = changes.collections[col_id] = col_name
+            cols.append((col_id, col_name))
+
+        old = skins.get(row['id'])
+        fields = changes.add_skin(row, old)
+        if not fields:
+            continue
+        if old is None:
+            log.append((now, 'skin', row['id'], 'new', None, row['market_hash_name']))
+        else:
+            log.extend((now, 'skin', row['id'], c, old[c], row[c]) for c in fields)
+        skins[row['id']] = row
+        rows.append(row)
+        if len(rows) >= batch_rows:
+            flush()
+    flush()
+    conn.commit()
+    return changes, read, skipped
@@ -0,0 +1,278 @@
+import json
+import math
+import os
+from bisect import insort, bisect_left, bisect_right
+from collections.abc import Mapping
+from datetime import datetime
+from .config import (
+    RMB_TO_USD_RATE, MIN_SAMPLES_FOR_STATS, OUTLIER_SIGMA, ONLINE_STATS_PATH,
+    JUMP_HALF_LIFE_HOURS, JUMP_MIN_RATIO, JUMP_NOISE_FLOOR
+)
+
+class RunningMoments:
+    """Welford running mean/variance supporting removals (population std, like np.std)."""
+    __slots__ = ('n', 'mean', 'm2')
+
+    def __init__(self, n=0, mean=0.0, m2=0.0):
+        self.n, self.mean, self.m2 = n, mean, m2
+
+    def add(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    def remove(self, x):
+        if self.n <= 1:
+            self.n, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        delta = x - self.mean
+        self.mean -= delta / (self.n - 1)
+        self.m2 -= delta * (x - self.mean)
+        self.n -= 1
+
+    def std(self):
+        return math.sqrt(max(self.m2, 0.0) / self.n) if self.n else 0.0
+
+class P2Quantile:
+    """Jain & Chlamtac P² streaming quantile estimator (five markers, O(1) per update)."""
+    __slots__ = ('p', 'q', 'pos', 'desired', 'count')
+
+    def __init__(self, p=0.5):
+        self.p = p
+        self.q = []
+        self.pos = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.count = 0
+
+    def add(self, x):
+        self.count += 1
+        if self.count <= 5:
+            insort(self.q, x)
+            return
+        q, pos = self.q, self.pos
+        if x < q[0]:
+            q[0], k = x, 0
+        elif x >= q[4]:
+            q[4], k = x, 3
+        else:
+            k = bisect_right(q, x) - 1
+        for i in range(k + 1, 5):
+            pos[i] += 1
+        incr = (0, self.p / 2, self.p, (1 + self.p) / 2, 1)
+        self.desired = [d + inc for d, inc in zip(self.desired, incr)]
+
+        for i in (1, 2, 3):
+            d = self.desired[i] - pos[i]
+            if (d >= 1 and pos[i + 1] - pos[i] > 1) or (d <= -1 and pos[i - 1] - pos[i] < -1):
+                s = 1 if d > 0 else -1
+                qp = q[i] + s / (pos[i + 1] - pos[i - 1]) * (
+                    (pos[i] - pos[i - 1] + s) * (q[i + 1] - q[i]) / (pos[i + 1] - pos[i])
+                    + (pos[i + 1] - pos[i] - s) * (q[i] - q[i - 1]) / (pos[i] - pos[i - 1]))
+                if not q[i - 1] < qp < q[i + 1]:
+                    qp = q[i] + s * (q[i + s] - q[i]) / (pos[i + s] - pos[i])
+                q[i] = qp
+                pos[i] += s
+
+    def value(self):
+        if not self.q: return None
+        if self.count <= 5:
+            return self.q[min(len(self.q) - 1, int(round(self.p * (len(self.q) - 1))))]
+        return self.q[2]
+
+class GroupStats:
+    """
+    Current prices of one (collection, rarity, StatTrak) group: moments plus a
+    sorted multiset for the median. A price change removes the key's old
+    price, which a streaming sketch such as P² cannot do; groups hold a few
+    dozen skins at most, so the exact median stays cheap and matches
+    build_collection_stats.
+    """
+    __slots__ = ('moments', 'values')
+
+    def __init__(self):
+        self.moments = RunningMoments()
+        self.values = []
+
+    def add(self, x):
+        self.moments.add(x)
+        insort(self.values, x)
+
+    def remove(self, x):
+        self.moments.remove(x)
+        del self.values[bisect_left(self.values, x)]
+
+    def median(self):
+        v, n = self.values, len(self.values)
+        return v[n // 2] if n % 2 else (v[n // 2 - 1] + v[n // 2]) / 2
+
+class KeyBaseline:
+    """Time-decayed baseline of one price key: EW mean/variance of log price plus a P² median."""
+    __slots__ = ('n', 'ew_mean', 'ew_var', 'last_ts', 'median')
+
+    def __init__(self):
+        self.n, self.ew_mean, self.ew_var, self.last_ts = 0, 0.0, 0.0, None
+        self.median = P2Quantile(0.5)
+
+    def score(self, log_price):
+        """Z-score of a new log price against the baseline (noise floor avoids flat-history blowups)."""
+        return abs(log_price - self.ew_mean) / math.sqrt(self.ew_var + JUMP_NOISE_FLOOR ** 2)
+
+    def update(self, log_price, ts):
+        if self.n == 0:
+            self.ew_mean = log_price
+        else:
+            dt_hours = max(0.0, (ts - self.last_ts) / 3600.0)
+            alpha = 1 - 0.5 ** (dt_hours / JUMP_HALF_LIFE_HOURS) if dt_hours > 0 else 1 / (self.n + 1)
+            diff = log_price - self.ew_mean
+            incr = alpha * diff
+            self.ew_mean += incr
+            self.ew_var = (1 - alpha) * (self.ew_var + diff * incr)
+        self.n += 1
+        self.last_ts = ts
+        self.median.add(math.exp(log_price))
+
+class CollectionStatsView(Mapping):
+    """Read-only {'median', 'std'} view (USD) over the engine groups, as used by PriceSanitizer."""
+    def __init__(self, engine):
+        self.engine = engine
+
+    def __getitem__(self, key):
+        g = self.engine.groups.get(key)
+        if g is None or len(g.values) < MIN_SAMPLES_FOR_STATS:
+            raise KeyError(key)
+        return {'median': g.median() * RMB_TO_USD_RATE, 'std': g.moments.std() * RMB_TO_USD_RATE}
+
+    def __iter__(self):
+        return (k for k, g in self.engine.groups.items() if len(g.values) >= MIN_SAMPLES_FOR_STATS)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+def _to_epoch(ts):
+    if isinstance(ts, (int, float)): return float(ts)
+    return datetime.strptime(ts, '%Y-%m-%d %H:%M:%S').timestamp()
+
+class OnlineStatsEngine:
+    """
+    Incremental price statistics fed by price_history rows (prices in RMB).
+    Keeps per-group current-price moments/medians and per-key time baselines,
+    and remembers the last history id so each run only reads the new rows.
+    """
+    def __init__(self, skins):
+        self.skins = skins
+        self.groups = {}  # (collection_id, rarity, is_st) -> GroupStats
+        self.baselines = {}  # (skin_id, cond, is_st) -> KeyBaseline
+        self.current = {}  # (skin_id, cond, is_st) -> current price
+        self.jumps = {}  # (skin_id, cond, is_st) -> JUMP anomaly, active until the key's next observation
+        self.last_history_id = 0
+
+    def collection_stats(self):
+        return CollectionStatsView(self)
+
+    def apply(self, skin_id, cond, is_st, price, ts):
+        """
+        Applies one observation; returns a JUMP anomaly dict when it breaks from the baseline.
+        A missing or non-positive price takes the key out of its group, as in build_collection_stats.
+        """
+        skin = self.skins.get(skin_id)
+        if skin is None:
+            return None
+        key = (skin_id, cond, is_st)
+
+        group_key = (skin['collection_id'], skin['rarity_rank'], is_st)
+        group = self.groups.get(group_key)
+        if group is None:
+            group = self.groups[group_key] = GroupStats()
+        old = self.current.pop(key, None)
+        if old is not None:
+            group.remove(old)
+        if price is None or price <= 0:
+            self.jumps.pop(key, None)
+            return None
+        group.add(price)
+        self.current[key] = price
+
+        base = self.baselines.get(key)
+        if base is None:
+            base = self.baselines[key] = KeyBaseline()
+        log_p = math.log(price)
+        anomaly = None
+        if base.n >= MIN_SAMPLES_FOR_STATS:
+            z = base.score(log_p)
+            ratio = price / math.exp(base.ew_mean)
+            if z > OUTLIER_SIGMA and max(ratio, 1 / ratio) > JUMP_MIN_RATIO:
+                median = base.median.value()
+                anomaly = {
+                    "skin": skin['market_hash_name'], "condition": cond, "is_stattrak": bool(is_st),
+                    "actual": round(price * RMB_TO_USD_RATE, 2),
+                    "predicted": round(median * RMB_TO_USD_RATE, 2),
+                    "ratio": round(price / median, 2), "z_score": round(z, 2),
+                    "reason": "JUMP"
+                }
+        base.update(log_p, _to_epoch(ts))
+        if anomaly:
+            self.jumps[key] = anomaly
+        else:
+            self.jumps.pop(key, None)
+        return anomaly
+
+    def ingest_history(self, conn, skip=None):
+        """
+        Reads price_history rows newer than the watermark; returns the active JUMP anomalies.
+        History only records price changes, so a jump stays active until the key's price moves again.
+        skip is an (after, last) id range already applied in memory: those rows only move the watermark.
+        """
+        rows = conn.execute(
+            "SELECT id, skin_id, condition, is_stattrak, price, recorded_at FROM price_history WHERE id > ? ORDER BY id",
+            (self.last_history_id,))
+        count = 0
+        for row in rows:
+            self.last_history_id = row[0]
+            if skip and skip[0] < row[0] <= skip[1]:
+                continue
+            self.apply(row[1], row[2], row[3], row[4], row[5])
+            count += 1
+        print(f"Online stats: ingested {count} history rows into {len(self.groups)} groups.")
+        return list(self.jumps.values())
+
+    def save(self, path=ONLINE_STATS_PATH):
+        state = {
+            "last_history_id": self.last_history_id,
+            "keys": [
+                [sid, cond, st, self.current.get((sid, cond, st)), b.n, b.ew_mean, b.ew_var, b.last_ts,
+                 [b.median.q, b.median.pos, b.median.desired, b.median.count]]
+                for (sid, cond, st), b in self.baselines.items()
+            ],
+            "jumps": [[*key, anomaly] for key, anomaly in self.jumps.items()]
+        }
+        with open(path, "w") as f:
+            json.dump(state, f)
+
+    @classmethod
+    def load(cls, skins, path=ONLINE_STATS_PATH):
+        """Restores a saved engine; groups are rebuilt from the stored current prices."""
+        engine = cls(skins)
+        if not os.path.exists(path):
+            return engine
+        try:
+            with open(path, "r") as f:
+                state = json.load(f)
+        except Exception as e:
+            print(f"Warning: Failed to load online stats, starting over: {e}")
+            return engine
+
+        engine.last_history_id = state.get("last_history_id", 0)
+        for sid, cond, st, current, n, ew_mean, ew_var, last_ts, (q, pos, desired, count) in state.get("keys", []):
+            key = (sid, cond, st)
+            b = KeyBaseline()
+            b.n, b.ew_mean, b.ew_var, b.last_ts = n, ew_mean, ew_var, last_ts
+            b.median.q, b.median.pos, b.median.desired, b.median.count = q, pos, desired, count
+            engine.baselines[key] = b
+            skin = skins.get(sid)
+            if current is not None and skin is not None:
+                engine.current[key] = current
+                group_key = (skin['collection_id'], skin['rarity_rank'], st)
+                engine.groups.setdefault(group_key, GroupStats()).add(current)
+        engine.jumps = {(sid, cond, st): anomaly for sid, cond, st, anomaly in state.get("jumps", [])}
+        return engine
@@ -0,0 +1,82 @@
+from bisect import bisect_left, bisect_right
+from .config import RMB_TO_USD_RATE
+
+class _GoodsBook:
+    """Float-sorted buckets of one goods_id, with price-sorted cumulative levels per prefix."""
+    __slots__ = ('buckets', 'caps', 'levels')
+
+    def __init__(self, buckets):
+        self.buckets = sorted(buckets, key=lambda b: b[1])
+        self.caps = [b[1] for b in self.buckets]
+        # levels[k] = (prices, cum_n, cum_cost) over the k buckets with the lowest max_float
+        self.levels = []
+        for k in range(len(self.buckets) + 1):
+            prefix = sorted((b[2], b[3]) for b in self.buckets[:k] if b[3] > 0)
+            prices, cum_n, cum_cost = [], [0], [0.0]
+            for price, count in prefix:
+                prices.append(price)
+                cum_n.append(cum_n[-1] + count)
+                cum_cost.append(cum_cost[-1] + count * price)
+            self.levels.append((prices, cum_n, cum_cost))
+
+    @staticmethod
+    def _prefix_cost(level, m):
+        prices, cum_n, cum_cost = level
+        if m <= 0: return 0.0
+        i = bisect_left(cum_n, m)
+        return cum_cost[i - 1] + (m - cum_n[i - 1]) * prices[i - 1]
+
+    def query(self, n, max_float):
+        """Returns (available, cost of the cheapest n) among listings with float <= max_float."""
+        k = bisect_right(self.caps, max_float)
+        level = self.levels[k]
+        available = level[1][-1]
+
+        # Bucket straddling the cap: listings assumed uniformly spread over its range
+        extra_n, extra_p = 0, 0.0
+        if k < len(self.buckets):
+            b_min, b_max, b_price, b_num = self.buckets[k]
+            if b_min < max_float and b_max > b_min:
+                extra_n = int(b_num * (max_float - b_min) / (b_max - b_min))
+                extra_p = b_price
+        available += extra_n
+        if available < n:
+            return available, None
+        if not extra_n:
+            return available, self._prefix_cost(level, n)
+
+        prices, cum_n, cum_cost = level
+        j = bisect_right(prices, extra_p)
+        if n <= cum_n[j]:
+            return available, self._prefix_cost(level, n)
+        if n <= cum_n[j] + extra_n:
+            return available, cum_cost[j] + (n - cum_n[j]) * extra_p
+        return available, self._prefix_cost(level, n - extra_n) + extra_n * extra_p
+
+class OrderBook:
+    """
+    Listing-depth model built from detailled_float.json buckets.
+    Buff only reports each bucket's floor price, so every listing of a
+    bucket is assumed to sell at its min_price.
+    """
+    def __init__(self, buckets):
+        self.books = {gid: _GoodsBook(b) for gid, b in buckets.items()}
+
+    def __contains__(self, goods_id):
+        return goods_id in self.books
+
+    def depth(self, goods_id, max_float):
+        """Number of listings with float <= max_float."""
+        book = self.books.get(goods_id)
+        return book.query(0, max_float)[0] if book else 0
+
+    def cheapest_cost(self, goods_id, n, max_float):
+        """RMB cost of the n cheapest listings with float <= max_float, or None if too shallow."""
+        book = self.books.get(goods_id)
+        if not book: return None
+        return book.query(n, max_float)[1]
+
+    def unit_price(self, goods_id, n, max_float):
+        """Average USD price per item when buying n items under the float cap."""
+        cost = self.cheapest_cost(goods_id, n, max_float)
+        return None if cost is None else cost / n * RMB_TO_USD_RATE
@@ -0,0 +1,106 @@
+import json
+import os
+import time
+from collections import defaultdict
+from .config import OVERRIDES_PATH, OVERRIDES_RELOAD_SECONDS, CONDITION_BOUNDS
+
+# Selectors from most to least specific: a matching rule on an earlier one wins
+SELECTORS = ('skin_id', 'skin', 'weapon', 'collection', 'rarity')
+
+class OverrideEngine:
+    """
+    Compiled `manual_overrides.json` rules. A rule selects skins by id or
+    name, weapon, collection (id or name) or rarity, optionally narrowed by
+    `condition` (code or list) and `is_stattrak`, and either sets the price
+    (`price`, USD) or scales the prediction (`multiplier`).
+    Rules are compiled once into a (skin_id, condition, is_st) index. When
+    several rules match, the most specific selector wins, then the rule
+    with a condition / StatTrak filter, then `priority`, then the later one
+    in the file.
+    """
+    def __init__(self, path=OVERRIDES_PATH):
+        self.path = path
+        self.rules = []
+        self.index = {}  # (skin_id, cond, is_st) -> (price, multiplier)
+        self.mtime = None
+        self._skins = None
+        self._collections = None
+        self._checked = time.monotonic()
+        self.load()
+
+    def load(self):
+        self.rules, self.mtime = [], None
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            self.mtime = os.path.getmtime(self.path)
+            with open(self.path, "r") as f:
+                rules = json.load(f)
+        except Exception as e:
+            print(f"Warning: Failed to load manual overrides: {e}")
+            return
+        for i, rule in enumerate(rules):
+            if ('price' in rule) == ('multiplier' in rule):
+                print(f"Warning: override #{i} needs exactly one of 'price' or 'multiplier', skipped.")
+                continue
+            self.rules.append(rule)
+
+    def compile(self, skins, collections=None):
+        """Builds the index for a skin set (collections: optional id -> name map for name selectors)."""
+        self._skins, self._collections = skins, collections
+        by = {s: defaultdict(list) for s in SELECTORS}
+        col_ids = {name: cid for cid, name in (collections or {}).items()}
+        for sid, skin in skins.items():
+            name = skin['market_hash_name']
+            by['skin_id'][sid].append(sid)
+            by['skin'][name].append(sid)
+            by['weapon'][name.split(' | ')[0]].append(sid)
+            by['collection'][skin['collection_id']].append(sid)
+            by['rarity'][skin['rarity_rank']].append(sid)
+
+        ranked = []
+        for order, rule in enumerate(self.rules):
+            level = next((i for i, s in enumerate(SELECTORS) if s in rule), len(SELECTORS))
+            narrowed = ('condition' in rule) + ('is_stattrak' in rule)
+            ranked.append(((-level, narrowed, rule.get('priority', 0), order), rule, level))
+        ranked.sort(key=lambda r: r[0])
+
+        index = {}
+        for _, rule, level in ranked:
+            if level == len(SELECTORS):
+                sids = skins.keys()
+            else:
+                sel = SELECTORS[level]
+                value = rule[sel]
+                if sel == 'collection':
+                    value = col_ids.get(value, value)
+                sids = by[sel].get(value, ())
+            conds = rule.get('condition', list(CONDITION_BOUNDS))
+            conds = [conds] if isinstance(conds, str) else conds
+            sts = [int(rule['is_stattrak'])] if 'is_stattrak' in rule else [0, 1]
+            action = (rule.get('price'), rule.get('multiplier'))
+            for sid in sids:
+                for cond in conds:
+                    for st in sts:
+                        index[(sid, cond, st)] = action
+        self.index = index
+        if self.rules:
+            print(f"Compiled {len(self.rules)} override rules into {len(index)} prices.")
+
+    def reload_if_changed(self):
+        mtime = os.path.getmtime(self.path) if self.path and os.path.exists(self.path) else None
+        if mtime == self.mtime:
+            return False
+        self.load()
+        if self._skins is not None:
+            self.compile(self._skins, self._collections)
+        print("Manual overrides reloaded.")
+        return True
+
+    def get(self, skin_id, cond, is_st):
+        """(price, multiplier) of the rule that applies to this key, or None."""
+        now = time.monotonic()
+        if now - self._checked > OVERRIDES_RELOAD_SECONDS:
+            self._checked = now
+            self.reload_if_changed()
+        return self.index.get((skin_id, cond, int(is_st)))
@@ -0,0 +1,151 @@
+import heapq
+import json
+from collections import defaultdict
+from .config import RMB_TO_USD_RATE, CONDITION_BOUNDS
+
+class InventoryPool:
+    """
+    Shared input inventory across contracts. Each (skin_id, cond, is_st) is
+    one pool capped by its sell_num; with an order book, the cost of the next
+    units is read from listing depth under the buyer's float cap, net of the
+    units already taken from each bucket by other contracts.
+    """
+    def __init__(self, inventory, order_book=None):
+        self.inventory = inventory  # (skin_id, cond, is_st) -> (goods_id, sell_num)
+        self.order_book = order_book
+        self.used = defaultdict(int)
+        self.taken = defaultdict(lambda: defaultdict(int))  # key -> bucket index -> units bought from it
+
+    def _fill(self, key, goods_id, n, cap):
+        """[(bucket index, units, RMB price)] of the n cheapest listings left under the cap, or None if too shallow."""
+        taken = self.taken[key]
+        left = []
+        for i, (b_min, b_max, price, num) in enumerate(self.order_book.books[goods_id].buckets):
+            if b_max <= cap:
+                count = num
+            elif b_min < cap and b_max > b_min:
+                count = int(num * (cap - b_min) / (b_max - b_min))  # Listings spread uniformly over the bucket
+            else:
+                continue
+            # Units taken under a looser cap may have come from this side of it: count them all as gone
+            count -= taken[i]
+            if count > 0:
+                left.append((price, i, count))
+        fill, need = [], n
+        for price, i, count in sorted(left):
+            if need <= 0: break
+            k = min(count, need)
+            fill.append((i, k, price))
+            need -= k
+        return fill if need <= 0 else None
+
+    def cost(self, key, n, cap, unit_price):
+        """USD cost of the next n units under the float cap, or None when the pool is too shallow."""
+        goods_id, sell_num = self.inventory.get(key, (None, 0))
+        if self.used[key] + n > (sell_num or 0):
+            return None
+        if self.order_book and goods_id in self.order_book:
+            fill = self._fill(key, goods_id, n, cap)
+            if fill is None:
+                return None
+            return sum(k * price for _, k, price in fill) * RMB_TO_USD_RATE
+        return n * unit_price
+
+    def take(self, key, n, cap):
+        goods_id = self.inventory.get(key, (None,))[0]
+        if self.order_book and goods_id in self.order_book:
+            for i, k, _ in self._fill(key, goods_id, n, cap) or ():
+                self.taken[key][i] += k
+        self.used[key] += n
+
+def candidates_from_rows(rows):
+    """Allocator candidates from stored opportunities (results_store rows)."""
+    cands = []
+    for r in rows:
+        inputs, fin = json.loads(r['inputs']), json.loads(r['financials'])
+        t, f = inputs['target'], inputs['filler']
+        cap = inputs.get('filler_max_float', CONDITION_BOUNDS[f['cond']][1])
+        t_cap = t.get('real_f', CONDITION_BOUNDS[t['cond']][1])  # The scan priced the target at this float
+        cands.append({
+            'id': r['id'], 'label': f"{t['name']} ({t['cond']}) + 9x {f['name']} ({f['cond']})",
+            'ev': fin['expected_value'], 'names': {(t['id'], t['cond'], t['is_st']): t['name'], (f['id'], f['cond'], f['is_st']): f['name']},
+            'target': ((t['id'], t['cond'], t['is_st']), t['price'], t_cap),
+            'filler': ((f['id'], f['cond'], f['is_st']), fin.get('filler_unit_price', f['price']), cap),
+        })
+    return cands
+
+def _next_copy(cand, pool):
+    """(cost, profit, [(key, cap, units, cost)]) of one more copy given the pool state, or None if infeasible."""
+    t_key, t_price, t_cap = cand['target']
+    f_key, f_price, cap = cand['filler']
+    if t_key == f_key:
+        # Same goods on both sides: the 10 units come from one pool, under the tighter cap
+        cap = min(cap, t_cap)
+        c = pool.cost(f_key, 10, cap, f_price)
+        if c is None: return None
+        parts = [(f_key, cap, 10, c)]
+    else:
+        t_cost = pool.cost(t_key, 1, t_cap, t_price)
+        f_cost = pool.cost(f_key, 9, cap, f_price)
+        if t_cost is None or f_cost is None: return None
+        parts = [(t_key, t_cap, 1, t_cost), (f_key, cap, 9, f_cost)]
+    cost = sum(p[3] for p in parts)
+    return cost, cand['ev'] - cost, parts
+
+def allocate(cands, budget, pool, max_copies=None):
+    """
+    Greedy solver for the budget/inventory-constrained contract mix.
+    Copies are added one at a time by best profit-per-dollar (the order of
+    the budget constraint's LP relaxation). Marginal costs only grow as
+    shared inventory is consumed, so stale heap entries are re-priced lazily
+    when popped. Copies that no longer fit the remaining budget are skipped,
+    letting cheaper contracts fill it.
+    """
+    heap = []
+    for i, c in enumerate(cands):
+        nxt = _next_copy(c, pool)
+        if nxt and nxt[1] > 0:
+            heapq.heappush(heap, (-nxt[1] / nxt[0], -nxt[1], i, nxt))
+
+    copies = defaultdict(int)
+    buys = defaultdict(lambda: [0, 0.0])  # (key, cap) -> [units, cost]
+    spent = profit = 0.0
+    while heap:
+        _, _, i, stored = heapq.heappop(heap)
+        cand = cands[i]
+        nxt = _next_copy(cand, pool)
+        if nxt is None or nxt[1] <= 0:
+            continue
+        if abs(nxt[0] - stored[0]) > 1e-9:
+            heapq.heappush(heap, (-nxt[1] / nxt[0], -nxt[1], i, nxt))  # Re-priced: wait for its turn
+            continue
+        cost, gain, _ = nxt
+        if spent + cost > budget:
+            continue  # Costs only grow, so this contract is done
+
+        for key, cap, units, part_cost in nxt[2]:
+            pool.take(key, units, cap)
+            buys[(key, cap)][0] += units
+            buys[(key, cap)][1] += part_cost
+
+        copies[i] += 1
+        spent += cost
+        profit += gain
+        if max_copies is None or copies[i] < max_copies:
+            nxt = _next_copy(cand, pool)
+            if nxt and nxt[1] > 0:
+                heapq.heappush(heap, (-nxt[1] / nxt[0], -nxt[1], i, nxt))
+
+    contracts = sorted(({'id': cands[i]['id'], 'label': cands[i]['label'], 'copies': n} for i, n in copies.items()),
+                       key=lambda c: -c['copies'])
+    names = {k: n for c in cands for k, n in c.get('names', {}).items()}
+    buy_list = [{'skin_id': k[0], 'name': names.get(k, k[0]), 'condition': k[1], 'is_stattrak': bool(k[2]),
+                 'goods_id': pool.inventory.get(k, (None,))[0], 'quantity': units,
+                 'max_float': cap, 'est_cost': round(cost, 2)}
+                for (k, cap), (units, cost) in sorted(buys.items(), key=lambda x: -x[1][1])]
+    return {'budget': budget, 'spent': round(spent, 2), 'expected_profit': round(profit, 2),
+            'contracts': contracts, 'buy_list': buy_list}
+
+def load_inventory(conn):
+    return {(r['skin_id'], r['condition'], r['is_stattrak']): (r['goods_id'], r['sell_num'])
+            for r in conn.execute("SELECT skin_id, condition, is_stattrak, goods_id, sell_num FROM prices")}
@@ -0,0 +1,188 @@
+import os
+from array import array
+import numpy as np
+from .config import (
+    FEE, RMB_TO_USD_RATE, MIN_ROI, MIN_PROFIT, IRREGULAR_OUTPUT_SOURCE, SCAN_SNAPSHOT_PATH, FLOAT_PRECISE_OUTPUTS
+)
+from .buckets import load_float_buckets
+from .ev_cache import COND_CODES
+from .float_pricing import OutputPriceTables
+from .scanner import TradeupScanner
+
+MIX_TEXT_FIELDS = ('target_id', 'target_name', 'target_cond', 'filler_id', 'filler_name', 'filler_cond',
+                   'target_collection', 'filler_collection')
+
+class ScanRecorder:
+    """Columnar buffer of every evaluated mix: cost components and outcome vectors."""
+    def __init__(self):
+        self.text = {f: [] for f in MIX_TEXT_FIELDS}
+        self.target_price = array('d')
+        self.filler_price = array('d')
+        self.is_st = array('b')
+        self.out_mix = array('i')
+        self.out_key = array('i')
+        self.out_prob = array('d')
+        self.out_value = array('d')  # Gross USD value used by the scan (before FEE)
+        self.out_float = array('d')  # Real float of the output, to reprice it from refreshed prices
+        self.keys = {}  # (skin_id, is_st, cond) -> index
+        self.key_info = []  # (skin_id, is_st, cond, name, real_price, pred_price, irregular)
+        self.deferred = {}  # id(CollectionEV), weight -> (CollectionEV, weight, mix indices, average adjusted floats)
+
+    def add_mix(self, target, filler, filler_price, target_collection, filler_collection):
+        """Registers a candidate mix and returns its index for add_outcome()."""
+        idx = len(self.target_price)
+        for f, v in zip(MIX_TEXT_FIELDS, (target['id'], target['name'], target['cond'], filler['id'],
+                                          filler['name'], filler['cond'], target_collection, filler_collection)):
+            self.text[f].append(v)
+        self.target_price.append(target['price'])
+        self.filler_price.append(filler_price)
+        self.is_st.append(target['is_st'])
+        return idx
+
+    def _key_index(self, key, name, pdata):
+        k = self.keys.get(key)
+        if k is None:
+            k = self.keys[key] = len(self.key_info)
+            cond = key[2]
+            if pdata:
+                real, pred = pdata['prices'].get(cond, 0), pdata['pred_prices'].get(cond, 0)
+                irreg = pdata['irregular'].get(cond, False)
+            else:
+                real, pred, irreg = 0, 0, False
+            self.key_info.append((key[0], key[1], cond, name, real, pred, irreg))
+        return k
+
+    def add_outcome(self, mix_idx, key, name, prob, value, pdata, real_f):
+        k = self._key_index(key, name, pdata)
+        self.out_mix.append(mix_idx)
+        self.out_key.append(k)
+        self.out_prob.append(prob)
+        self.out_value.append(value)
+        self.out_float.append(real_f)
+
+    def add_deferred(self, mix_idx, adj, groups):
+        """
+        Records a mix scored from EV tables: groups is ((CollectionEV, weight), ...).
+        Its outcome vectors are expanded in bulk, per collection, by to_snapshot().
+        """
+        for ev, weight in groups:
+            entry = self.deferred.get((id(ev), weight))
+            if entry is None:
+                entry = self.deferred[(id(ev), weight)] = (ev, weight, array('i'), array('d'))
+            entry[2].append(mix_idx)
+            entry[3].append(adj)
+
+    def _expand_deferred(self):
+        for ev, weight, mixes, adjs in self.deferred.values():
+            mixes, adjs = np.frombuffer(mixes, dtype=np.int32), np.frombuffer(adjs, dtype=np.float64)
+            prob = weight / len(ev.outputs)
+            for i, o in enumerate(ev.outputs):
+                ci, values = ev.output_values(i, adjs)
+                s_min, span, _, _, _, pdata = ev.rows[i]
+                codes = np.zeros(len(COND_CODES), dtype=np.int32)
+                for c in np.unique(ci):
+                    codes[c] = self._key_index((o['id'], ev.is_st, COND_CODES[c]), o['market_hash_name'], pdata)
+                self.out_mix.frombytes(mixes.tobytes())
+                self.out_key.frombytes(codes[ci].tobytes())
+                self.out_prob.frombytes(np.full(len(mixes), prob).tobytes())
+                self.out_value.frombytes(values.astype(np.float64).tobytes())
+                self.out_float.frombytes((s_min + adjs * span).tobytes())
+        self.deferred = {}
+
+    def to_snapshot(self):
+        """In-memory snapshot, same arrays as load_snapshot() returns."""
+        self._expand_deferred()
+        cols = {f: np.array(v, dtype=str) for f, v in self.text.items()}
+        k_sid, k_st, k_cond, k_name, k_real, k_pred, k_irreg = zip(*self.key_info) if self.key_info else ([],) * 7
+        return dict(
+            target_price=np.frombuffer(self.target_price, dtype=np.float64),
+            filler_price=np.frombuffer(self.filler_price, dtype=np.float64),
+            is_st=np.frombuffer(self.is_st, dtype=np.int8),
+            out_mix=np.frombuffer(self.out_mix, dtype=np.int32),
+            out_key=np.frombuffer(self.out_key, dtype=np.int32),
+            out_prob=np.frombuffer(self.out_prob, dtype=np.float64),
+            out_value=np.frombuffer(self.out_value, dtype=np.float64),
+            out_float=np.frombuffer(self.out_float, dtype=np.float64),
+            key_skin_id=np.array(k_sid, dtype=str), key_is_st=np.array(k_st, dtype=np.int8),
+            key_cond=np.array(k_cond, dtype=str), key_name=np.array(k_name, dtype=str),
+            key_real=np.array(k_real, dtype=np.float64), key_pred=np.array(k_pred, dtype=np.float64),
+            key_irregular=np.array(k_irreg, dtype=bool),
+            meta_rate=np.array(RMB_TO_USD_RATE), meta_irregular_source=np.array(IRREGULAR_OUTPUT_SOURCE),
+            **cols
+        )
+
+    def save(self, path=SCAN_SNAPSHOT_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.savez_compressed(path, **self.to_snapshot())
+        print(f"Saved {len(self.target_price)} candidate mixes ({len(self.out_mix)} outcomes) to {path}")
+
+def load_snapshot(path=SCAN_SNAPSHOT_PATH):
+    with np.load(path) as data:
+        return {k: data[k] for k in data.files}
+
+def load_output_prices():
+    """
+    Current market the snapshot outputs are repriced from: (skins, USD
+    prices_map, float buckets) as a fresh scan would load them.
+    """
+    scanner = TradeupScanner()
+    scanner.load_data()
+    return scanner.skins, scanner.prices_map, load_float_buckets() if FLOAT_PRECISE_OUTPUTS else None
+
+def _refreshed_values(snap, skins, prices_map, buckets, irregular_source):
+    """Gross USD value of every recorded outcome at its recorded float, priced like the scanner from the given market."""
+    tables = OutputPriceTables(skins, prices_map, buckets, irregular_source=irregular_source) if FLOAT_PRECISE_OUTPUTS else None
+    values = np.zeros(len(snap['out_value']))
+    order = np.argsort(snap['out_key'], kind='stable')
+    keys, starts = np.unique(snap['out_key'][order], return_index=True)
+    for k, idx in zip(keys, np.split(order, starts[1:])):
+        sid, st, cond = str(snap['key_skin_id'][k]), int(snap['key_is_st'][k]), str(snap['key_cond'][k])
+        pdata = prices_map.get((sid, st))
+        if not pdata or sid not in skins: continue
+        use_pred = pdata['irregular'].get(cond, False) and irregular_source == "predicted"
+        price = (pdata['pred_prices'] if use_pred else pdata['prices']).get(cond)
+        if not price: continue  # Still unpriced: worth nothing, as in a scan
+        if tables is None:
+            values[idx] = price
+        else:
+            xs, ys = tables.table(sid, st)
+            values[idx] = np.interp(snap['out_float'][idx], xs, ys)
+    return values
+
+def rescore(snap, fee=FEE, rate=RMB_TO_USD_RATE, min_roi=MIN_ROI, irregular_source=IRREGULAR_OUTPUT_SOURCE,
+            output_prices=None):
+    """
+    Recomputes EV, ROI and profit of every recorded mix for new parameters.
+    Without `output_prices`, outcome values keep their float premium: they are
+    rescaled by the ratio between the new and the recorded condition price of
+    the same output. With `output_prices`, the current market returned by
+    load_output_prices(), every outcome is repriced at its recorded float
+    (outputs unpriced at scan time included).
+    Returns a dict of arrays plus 'passing', the indices of the mixes that
+    clear min_roi, sorted by profit.
+    """
+    old_rate = float(snap['meta_rate'])
+    rate_scale = rate / old_rate
+
+    if output_prices is not None:
+        # Market prices are converted with the configured rate: bring them back to the snapshot's
+        values = _refreshed_values(snap, *output_prices, irregular_source) * (old_rate / RMB_TO_USD_RATE)
+    else:
+        def used_price(real, pred, irreg, source):
+            return np.where(irreg & (source == "predicted"), pred, real)
+
+        old_used = used_price(snap['key_real'], snap['key_pred'], snap['key_irregular'], str(snap['meta_irregular_source']))
+        new_used = used_price(snap['key_real'], snap['key_pred'], snap['key_irregular'], irregular_source)
+        factor = np.divide(new_used, old_used, out=np.zeros_like(new_used), where=old_used > 0)
+        values = snap['out_value'] * factor[snap['out_key']]
+    values = values * rate_scale
+
+    n_mix = len(snap['target_price'])
+    ev = np.bincount(snap['out_mix'], weights=snap['out_prob'] * values * fee, minlength=n_mix)
+    cost = (snap['target_price'] + 9 * snap['filler_price']) * rate_scale
+    profit = ev - cost
+    roi = np.divide(profit * 100, cost, out=np.zeros_like(profit), where=cost > 0)
+
+    passing = np.flatnonzero((roi >= min_roi) & (profit > MIN_PROFIT))
+    passing = passing[np.argsort(-profit[passing], kind='stable')]
+    return {'total_cost': cost, 'expected_value': ev, 'profit': profit, 'roi': roi, 'passing': passing}
@@ -0,0 +1,80 @@
+import json
+from datetime import datetime
+
+ORDER_COLUMNS = {'profit': 'profit', 'roi': 'roi', 'cost': 'total_cost', 'ev': 'expected_value'}
+
+OPPORTUNITY_COLUMNS = ('run_id', 'type', 'is_stattrak', 'target_collection', 'filler_collection',
+                       'target_id', 'target_name', 'target_cond', 'target_price', 'filler_id', 'filler_name',
+                       'filler_cond', 'filler_price', 'total_cost', 'expected_value', 'profit', 'roi', 'prob_loss',
+                       'inputs', 'financials')
+OUTCOME_COLUMNS = ('opportunity_id', 'skin_id', 'name', 'condition', 'float', 'probability', 'value_net', 'profit',
+                   'source', 'was_irregular')
+OPPORTUNITY_INSERT = (f"INSERT INTO opportunities ({', '.join(OPPORTUNITY_COLUMNS)}) "
+                      f"VALUES ({', '.join('?' * len(OPPORTUNITY_COLUMNS))})")
+OUTCOME_INSERT = f"INSERT INTO outcomes ({', '.join(OUTCOME_COLUMNS)}) VALUES ({', '.join('?' * len(OUTCOME_COLUMNS))})"
+
+def save_results(conn, results, params=None):
+    """
+    Writes a scan into scan_runs/opportunities/outcomes and returns the run id.
+    SQLite assigns every id, so concurrent writers cannot collide.
+    """
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    cur = conn.execute("INSERT INTO scan_runs (created_at, opportunities, params) VALUES (?, ?, ?)",
+                       (now, len(results), json.dumps(params or {})))
+    run_id = cur.lastrowid
+
+    opp_rows = []
+    for r in results:
+        t, f, fin = r['inputs']['target'], r['inputs']['filler'], r['financials']
+        opp_rows.append((
+            run_id, r['type'], int(r['is_stattrak']), r['target_collection'], r['filler_collection'],
+            t['id'], t['name'], t['cond'], t['price'], f['id'], f['name'], f['cond'], fin.get('filler_unit_price', f['price']),
+            fin['total_cost'], fin['expected_value'], fin['profit'], fin['roi'], fin.get('risk', {}).get('prob_loss'),
+            json.dumps(r['inputs'], ensure_ascii=False), json.dumps(fin)
+        ))
+    conn.executemany(OPPORTUNITY_INSERT, opp_rows)
+
+    # The run is one write transaction: its rows got increasing ids, in results order
+    opp_ids = [row[0] for row in conn.execute("SELECT id FROM opportunities WHERE run_id = ? ORDER BY id", (run_id,))]
+    out_rows = []
+    for opp_id, r in zip(opp_ids, results):
+        for o in r['outcomes']:
+            out_rows.append((opp_id, o.get('skin_id'), o['name'], o['condition'], o.get('float'), o['probability'],
+                             o['value_net'], o['profit'], o['source'], int(o['was_irregular'])))
+
+    conn.executemany(OUTCOME_INSERT, out_rows)
+    conn.commit()
+    return run_id
+
+def latest_run_id(conn):
+    return conn.execute("SELECT MAX(id) FROM scan_runs").fetchone()[0]
+
+def query_results(conn, run_id=None, collection=None, stattrak=None, min_roi=None, min_profit=None,
+                  max_cost=None, order_by='profit', limit=20, offset=0):
+    """Filters and pages through one run's opportunities using the indexed columns."""
+    run_id = run_id or latest_run_id(conn)
+    where, params = ["run_id = ?"], [run_id]
+    if collection:
+        where.append("(target_collection = ? OR filler_collection = ?)")
+        params += [collection, collection]
+    if stattrak is not None:
+        where.append("is_stattrak = ?")
+        params.append(int(stattrak))
+    if min_roi is not None:
+        where.append("roi >= ?")
+        params.append(min_roi)
+    if min_profit is not None:
+        where.append("profit >= ?")
+        params.append(min_profit)
+    if max_cost is not None:
+        where.append("total_cost <= ?")
+        params.append(max_cost)
+
+    direction = "ASC" if order_by == 'cost' else "DESC"
+    sql = (f"SELECT * FROM opportunities WHERE {' AND '.join(where)} "
+           f"ORDER BY {ORDER_COLUMNS[order_by]} {direction} LIMIT ? OFFSET ?")
+    return conn.execute(sql, params + [limit, offset]).fetchall()
+
+def get_outcomes(conn, opportunity_id):
+    return conn.execute("SELECT * FROM outcomes WHERE opportunity_id = ? ORDER BY value_net DESC",
+                        (opportunity_id,)).fetchall()
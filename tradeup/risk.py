@@ -0,0 +1,93 @@
+import numpy as np
+from scipy import fft
+from .config import RISK_REPEATS, RISK_GRID, RISK_PERCENTILES
+
+# Max number of grid cells transformed at once (rows * fft length)
+_CHUNK_CELLS = 8_000_000
+
+def _outcome_matrices(results):
+    """Packs outcome probabilities and net values into padded (n_mix, n_outcomes) arrays."""
+    width = max(len(r['outcomes']) for r in results)
+    probs = np.zeros((len(results), width))
+    values = np.zeros((len(results), width))
+    for i, r in enumerate(results):
+        outs = r['outcomes']
+        probs[i, :len(outs)] = [o['probability'] / 100.0 for o in outs]
+        values[i, :len(outs)] = [o['value_net'] for o in outs]
+    costs = np.array([r['financials']['total_cost'] for r in results])
+    return probs, values, costs
+
+def _exact_quantiles(probs, values, costs, qs):
+    """Exact percentiles of the single-contract profit distribution."""
+    order = np.argsort(values, axis=1)
+    v_sorted = np.take_along_axis(values, order, axis=1)
+    cum = np.cumsum(np.take_along_axis(probs, order, axis=1), axis=1)
+    cum /= cum[:, -1:]
+    out = []
+    for q in qs:
+        idx = (cum >= q / 100.0 - 1e-12).argmax(axis=1)
+        out.append(v_sorted[np.arange(len(costs)), idx] - costs)
+    return out
+
+def _repeated_distribution(probs, values, repeats, grid):
+    """
+    Approximate (mean-preserving grid) distribution of the summed value of
+    `repeats` identical contracts. Values are snapped onto a per-row grid
+    (mass split between the two nearest cells, which keeps the mean exact),
+    then convolved with a single FFT power. Each contract moves by less than
+    one step, so the sum's percentiles are off by at most repeats * step.
+    Returns (pmf, step) with pmf of shape (n_mix, repeats * (grid - 1) + 1).
+    """
+    n = len(probs)
+    step = values.max(axis=1) / (grid - 1)
+    step[step <= 0] = 1.0
+    pos = values / step[:, None]
+    lo = np.floor(pos).astype(np.int64)
+    hi = np.minimum(lo + 1, grid - 1)
+    w_hi = pos - lo
+
+    base = np.zeros((n, grid))
+    rows = np.broadcast_to(np.arange(n)[:, None], lo.shape)
+    np.add.at(base, (rows, lo), probs * (1 - w_hi))
+    np.add.at(base, (rows, hi), probs * w_hi)
+
+    size = repeats * (grid - 1) + 1
+    fft_len = fft.next_fast_len(size, real=True)
+    pmf = np.empty((n, size))
+    rows_per_chunk = max(1, _CHUNK_CELLS // fft_len)
+    for start in range(0, n, rows_per_chunk):
+        spectrum = fft.rfft(base[start:start + rows_per_chunk], n=fft_len, axis=1)
+        chunk = fft.irfft(spectrum ** repeats, n=fft_len, axis=1)[:, :size]
+        pmf[start:start + rows_per_chunk] = np.maximum(chunk, 0)
+    pmf /= pmf.sum(axis=1, keepdims=True)
+    return pmf, step
+
+def attach_risk_metrics(results, repeats=RISK_REPEATS, grid=RISK_GRID):
+    """Adds a 'risk' block to each result's financials, in one array pass over all mixes."""
+    if not results:
+        return results
+
+    probs, values, costs = _outcome_matrices(results)
+    profits = values - costs[:, None]
+
+    prob_loss = (probs * (profits < 0)).sum(axis=1)
+    ev = (probs * values).sum(axis=1)
+    std = np.sqrt(np.maximum((probs * values ** 2).sum(axis=1) - ev ** 2, 0))
+    single_q = _exact_quantiles(probs, values, costs, RISK_PERCENTILES)
+
+    pmf, step = _repeated_distribution(probs, values, repeats, grid)
+    totals = np.arange(pmf.shape[1])[None, :] * step[:, None] - repeats * costs[:, None]
+    repeated_loss = (pmf * (totals < -1e-9)).sum(axis=1)
+    cum = np.cumsum(pmf, axis=1)
+    repeated_q = [totals[np.arange(len(costs)), (cum >= q / 100.0 - 1e-12).argmax(axis=1)]
+                  for q in RISK_PERCENTILES]
+
+    for i, r in enumerate(results):
+        risk = {"prob_loss": float(prob_loss[i]), "profit_std": float(std[i]), "repeats": repeats,
+                "prob_loss_repeated": float(repeated_loss[i]),
+                "repeated_grid_error": float(repeats * step[i])}  # Bound on the repeated percentiles' error
+        for j, q in enumerate(RISK_PERCENTILES):
+            risk[f"profit_p{q}"] = float(single_q[j][i])
+            risk[f"repeated_profit_p{q}"] = float(repeated_q[j][i])
+        r['financials']['risk'] = risk
+    return results
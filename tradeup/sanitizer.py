@@ -6,11 +6,13 @@ import numpy as np
 from scipy.optimize import curve_fit
 from collections import defaultdict
 from .config import (
-    DB_PATH, OVERRIDES_PATH, RMB_TO_USD_RATE, MODEL_PARAMS_PATH,
+    DB_PATH, RMB_TO_USD_RATE, MODEL_PARAMS_PATH,
     OUTLIER_SIGMA, SCARCITY_EXPONENT, MIN_SAMPLES_FOR_STATS, ANOMALY_THRESHOLD,
     CONDITION_BOUNDS
 )
 from .utils import calculate_adjusted_float_range
+from .curves import load_skin_curves
+from .overrides import OverrideEngine
 
 class PriceSanitizer:
     def __init__(self, db_path=DB_PATH):
@@ -20,23 +22,11 @@ class PriceSanitizer:
         self.collection_stats = {}  # (collection_id, rarity, is_st) -> stats
         self.global_stats = {}  # rarity -> regression params
         self.model_params = {}  # rarity_st -> {alpha, k}
-        self.manual_overrides = {} # (skin_name, cond, is_st) -> price
-        self.load_manual_overrides()
+        self.skin_curves = {}  # skinid_st -> {alpha, k, n}, per-skin fits from the float buckets
+        self.collections = {}  # collection_id -> name, for collection-level overrides
+        self.overrides = OverrideEngine()
         self.load_model_params()
 
-    def load_manual_overrides(self):
-        """Load manual price overrides from JSON if exists"""
-        try:
-            if os.path.exists(OVERRIDES_PATH):
-                with open(OVERRIDES_PATH, "r") as f:
-                    data = json.load(f)
-                    for item in data:
-                        key = (item['skin'], item['condition'], bool(item['is_stattrak']))
-                        self.manual_overrides[key] = item['price']
-                print(f"Loaded {len(self.manual_overrides)} manual price overrides.")
-        except Exception as e:
-            print(f"Warning: Failed to load manual overrides: {e}")
-
     def load_model_params(self):
         """Load trained exponential model parameters"""
         try:
@@ -46,6 +36,7 @@ class PriceSanitizer:
                 print(f"Loaded {len(self.model_params)} rarity model parameters.")
         except Exception as e:
             print(f"Warning: Failed to load model_params.json: {e}")
+        self.skin_curves = load_skin_curves()
         
     def load_data(self):
         """Load all data from SQLite into RAM"""
@@ -58,6 +49,8 @@ class PriceSanitizer:
         for row in cursor.fetchall():
             self.skins[row['id']] = dict(row)
         
+        self.collections = {row['id']: row['name'] for row in cursor.execute("SELECT id, name FROM collections")}
+
         # Load prices
         cursor.execute("SELECT * FROM prices")
         for row in cursor.fetchall():
@@ -66,11 +59,24 @@ class PriceSanitizer:
                 self.prices[(skin_id, row['condition'], row['is_stattrak'])] = row['price'] * RMB_TO_USD_RATE
         
         conn.close()
+        self.overrides.compile(self.skins, self.collections)
+
+    def load_snapshot(self, skins, prices, collections=None):
+        """Uses an in-memory market snapshot instead of the DB ((skin_id, condition, is_st) -> USD price)"""
+        collections = collections or {}
+        if skins is not self.skins or collections != self.collections:
+            self.overrides.compile(skins, collections)
+        self.skins = skins
+        self.collections = collections
+        self.prices = {k: p for k, p in prices.items() if k[0] in skins}
+        self.collection_stats = {}
+        self.global_stats = {}
 
     def build_collection_stats(self):
         """Method 1: Builds statistics based on collection ratios"""
         groups = defaultdict(list)
         for (sid, cond, is_st), price in self.prices.items():
+            if price is None or price <= 0: continue  # No listing: not a price level
             skin = self.skins[sid]
             groups[(skin['collection_id'], skin['rarity_rank'], is_st)].append(price)
             
@@ -81,6 +87,10 @@ class PriceSanitizer:
                     'std': np.std(prices)
                 }
 
+    def attach_online_stats(self, engine):
+        """Method 1 (incremental): reads collection stats from an OnlineStatsEngine instead of rebuilding them"""
+        self.collection_stats = engine.collection_stats()
+
     def build_global_regression(self):
         """Method 2: Builds rarity-based price curves"""
         rarity_curves = defaultdict(lambda: {'points': [], 'base_prices': {}})
@@ -105,16 +115,15 @@ class PriceSanitizer:
                     'base_cond': base_cond,
                     'base_adj_range': base_adj,
                     'base_price': base_price,
-                    'scaling_factor': 1.0 # Simple linear model for now
+                    'curve': self.skin_curves.get(f"{sid}_{int(is_st)}")  # None -> rarity model
                 }
 
     def get_predicted_price(self, skin_id, condition, is_st):
         """Combined prediction with manual override check"""
+        override = self.overrides.get(skin_id, condition, is_st)
+        if override and override[0] is not None:
+            return override[0]
         skin = self.skins.get(skin_id)
-        if skin:
-            m_key = (skin['market_hash_name'], condition, bool(is_st))
-            if m_key in self.manual_overrides:
-                return self.manual_overrides[m_key]
 
         # Method 1 logic
         p1 = None
@@ -131,9 +140,9 @@ class PriceSanitizer:
             curve = self.global_stats[ckey]
             target_adj, _, _ = calculate_adjusted_float_range(skin['min_float'], skin['max_float'], condition)
             
-            if m_key in self.model_params and target_adj > 0:
-                # Use trained exponential model
-                m = self.model_params[m_key]
+            m = curve['curve'] or self.model_params.get(m_key)
+            if m and target_adj > 0:
+                # Use the skin's own exponential curve, else the rarity-level one
                 alpha, k = m['alpha'], m['k']
                 
                 # Predict factor relative to base condition
@@ -153,9 +162,10 @@ class PriceSanitizer:
                     p2 = curve['base_price'] * (curve['base_adj_range'] / target_adj) ** SCARCITY_EXPONENT
         
         # Combined weighting
-        if p1 and p2:
-            return 0.6 * p1 + 0.4 * p2
-        return p1 or p2
+        predicted = 0.6 * p1 + 0.4 * p2 if (p1 and p2) else (p1 or p2)
+        if override and predicted:
+            predicted *= override[1]
+        return predicted
 
     def detect_anomalies(self):
         """Logic for identifying price manipulations or errors."""
@@ -0,0 +1,134 @@
+import json
+from .config import RMB_TO_USD_RATE, STD_FLOATS
+
+class ScanFilter:
+    """
+    Restricts a scan to a slice of the market: target collections (ids or
+    names), input rarities, StatTrak and an input price band (USD, applied to
+    the target and the fillers). Fillers still come from every collection.
+    The filter is pushed down into the load: only the matching targets, the
+    cheapest fillers of their (rarity, StatTrak) groups and the outputs of
+    the collections involved are read, so the scan returns the same mixes
+    as a full scan restricted to those targets.
+    """
+    def __init__(self, collections=None, rarities=None, stattrak=None, min_price=None, max_price=None):
+        self.collections = list(collections) if collections else None
+        self.rarities = sorted(set(rarities)) if rarities else None
+        self.stattrak = None if stattrak is None else int(stattrak)
+        self.min_price = min_price
+        self.max_price = max_price
+        self.collection_ids = None
+
+    @property
+    def active(self):
+        return any(v is not None for v in (self.collections, self.rarities, self.stattrak, self.min_price, self.max_price))
+
+    def describe(self):
+        return {'collections': self.collections, 'rarities': self.rarities, 'stattrak': self.stattrak,
+                'min_price': self.min_price, 'max_price': self.max_price}
+
+    def resolve(self, collections):
+        """Maps the requested collections (ids or names) to ids."""
+        if self.collections is None:
+            return
+        by_name = {name: cid for cid, name in collections.items()}
+        self.collection_ids = set()
+        for c in self.collections:
+            cid = c if c in collections else by_name.get(c)
+            if cid is None:
+                print(f"Warning: unknown collection '{c}' in scan filter.")
+            else:
+                self.collection_ids.add(cid)
+
+    def accepts_input(self, rank, is_st, price):
+        """Rarity / StatTrak / price band test of a candidate input (price in USD)."""
+        if self.rarities is not None and rank not in self.rarities: return False
+        if self.stattrak is not None and is_st != self.stattrak: return False
+        if self.min_price is not None and price < self.min_price: return False
+        if self.max_price is not None and price > self.max_price: return False
+        return True
+
+    def accepts_target(self, col_id):
+        return self.collection_ids is None or col_id in self.collection_ids
+
+    def _input_sql(self):
+        """WHERE clause of the candidate inputs, with TradeupScanner._build_candidate_lists() exclusions."""
+        where = ["p.price > 0", "s.rarity_rank < 6", "instr(COALESCE(c.name, ''), 'Limited Edition') = 0",
+                 f"p.condition IN ({', '.join('?' * len(STD_FLOATS))})"]
+        params = list(STD_FLOATS)
+        if self.rarities is not None:
+            where.append(f"s.rarity_rank IN ({', '.join('?' * len(self.rarities))})")
+            params += self.rarities
+        if self.stattrak is not None:
+            where.append("p.is_stattrak = ?")
+            params.append(self.stattrak)
+        if self.min_price is not None:
+            where.append("p.price * ? >= ?")
+            params += [RMB_TO_USD_RATE, self.min_price]
+        if self.max_price is not None:
+            where.append("p.price * ? <= ?")
+            params += [RMB_TO_USD_RATE, self.max_price]
+        return " AND ".join(where), params
+
+    def query(self, conn, max_fillers):
+        """
+        Reads the slice from the DB: returns (skin rows, price rows) in table
+        order. Fillers are ranked in SQL with the scanner's tie order (price,
+        then catalog order) so the same max_fillers cheapest are kept.
+        """
+        where, params = self._input_sql()
+        if self.collection_ids is not None and max_fillers:
+            picked = f"collection_id IN ({', '.join('?' * len(self.collection_ids))}) OR filler_rank <= ?"
+            params += sorted(self.collection_ids) + [max_fillers]
+        else:
+            picked = "1"  # Every input is a target or an uncapped filler
+
+        skin_rows = conn.execute(f'''
+            WITH inputs AS (
+                SELECT p.skin_id, s.collection_id, s.rarity_rank,
+                       ROW_NUMBER() OVER (PARTITION BY s.rarity_rank, p.is_stattrak ORDER BY p.price, s.rowid, p.rowid) AS filler_rank
+                FROM prices p JOIN skins s ON s.id = p.skin_id LEFT JOIN collections c ON c.id = s.collection_id
+                WHERE {where}
+            ),
+            picked AS (SELECT DISTINCT skin_id, collection_id, rarity_rank FROM inputs WHERE {picked})
+            SELECT * FROM skins
+            WHERE id IN (SELECT skin_id FROM picked)
+               OR (collection_id, rarity_rank) IN (SELECT collection_id, rarity_rank + 1 FROM picked)
+            ORDER BY rowid
+        ''', params).fetchall()
+
+        sql = "SELECT * FROM prices WHERE skin_id IN (SELECT value FROM json_each(?))"
+        args = [json.dumps([row['id'] for row in skin_rows])]
+        if self.stattrak is not None:
+            sql += " AND is_stattrak = ?"
+            args.append(self.stattrak)
+        return skin_rows, conn.execute(sql + " ORDER BY rowid", args).fetchall()
+
+    def select(self, collections, skins, rows, max_fillers):
+        """query() on an in-memory snapshot: returns the (skins, price rows) slice."""
+        self.resolve(collections)
+        by_key = {}
+        for row in rows:
+            by_key.setdefault((row['skin_id'], row['is_stattrak']), []).append(row)
+
+        picked, groups = set(), {}
+        for sid, skin in skins.items():
+            rank, col_id = skin['rarity_rank'], skin['collection_id']
+            if rank >= 6 or "Limited Edition" in collections.get(col_id, ""): continue
+            for is_st in (0, 1):
+                for row in by_key.get((sid, is_st), ()):
+                    price = row['price'] * RMB_TO_USD_RATE
+                    if price <= 0 or row['condition'] not in STD_FLOATS or not self.accepts_input(rank, is_st, price):
+                        continue
+                    if self.collection_ids is not None and col_id in self.collection_ids:
+                        picked.add(sid)
+                    groups.setdefault((rank, is_st), []).append((price, sid))
+        for fillers in groups.values():
+            if self.collection_ids is not None and max_fillers:
+                fillers.sort(key=lambda f: f[0])  # Stable: ties keep catalog order, as in the scanner
+                fillers = fillers[:max_fillers]
+            picked.update(sid for _, sid in fillers)
+
+        pairs = {(skins[sid]['collection_id'], skins[sid]['rarity_rank'] + 1) for sid in picked}
+        kept = {sid: s for sid, s in skins.items() if sid in picked or (s['collection_id'], s['rarity_rank']) in pairs}
+        return kept, [r for r in rows if r['skin_id'] in kept and (self.stattrak is None or r['is_stattrak'] == self.stattrak)]
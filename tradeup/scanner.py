@@ -1,30 +1,70 @@
+import heapq
 import json
 import time
 from .config import (
-    RMB_TO_USD_RATE, FEE, MIN_ROI, MIN_INPUT_ADJ_FLOAT, 
+    RMB_TO_USD_RATE, FEE, MIN_ROI, MIN_PROFIT, MIN_INPUT_ADJ_FLOAT, 
     MIN_OUTPUT_PRICE, MAX_OUTPUT_PRICE, STD_FLOATS,
-    REPORTS_DIR
+    REPORTS_DIR, FLOAT_PRECISE_OUTPUTS, IRREGULAR_OUTPUT_SOURCE, USE_ORDER_BOOK, EV_CACHE,
+    MAX_FILLERS_PER_GROUP
 )
 from .utils import get_condition_code
 from .database import get_db_connection
+from .risk import attach_risk_metrics
+from .buckets import load_float_buckets
+from .float_pricing import OutputPriceTables
+from .orderbook import OrderBook
+from .ev_cache import CollectionEV
 
 class TradeupScanner:
     def __init__(self):
         self.skins = {}
         self.prices_map = {} # (skin_id, is_st) -> data
         self.collections = {}
+        self.output_prices = None # Float-precise output pricing (OutputPriceTables)
+        self.order_book = None # Listing depth per goods_id (OrderBook)
+        self.recorder = None # Optional ScanRecorder, fed with every evaluated mix
+        self.scan_filter = None # Optional ScanFilter (target collections, rarities, StatTrak, price band)
+        self._outputs_cache = {} # (collection_id, rank) -> output skins
+        self._ev_cache = {} # (collection_id, rank, is_st) -> CollectionEV
+        self.use_ev_cache = EV_CACHE
+        self.min_roi = MIN_ROI
+        self.min_profit = MIN_PROFIT
+        self.max_fillers = MAX_FILLERS_PER_GROUP
 
-    def load_data(self):
-        """Loads all necessary data from the database."""
+    def load_data(self, scan_filter=None):
+        """Loads all necessary data from the database (only the filter's slice when given)."""
         conn = get_db_connection()
         self.collections = {row['id']: row['name'] for row in conn.execute("SELECT id, name FROM collections")}
+        self.scan_filter = scan_filter
         
-        cursor = conn.execute("SELECT * FROM skins")
-        for row in cursor:
+        if scan_filter is None:
+            skin_rows, price_rows = conn.execute("SELECT * FROM skins"), conn.execute("SELECT * FROM prices")
+        else:
+            scan_filter.resolve(self.collections)
+            skin_rows, price_rows = scan_filter.query(conn, self.max_fillers)
+        for row in skin_rows:
             self.skins[row['id']] = dict(row)
             
-        cursor = conn.execute("SELECT * FROM prices")
-        for row in cursor:
+        self.load_price_rows(price_rows)
+        conn.close()
+        print(f"Loaded {len(self.skins)} skins and price data.")
+
+    def load_snapshot(self, collections, skins, price_rows, scan_filter=None):
+        """Loads an in-memory market snapshot (price rows use the `prices` table columns, in RMB)."""
+        if scan_filter is not None:
+            skins, price_rows = scan_filter.select(collections, skins, price_rows, self.max_fillers)
+        self.collections = collections
+        self.skins = skins
+        self.scan_filter = scan_filter
+        self.prices_map = {}
+        self.output_prices = None
+        self.order_book = None
+        self._outputs_cache = {}
+        self._ev_cache = {}
+        self.load_price_rows(price_rows)
+
+    def load_price_rows(self, rows):
+        for row in rows:
             sid, st, cond = row['skin_id'], row['is_stattrak'], row['condition']
             price = row['price'] * RMB_TO_USD_RATE
             pred = (row['predicted_price'] * RMB_TO_USD_RATE) if row['predicted_price'] else price
@@ -33,15 +73,14 @@ class TradeupScanner:
             if key not in self.prices_map:
                 self.prices_map[key] = {
                     'prices': {}, 'pred_prices': {}, 
-                    'irregular': {}, 'sell_nums': {}
+                    'irregular': {}, 'sell_nums': {}, 'goods_ids': {}
                 }
             
             self.prices_map[key]['prices'][cond] = price
             self.prices_map[key]['pred_prices'][cond] = pred
             self.prices_map[key]['irregular'][cond] = bool(row['irregular'])
             self.prices_map[key]['sell_nums'][cond] = row['sell_num']
-        conn.close()
-        print(f"Loaded {len(self.skins)} skins and price data.")
+            self.prices_map[key]['goods_ids'][cond] = row['goods_id']
 
     def calculate_premium_price(self, real_f, base_price, skin_prices):
         """Calculates the price for low-float items based on better condition prices."""
@@ -64,6 +103,15 @@ class TradeupScanner:
                 return base_price + premium
         return base_price
 
+    def filler_unit_price(self, filler, real_f):
+        """Average price of the 9 cheapest fillers under a float cap, from listing depth when known."""
+        pdata = self.prices_map[(filler['id'], filler['is_st'])]
+        if self.order_book:
+            unit = self.order_book.unit_price(pdata['goods_ids'].get(filler['cond']), 9, real_f)
+            if unit is not None:
+                return max(unit, filler['price'])
+        return self.calculate_premium_price(real_f, filler['price'], pdata['prices'])
+
     def calculate_thresholds(self, outputs):
         """Determines critical Adjusted Float thresholds to hit target conditions."""
         thresholds = set()
@@ -79,63 +127,175 @@ class TradeupScanner:
                         thresholds.add(round(safe_adj, 5))
         return sorted(list(thresholds))
 
-    def scan(self):
-        """Main scanner logic."""
-        targets, fillers_by_group = self._build_candidate_lists()
+    def get_outputs(self, col_id, rank):
+        """Skins one rarity above `rank` in a collection (possible contract outputs)."""
+        k = (col_id, rank)
+        if k not in self._outputs_cache:
+            self._outputs_cache[k] = [s for s in self.skins.values() if s['collection_id'] == col_id and s['rarity_rank'] == rank + 1]
+        return self._outputs_cache[k]
+
+    def get_collection_ev(self, col_id, rank, is_st):
+        k = (col_id, rank, is_st)
+        if k not in self._ev_cache:
+            self._ev_cache[k] = CollectionEV(self.get_outputs(col_id, rank), is_st, self.prices_map, self.output_prices)
+        return self._ev_cache[k]
+
+    def _prepare_pricing(self):
+        if (FLOAT_PRECISE_OUTPUTS and self.output_prices is None) or (USE_ORDER_BOOK and self.order_book is None):
+            buckets = load_float_buckets()
+            if FLOAT_PRECISE_OUTPUTS and self.output_prices is None:
+                self.output_prices = OutputPriceTables(self.skins, self.prices_map, buckets)
+            if USE_ORDER_BOOK and self.order_book is None:
+                self.order_book = OrderBook(buckets)
+
+    def scan(self, deadline=None, top_k=None, target_groups=None, candidates=None):
+        """
+        Main scanner logic.
+        With a deadline (seconds) or top_k, targets are visited in descending
+        order of their optimistic profit bound and the scan stops when the
+        time is up or when no remaining bound can enter the top K.
+        target_groups restricts targets to a set of (collection_id, rarity, is_st);
+        candidates reuses a _build_candidate_lists() result across calls.
+        """
+        end_time = time.perf_counter() + deadline if deadline is not None else None  # Covers the setup phases too
+        targets, fillers_by_group = candidates or self._build_candidate_lists()
+        if target_groups is not None:
+            targets = [t for t in targets if (t['collection_id'], t['rarity'], t['is_st']) in target_groups]
+        self._prepare_pricing()
         results = []
-        outputs_cache = {}
+        anytime = deadline is not None or top_k is not None
+        # A recorder wants every candidate: bounds then only order the visit, nothing is pruned
+        prune = not self.recorder
+        bounds = self._target_bounds(targets, fillers_by_group, end_time) if (anytime or prune) else None
 
-        def get_outputs(col_id, rank):
-            k = (col_id, rank)
-            if k not in outputs_cache:
-                outputs_cache[k] = [s for s in self.skins.values() if s['collection_id'] == col_id and s['rarity_rank'] == rank + 1]
-            return outputs_cache[k]
+        if bounds is not None and anytime:
+            order = sorted(range(len(targets)), key=lambda i: bounds[i][0], reverse=True)
+        else:
+            order = range(len(targets))
 
         print(f"Scanning {len(targets)} targets against cached fillers...")
-        for target in targets:
-            target_outputs = get_outputs(target['collection_id'], target['rarity'])
-            if not target_outputs: continue
+        best = []  # Min-heap of the top_k profits found so far
+        visited = pruned = 0
+        for i in order:
+            if end_time is not None and time.perf_counter() > end_time:
+                print(f"Deadline reached: {visited}/{len(targets)} targets visited."
+                      + (" The recorded candidates are incomplete." if self.recorder else ""))
+                break
+            if bounds is not None and prune:
+                profit_ub, roi_ub = bounds[i]
+                if top_k and len(best) >= top_k and profit_ub <= best[0]:
+                    break  # Targets are sorted by bound: nothing left can enter the top K
+                if roi_ub < self.min_roi or profit_ub <= self.min_profit:
+                    pruned += 1
+                    continue
+            visited += 1
+
+            found = self._scan_target(targets[i], fillers_by_group)
+            results.extend(found)
+            if top_k:
+                for r in found:
+                    heapq.heappush(best, r['financials']['profit'])
+                    if len(best) > top_k: heapq.heappop(best)
+
+        if pruned:
+            print(f"Pruned {pruned} targets whose profit bound cannot reach MIN_ROI.")
+        results.sort(key=lambda x: x['financials']['profit'], reverse=True)
+        if top_k:
+            results = results[:top_k]
+        attach_risk_metrics(results)
+        return results
+
+    def _scan_target(self, target, fillers_by_group):
+        """Evaluates the cheapest valid filler of a target for every output threshold."""
+        results = []
+        target_outputs = self.get_outputs(target['collection_id'], target['rarity'])
+        if not target_outputs: return results
+        
+        thresholds = self.calculate_thresholds(target_outputs)
+        for required_avg in thresholds:
+            max_filler_adj = ((10 * required_avg) - target['adj_f']) / 9.0
+            if max_filler_adj < 0: continue
+            
+            # Find best filler
+            group_key = (target['rarity'], target['is_st'])
+            fillers = fillers_by_group.get(group_key, [])
             
-            thresholds = self.calculate_thresholds(target_outputs)
-            for required_avg in thresholds:
-                max_filler_adj = ((10 * required_avg) - target['adj_f']) / 9.0
-                if max_filler_adj < 0: continue
+            for filler in fillers:
+                if filler['collection_id'] == target['collection_id']: continue
                 
-                # Find best filler
-                group_key = (target['rarity'], target['is_st'])
-                fillers = fillers_by_group.get(group_key, [])
+                needed_adj = min(max_filler_adj, 1.0)
+                if needed_adj < 0.001: continue
                 
-                for filler in fillers:
-                    if filler['collection_id'] == target['collection_id']: continue
-                    
-                    needed_adj = min(max_filler_adj, 1.0)
-                    if needed_adj < 0.001: continue
-                    
-                    required_real_f = filler['min_f'] + (needed_adj * (filler['max_f'] - filler['min_f']))
-                    if get_condition_code(required_real_f) != filler['cond']: continue
-                    
-                    f_prices = self.prices_map[(filler['id'], filler['is_st'])]['prices']
-                    final_filler_price = self.calculate_premium_price(required_real_f, filler['price'], f_prices)
-                    
-                    premium_val = final_filler_price - filler['price']
-                    if needed_adj < MIN_INPUT_ADJ_FLOAT and premium_val <= 0.0001:
-                        continue
-                        
-                    # Calculate Stats
-                    filler_outputs = get_outputs(filler['collection_id'], filler['rarity'])
-                    if not filler_outputs: continue
+                required_real_f = filler['min_f'] + (needed_adj * (filler['max_f'] - filler['min_f']))
+                if get_condition_code(required_real_f) != filler['cond']: continue
+                
+                final_filler_price = self.filler_unit_price(filler, required_real_f)
+                
+                premium_val = final_filler_price - filler['price']
+                if needed_adj < MIN_INPUT_ADJ_FLOAT and premium_val <= 0.0001:
+                    continue
                     
-                    res_obj = self._evaluate_mix(target, filler, required_avg, needed_adj, target_outputs, filler_outputs)
-                    if res_obj:
-                        results.append(res_obj)
-                    break # Next threshold
-
-        results.sort(key=lambda x: x['financials']['profit'], reverse=True)
+                # Calculate Stats
+                filler_outputs = self.get_outputs(filler['collection_id'], filler['rarity'])
+                if not filler_outputs: continue
+                
+                res_obj = self._evaluate_mix(target, filler, required_avg, needed_adj, target_outputs, filler_outputs,
+                                             final_filler_price)
+                if res_obj:
+                    results.append(res_obj)
+                break # Next threshold
         return results
 
+    def _output_value_bound(self, outputs, is_st):
+        """Mean over outputs of the best price each can reach (any condition or float)."""
+        if not outputs: return 0.0
+        total = 0.0
+        for o in outputs:
+            pdata = self.prices_map.get((o['id'], is_st))
+            if not pdata: continue
+            best = max(list(pdata['prices'].values()) + list(pdata['pred_prices'].values()) + [0])
+            if self.output_prices and best > 0:
+                best = max(best, self.output_prices.max_price(o['id'], is_st))
+            total += best
+        return total / len(outputs)
+
+    def _target_bounds(self, targets, fillers_by_group, end_time=None):
+        """
+        Optimistic (profit, ROI) per target: best reachable outputs on both
+        sides of the contract against the cheapest fillers of its group.
+        Returns None if end_time (perf_counter) passes while computing them.
+        """
+        col_bound = {}
+        def collection_bound(col_id, rank, is_st):
+            k = (col_id, rank, is_st)
+            if k not in col_bound:
+                col_bound[k] = self._output_value_bound(self.get_outputs(col_id, rank), is_st)
+            return col_bound[k]
+
+        group_bound = {}
+        for gk, fillers in fillers_by_group.items():
+            if end_time is not None and time.perf_counter() > end_time: return None
+            rank, is_st = gk
+            if not fillers: continue
+            best_f = max(collection_bound(f['collection_id'], rank, is_st) for f in fillers)
+            group_bound[gk] = (best_f, min(f['price'] for f in fillers))
+
+        bounds = []
+        for t in targets:
+            if end_time is not None and time.perf_counter() > end_time: return None
+            best_f, cheapest_f = group_bound.get((t['rarity'], t['is_st']), (0.0, 0.0))
+            ev_ub = FEE * (0.1 * collection_bound(t['collection_id'], t['rarity'], t['is_st']) + 0.9 * best_f)
+            cost_lb = t['price'] + 9 * cheapest_f
+            profit_ub = ev_ub - cost_lb
+            bounds.append((profit_ub, profit_ub / cost_lb * 100 if cost_lb > 0 else float('inf')))
+        return bounds
+
     def _build_candidate_lists(self):
         targets = []
         fillers_by_group = {}
+        sf = self.scan_filter
+        if sf is not None:
+            sf.resolve(self.collections)
         
         for sid, skin in self.skins.items():
             rank, col_id = skin['rarity_rank'], skin['collection_id']
@@ -148,6 +308,7 @@ class TradeupScanner:
                 
                 for cond, price in self.prices_map[pkey]['prices'].items():
                     if price <= 0: continue
+                    if sf is not None and not sf.accepts_input(rank, is_st, price): continue
                     avg_f = STD_FLOATS.get(cond)
                     if not avg_f: continue
                     
@@ -160,7 +321,8 @@ class TradeupScanner:
                         'min_f': skin['min_float'], 'max_f': skin['max_float'],
                         'real_f': avg_f, 'adj_f': adj_f, 'is_irregular': self.prices_map[pkey]['irregular'][cond]
                     }
-                    targets.append(item)
+                    if sf is None or sf.accepts_target(col_id):
+                        targets.append(item)
                     
                     gk = (rank, is_st)
                     if gk not in fillers_by_group: fillers_by_group[gk] = []
@@ -168,16 +330,60 @@ class TradeupScanner:
 
         for gk in fillers_by_group:
             fillers_by_group[gk].sort(key=lambda x: x['price'])
-            fillers_by_group[gk] = fillers_by_group[gk][:50]
+            if self.max_fillers:
+                fillers_by_group[gk] = fillers_by_group[gk][:self.max_fillers]
             
         return targets, fillers_by_group
 
-    def _evaluate_mix(self, target, filler, required_avg, filler_needed_adj, t_outs, f_outs):
-        cost = target['price'] + (9 * filler['price'])
+    def _evaluate_mix(self, target, filler, required_avg, filler_needed_adj, t_outs, f_outs, filler_price=None):
+        if not self.use_ev_cache:
+            return self._evaluate_mix_outputs(target, filler, filler_needed_adj, t_outs, f_outs, filler_price)
+
+        # The per-output pass only runs for mixes that clear the filters on the EV tables
+        if filler_price is None: filler_price = filler['price']
+        cost, ev = self._cached_score(target, filler, filler_needed_adj, filler_price)
+        profit = ev - cost
+        roi = (profit / cost * 100) if cost > 0 else 0
+        if roi >= self.min_roi and profit > self.min_profit:
+            return self._evaluate_mix_outputs(target, filler, filler_needed_adj, t_outs, f_outs, filler_price, record=False)
+        return None
+
+    def _cached_score(self, target, filler, filler_needed_adj, filler_price):
+        """(cost, EV) of a mix from two lookups in the per-collection EV tables."""
+        cost = target['price'] + (9 * filler_price)
+        mix_avg_adj = (target['adj_f'] + 9 * filler_needed_adj) / 10.0
+        t_ev = self.get_collection_ev(target['collection_id'], target['rarity'], target['is_st'])
+        f_ev = self.get_collection_ev(filler['collection_id'], filler['rarity'], filler['is_st'])
+        if self.recorder:
+            rec_idx = self.recorder.add_mix(target, filler, filler_price, self.collections[target['collection_id']],
+                                            self.collections[filler['collection_id']])
+            self.recorder.add_deferred(rec_idx, mix_avg_adj, ((t_ev, 0.1), (f_ev, 0.9)))
+        return cost, (0.1 * t_ev.mean_value(mix_avg_adj) + 0.9 * f_ev.mean_value(mix_avg_adj)) * FEE
+
+    def output_price(self, skin_id, is_st, res_f, res_c):
+        """(USD price of an output at its exact float, irregular flag); the price is None when unknown."""
+        pdata = self.prices_map.get((skin_id, is_st))
+        if not pdata:
+            return None, False
+        is_irreg = pdata['irregular'].get(res_c, False)
+        use_pred = is_irreg and IRREGULAR_OUTPUT_SOURCE == "predicted"
+        p_val = pdata['pred_prices'].get(res_c) if use_pred else pdata['prices'].get(res_c)
+        if p_val and self.output_prices:
+            p_val = self.output_prices.price(skin_id, is_st, res_f)
+        return p_val, is_irreg
+
+    def _evaluate_mix_outputs(self, target, filler, filler_needed_adj, t_outs, f_outs, filler_price=None, record=True):
+        """Reference evaluation: prices every output at its exact float and builds the outcome list."""
+        if filler_price is None: filler_price = filler['price']
+        cost = target['price'] + (9 * filler_price)
         mix_avg_adj = (target['adj_f'] + 9 * filler_needed_adj) / 10.0
         
         ev = 0
         outcomes = []
+        rec_idx = None
+        if self.recorder and record:
+            rec_idx = self.recorder.add_mix(target, filler, filler_price, self.collections[target['collection_id']],
+                                            self.collections[filler['collection_id']])
         
         # 10% target, 90% filler
         p_t = 0.1 / len(t_outs)
@@ -191,16 +397,17 @@ class TradeupScanner:
                 st_status = target['is_st'] if source == 'target' else filler['is_st']
                 pkey = (o['id'], st_status)
                 
-                if pkey in self.prices_map:
-                    is_irreg = self.prices_map[pkey]['irregular'].get(res_c, False)
-                    p_val = self.prices_map[pkey]['pred_prices'].get(res_c, 0) if is_irreg else self.prices_map[pkey]['prices'].get(res_c, 0)
-                else:
-                    p_val, is_irreg = 0, False
+                pdata = self.prices_map.get(pkey)
+                p_val, is_irreg = self.output_price(o['id'], st_status, res_f, res_c)
+                p_val = p_val or 0
                 
+                if rec_idx is not None:
+                    self.recorder.add_outcome(rec_idx, (o['id'], st_status, res_c), o['market_hash_name'], prob, p_val, pdata, res_f)
+
                 net_val = p_val * FEE
                 ev += net_val * prob
                 outcomes.append({
-                    "name": o['market_hash_name'], "condition": res_c,
+                    "skin_id": o['id'], "name": o['market_hash_name'], "condition": res_c, "float": res_f,
                     "probability": prob * 100, "value_net": net_val,
                     "profit": net_val - cost, "source": source, "was_irregular": is_irreg
                 })
@@ -208,15 +415,16 @@ class TradeupScanner:
         profit = ev - cost
         roi = (profit / cost * 100) if cost > 0 else 0
         
-        if roi >= MIN_ROI and profit > 0.5:
+        if roi >= self.min_roi and profit > self.min_profit:
             return {
                 "type": "MIX_1_9", "is_stattrak": bool(target['is_st']),
                 "target_collection": self.collections[target['collection_id']],
                 "filler_collection": self.collections[filler['collection_id']],
                 "inputs": {
-                    "target": target, "filler": filler
+                    "target": target, "filler": filler,
+                    "filler_max_float": filler['min_f'] + filler_needed_adj * (filler['max_f'] - filler['min_f'])
                 },
-                "financials": {"total_cost": cost, "expected_value": ev, "roi": roi, "profit": profit},
+                "financials": {"total_cost": cost, "filler_unit_price": filler_price, "expected_value": ev, "roi": roi, "profit": profit},
                 "outcomes": sorted(outcomes, key=lambda x: x['value_net'], reverse=True)
             }
         return None
@@ -0,0 +1,210 @@
+import json
+import os
+from datetime import datetime, timedelta
+import numpy as np
+from scipy.optimize import curve_fit
+from .config import (
+    DETAILED_FLOAT_PATH, MODEL_VERSIONS_DIR, TRAIN_WINDOW_DAYS, TRAIN_HALF_LIFE_DAYS, TRAIN_CHUNK_ROWS,
+    TRAIN_X_BINS, CURVE_SHRINKAGE, CURVE_MIN_EXCESS
+)
+from .buckets import parse_buckets
+from .curves import BASE_BUCKET_MIN, fit_curve_stats, pooled_prior_stats, curve_priors
+
+TS_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+def model_func(adj_f, alpha, k):
+    """Exponential decay model for price ratio vs adjusted float."""
+    return 1 + alpha * np.exp(-k * adj_f)
+
+def ingest_float_buckets(conn, path=DETAILED_FLOAT_PATH):
+    """Appends a detailled_float.json snapshot to float_bucket_history; returns the new rows (re-ingesting is a no-op)."""
+    if not os.path.exists(path):
+        return 0
+    with open(path, "r", encoding='utf-8') as f:
+        data = json.load(f)
+    rows = []
+    for item in data.get('info', []):
+        ts = item.get('update_time') or data.get('stat_time')
+        if ts is None: continue
+        recorded_at = datetime.fromtimestamp(ts).strftime(TS_FORMAT)
+        for b_min, b_max, price, sell_num in parse_buckets(item.get('sales', [])):
+            rows.append((recorded_at, item['goods_id'], b_min, b_max, price, sell_num))
+    before = conn.total_changes
+    conn.executemany("INSERT OR IGNORE INTO float_bucket_history VALUES (?, ?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    return conn.total_changes - before
+
+def iter_bucket_snapshots(conn, start, end, chunk_rows=TRAIN_CHUNK_ROWS):
+    """Yields (recorded_at, goods_id, [(min_float, price)]) per goods snapshot, fetching chunk_rows rows at a time."""
+    cur = conn.execute('''
+        SELECT recorded_at, goods_id, min_float, price FROM float_bucket_history
+        WHERE recorded_at >= ? AND recorded_at <= ?
+        ORDER BY recorded_at, goods_id, min_float
+    ''', (start, end))
+    key, buckets = None, []
+    while True:
+        rows = cur.fetchmany(chunk_rows)
+        if not rows:
+            break
+        for ts, gid, b_min, price in rows:
+            if (ts, gid) != key:
+                if buckets:
+                    yield key[0], key[1], buckets
+                key, buckets = (ts, gid), []
+            buckets.append((b_min, price))
+    if buckets:
+        yield key[0], key[1], buckets
+
+class TrainingAccumulator:
+    """
+    Recency-weighted sufficient statistics of bucket points. Rarity groups
+    keep weighted sums per adjusted-float bin, skins keep the 2x2 normal
+    equation sums of curves.fit_curve_stats(), so memory depends on the
+    catalog and not on how much history is read.
+    """
+    def __init__(self, bins=TRAIN_X_BINS, flush_points=TRAIN_CHUNK_ROWS):
+        self.bins = bins
+        self.flush_points = flush_points
+        self.groups, self.keys = {}, {}  # (rarity, is_st) / (skin_id, is_st) -> index
+        self.group_sums = np.zeros((0, 3, bins))  # weight, weight * x, weight * ratio per bin
+        self.group_counts = np.zeros(0)
+        self.key_sums = np.zeros((5, 0))  # n, sx, sxx, sy, sxy (weighted)
+        self.key_counts = np.zeros(0)
+        self.points = 0
+        self._g = ([], [], [], [])  # group index, x, ratio, weight
+        self._k = ([], [], [], [])  # key index, x, log(ratio - 1), weight
+
+    def add_snapshot(self, meta, buckets, weight):
+        """meta: (skin_id, rarity, is_st, min_float, max_float); buckets: [(min_float, price)] of one goods snapshot."""
+        sid, rarity, is_st, s_min, s_max = meta
+        span = s_max - s_min
+        if span <= 0: return
+        base = next((p for b_min, p in buckets if b_min == BASE_BUCKET_MIN), None) or min(p for _, p in buckets)
+        if base <= 0: return
+
+        g = self.groups.setdefault((rarity, is_st), len(self.groups))
+        k = None
+        for b_min, price in buckets:
+            x = max(0.0, min(1.0, (b_min - s_min) / span))
+            ratio = price / base
+            for col, v in zip(self._g, (g, x, ratio, weight)): col.append(v)
+            if ratio - 1 >= CURVE_MIN_EXCESS:
+                if k is None:
+                    k = self.keys.setdefault((sid, is_st), len(self.keys))
+                for col, v in zip(self._k, (k, x, np.log(ratio - 1), weight)): col.append(v)
+        if len(self._g[0]) >= self.flush_points:
+            self.flush()
+
+    def flush(self):
+        g, x, ratio, w = (np.array(c) for c in self._g)
+        if len(g):
+            n = len(self.groups)
+            if self.group_sums.shape[0] < n:
+                self.group_sums = np.concatenate([self.group_sums, np.zeros((n - self.group_sums.shape[0], 3, self.bins))])
+                self.group_counts = np.concatenate([self.group_counts, np.zeros(n - len(self.group_counts))])
+            cell = g * self.bins + np.minimum((x * self.bins).astype(np.int64), self.bins - 1)
+            for j, v in enumerate((w, w * x, w * ratio)):
+                self.group_sums[:, j, :] += np.bincount(cell, weights=v, minlength=n * self.bins).reshape(n, self.bins)
+            self.group_counts += np.bincount(g, minlength=n)
+            self.points += len(g)
+
+        k, x, y, w = (np.array(c) for c in self._k)
+        if len(k):
+            n = len(self.keys)
+            if self.key_sums.shape[1] < n:
+                self.key_sums = np.concatenate([self.key_sums, np.zeros((5, n - self.key_sums.shape[1]))], axis=1)
+                self.key_counts = np.concatenate([self.key_counts, np.zeros(n - len(self.key_counts))])
+            for j, v in enumerate((w, w * x, w * x * x, w * y, w * x * y)):
+                self.key_sums[j] += np.bincount(k, weights=v, minlength=n)
+            self.key_counts += np.bincount(k, minlength=n)
+
+        self._g = ([], [], [], [])
+        self._k = ([], [], [], [])
+
+    def fit_rarity_models(self):
+        """(rarity, is_st) curve_fit of model_func on the weighted bin means; returns model_params.json content."""
+        self.flush()
+        model_params = {}
+        for (rarity, is_st), g in sorted(self.groups.items()):
+            sw, swx, swy = self.group_sums[g]
+            used = sw > 0
+            if self.group_counts[g] < 3 or used.sum() < 2:
+                print(f"Skipping (Rarity {rarity}, ST {is_st}): Not enough data ({int(self.group_counts[g])} points, {int(used.sum())} float bins)")
+                continue
+            x, y = swx[used] / sw[used], swy[used] / sw[used]
+            try:
+                # Initial guess: alpha=2.0 (item worth 3x at 0 float), k=10.0 (fast decay)
+                popt, _ = curve_fit(model_func, x, y, p0=[2.0, 10.0], bounds=(0, [100.0, 100.0]), sigma=1 / np.sqrt(sw[used]))
+            except Exception as e:
+                print(f"Failed to fit (Rarity {rarity}, ST {is_st}): {e}")
+                continue
+            name = f"{rarity}_{is_st}"
+            model_params[name] = {"alpha": round(float(popt[0]), 4), "k": round(float(popt[1]), 4)}
+            print(f"Success: (Rarity {rarity}, ST {is_st}) -> alpha={model_params[name]['alpha']}, k={model_params[name]['k']}")
+        return model_params
+
+    def fit_skin_curves(self, rarities, model_params, shrinkage=CURVE_SHRINKAGE):
+        """Per-(skin, StatTrak) curves shrunk toward the rarity fits, as curves.train_skin_curves()."""
+        self.flush()
+        if not self.keys:
+            return {}
+        keys = sorted(self.keys, key=self.keys.get)
+        pooled = self.key_sums.sum(axis=1)
+        mx, mxx = pooled[1] / pooled[0], pooled[2] / pooled[0]
+        prior_a, prior_k = curve_priors(keys, rarities, model_params, *pooled_prior_stats(pooled))
+        alpha, k, _ = fit_curve_stats(self.key_sums, mx, mxx, prior_a, prior_k, shrinkage)
+        return {f"{sid}_{int(is_st)}": {"alpha": round(float(a), 4), "k": round(float(kk), 4), "n": int(n)}
+                for (sid, is_st), a, kk, n in zip(keys, alpha, k, self.key_counts)}
+
+def goods_metadata(conn):
+    """goods_id -> (skin_id, rarity, is_st, min_float, max_float) of the goods in `prices`."""
+    return {row[0]: tuple(row[1:]) for row in conn.execute('''
+        SELECT p.goods_id, p.skin_id, s.rarity_rank, p.is_stattrak, s.min_float, s.max_float
+        FROM prices p JOIN skins s ON p.skin_id = s.id
+    ''')}
+
+def train_window(conn, as_of=None, window_days=TRAIN_WINDOW_DAYS, half_life_days=TRAIN_HALF_LIFE_DAYS,
+                 chunk_rows=TRAIN_CHUNK_ROWS):
+    """
+    Fits the rarity models and per-skin curves on the float_bucket_history
+    window ending at `as_of` (default: latest snapshot). Observations are
+    weighted by 0.5 ** (age / half_life). Returns (model_params, skin_curves, info).
+    """
+    if as_of is None:
+        as_of = conn.execute("SELECT MAX(recorded_at) FROM float_bucket_history").fetchone()[0]
+        if as_of is None:
+            return {}, {}, None
+    end = datetime.strptime(as_of, TS_FORMAT)
+    start = (end - timedelta(days=window_days)).strftime(TS_FORMAT)
+
+    meta = goods_metadata(conn)
+    acc = TrainingAccumulator(flush_points=chunk_rows)
+    weights = {}  # recorded_at -> recency weight
+    snapshots = 0
+    for ts, gid, buckets in iter_bucket_snapshots(conn, start, as_of, chunk_rows):
+        m = meta.get(gid)
+        if m is None: continue
+        w = weights.get(ts)
+        if w is None:
+            age_days = (end - datetime.strptime(ts, TS_FORMAT)).total_seconds() / 86400
+            w = weights[ts] = 0.5 ** (age_days / half_life_days)
+        acc.add_snapshot(m, buckets, w)
+        snapshots += 1
+
+    model_params = acc.fit_rarity_models()
+    rarities = {m[0]: m[1] for m in meta.values()}
+    curves = acc.fit_skin_curves(rarities, model_params)
+    info = {"as_of": as_of, "window_start": start, "window_days": window_days, "half_life_days": half_life_days,
+            "snapshots": snapshots, "points": acc.points}
+    return model_params, curves, info
+
+def save_model_version(model_params, curves, info, versions_dir=MODEL_VERSIONS_DIR):
+    """Keeps every trained model as model_versions/<version>.json; returns its path."""
+    os.makedirs(versions_dir, exist_ok=True)
+    trained_at = datetime.now()
+    version = trained_at.strftime('%Y%m%d-%H%M%S')
+    path = os.path.join(versions_dir, f"{version}.json")
+    with open(path, "w") as f:
+        json.dump({"version": version, "trained_at": trained_at.strftime(TS_FORMAT), **info,
+                   "model_params": model_params, "skin_curves": curves}, f, indent=4)
+    return path
@@ -0,0 +1,69 @@
+import queue
+import sqlite3
+import threading
+from . import database
+
+_STOP = object()
+
+class BackgroundWriter:
+    """
+    Serializes DB writes on a dedicated thread with its own connection, so
+    pipeline stages hand data over in memory and never wait on SQLite.
+    Jobs run in submission order; each is committed on its own. After a
+    failed job the later ones are dropped (they may depend on it) and the
+    next submission raises the error.
+    """
+    def __init__(self, db_path=None):
+        self.db_path = db_path or database.DB_PATH
+        self.jobs = queue.Queue()
+        self.errors = []
+        self.thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self.thread.start()
+
+    def check(self):
+        """Raises the first error a job hit."""
+        if self.errors:
+            raise self.errors[0]
+
+    def executemany(self, sql, rows):
+        self.check()
+        self.jobs.put(('many', sql, rows))
+
+    def execute(self, sql, params=()):
+        self.check()
+        self.jobs.put(('one', sql, params))
+
+    def call(self, fn):
+        """Runs fn(conn) on the writer thread (for writes that need ids or reads-after-write)."""
+        self.check()
+        self.jobs.put(('call', fn, None))
+
+    def close(self):
+        """Waits for every queued job; raises the first error a job hit."""
+        self.jobs.put(_STOP)
+        self.thread.join()
+        self.check()
+
+    def _run(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        while True:
+            job = self.jobs.get()
+            if job is _STOP:
+                break
+            if self.errors:
+                continue
+            kind, a, b = job
+            try:
+                if kind == 'many':
+                    conn.executemany(a, b)
+                elif kind == 'one':
+                    conn.execute(a, b)
+                else:
+                    a(conn)
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                print(f"Error: background write failed, dropping the next writes: {e}")
+                self.errors.append(e)
+        conn.close()